@@ -0,0 +1,302 @@
+"""Open-loop load test for the chat API against a fake agent service.
+
+Starts `src/api/app.py` under uvicorn in a background thread with the agent
+service replaced by `fake_agents.FakeProjectClient`, then fires requests at
+`/api/chat` and/or `/api/chat/stream` on a fixed arrival schedule, whether or
+not earlier requests have finished. Latency is measured from each request's
+scheduled start, so a stalled server cannot hide its queueing delay.
+
+Everything runs offline. Usage:
+    python api_load.py --rps 20 --duration 30 --endpoint both
+    python api_load.py --rps 50 --first-token-ms 300 --error-rate 0.02 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from fake_agents import FakeProjectClient, FakeServiceConfig, Latency
+
+API_DIR = Path(__file__).parent.parent / "src" / "api"
+sys.path.insert(0, str(API_DIR))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: list[float]) -> dict:
+    """p50/p95/p99/max of a list of seconds, reported in milliseconds."""
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "max_ms": round(max(values, default=0) * 1000, 1),
+    }
+
+
+# =============================================================================
+# SERVER UNDER TEST
+# =============================================================================
+
+class ServerThread:
+    """Run the API app under uvicorn on a private event loop."""
+
+    def __init__(self, fake_client: FakeProjectClient):
+        os.environ.setdefault("AZURE_AI_PROJECT_ENDPOINT", "https://fake.local/api/projects/bench")
+        os.environ.setdefault("AZURE_AGENT_ID", "asst_fake")
+
+        import chat
+        from app import app
+
+        chat.get_project_client = lambda: fake_client
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve())
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+
+async def monitor_loop_lag(samples: list[float], stop: threading.Event, interval: float = 0.01):
+    """Record how late the server's event loop wakes up from short sleeps."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+# =============================================================================
+# LOAD GENERATOR
+# =============================================================================
+
+async def send_chat(client: httpx.AsyncClient, scheduled: float, result: dict):
+    response = await client.post("/api/chat", json={
+        "messages": [{"role": "user", "content": "What is the return policy?"}],
+    })
+    result["status"] = response.status_code
+    result["latency"] = time.perf_counter() - scheduled
+
+
+async def send_stream(client: httpx.AsyncClient, scheduled: float, result: dict):
+    async with client.stream("POST", "/api/chat/stream", json={
+        "messages": [{"role": "user", "content": "What is the return policy?"}],
+    }) as response:
+        result["status"] = response.status_code
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            if "content" in event and "ttft" not in result:
+                result["ttft"] = time.perf_counter() - scheduled
+            if "error" in event:
+                result["error"] = f"stream error: {event['error']}"
+    result["latency"] = time.perf_counter() - scheduled
+
+
+async def run_load(base_url: str, endpoint: str, rps: float, duration: float,
+                   max_in_flight: int, poisson: bool, seed: int) -> list[dict]:
+    """Issue requests on an open-loop schedule and collect per-request results."""
+    rng = random.Random(seed)
+    senders = {"chat": send_chat, "stream": send_stream}
+    kinds = ["chat", "stream"] if endpoint == "both" else [endpoint]
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    timeout = httpx.Timeout(120.0)
+
+    results = []
+    tasks = []
+    in_flight = 0
+
+    async def one(kind: str, scheduled: float):
+        nonlocal in_flight
+        result = {"endpoint": kind, "status": None, "error": None}
+        results.append(result)
+        in_flight += 1
+        try:
+            await senders[kind](client, scheduled, result)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            result["latency"] = time.perf_counter() - scheduled
+        finally:
+            in_flight -= 1
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        start = time.perf_counter()
+        next_at = start
+        i = 0
+        while next_at - start < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = kinds[i % len(kinds)]
+            if in_flight >= max_in_flight:
+                results.append({"endpoint": kind, "status": None, "error": "dropped: too many in flight"})
+            else:
+                tasks.append(asyncio.create_task(one(kind, next_at)))
+            i += 1
+            next_at += rng.expovariate(rps) if poisson else 1 / rps
+        await asyncio.gather(*tasks)
+
+    return results
+
+
+def build_report(results: list[dict], lag_samples: list[float], wall_time: float, args) -> dict:
+    """Aggregate per-request results into a latency/throughput report."""
+    report = {
+        "config": {
+            "endpoint": args.endpoint,
+            "target_rps": args.rps,
+            "duration_s": args.duration,
+            "first_token_ms": args.first_token_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate,
+        },
+        "wall_time_s": round(wall_time, 2),
+        "endpoints": {},
+        "event_loop_lag": {**summarize(lag_samples), "samples": len(lag_samples)},
+    }
+
+    for kind in sorted({r["endpoint"] for r in results}):
+        rows = [r for r in results if r["endpoint"] == kind]
+        ok = [r for r in rows if r["status"] == 200 and not r["error"]]
+        stats = {
+            "sent": len(rows),
+            "succeeded": len(ok),
+            "failed": len(rows) - len(ok),
+            "throughput_rps": round(len(ok) / wall_time, 2) if wall_time else 0.0,
+            "latency": summarize([r["latency"] for r in ok]),
+        }
+        ttft = [r["ttft"] for r in ok if "ttft" in r]
+        if ttft:
+            stats["time_to_first_token"] = summarize(ttft)
+        errors = {}
+        for r in rows:
+            if r not in ok:
+                key = r["error"] or f"HTTP {r['status']}"
+                errors[key] = errors.get(key, 0) + 1
+        if errors:
+            stats["errors"] = errors
+        report["endpoints"][kind] = stats
+
+    return report
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 60)
+    print("CHAT API LOAD TEST")
+    print("=" * 60)
+    for kind, stats in report["endpoints"].items():
+        latency = stats["latency"]
+        print(f"\n/api/{'chat' if kind == 'chat' else 'chat/stream'}")
+        print(f"  Requests:    {stats['succeeded']}/{stats['sent']} succeeded")
+        print(f"  Throughput:  {stats['throughput_rps']} req/s")
+        print(f"  Latency:     p50 {latency['p50_ms']} ms | p95 {latency['p95_ms']} ms | p99 {latency['p99_ms']} ms")
+        if "time_to_first_token" in stats:
+            ttft = stats["time_to_first_token"]
+            print(f"  First token: p50 {ttft['p50_ms']} ms | p95 {ttft['p95_ms']} ms | p99 {ttft['p99_ms']} ms")
+        for error, count in stats.get("errors", {}).items():
+            print(f"  ✗ {count} x {error}")
+
+    lag = report["event_loop_lag"]
+    print(f"\nEvent loop lag: p50 {lag['p50_ms']} ms | p99 {lag['p99_ms']} ms | max {lag['max_ms']} ms")
+    if lag["p99_ms"] > 50:
+        print("  ⚠ The server's event loop is being blocked - look for sync calls inside async handlers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat API against a fake agent service")
+    parser.add_argument("--endpoint", choices=["chat", "stream", "both"], default="both")
+    parser.add_argument("--rps", type=float, default=10, help="Target arrival rate (requests/second)")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds to generate load for")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="Drop arrivals beyond this many open requests")
+    parser.add_argument("--poisson", action="store_true", help="Use Poisson arrivals instead of a fixed interval")
+    parser.add_argument("--request-ms", type=float, default=20, help="Median latency of each service call")
+    parser.add_argument("--request-p99-ms", type=float, default=80)
+    parser.add_argument("--first-token-ms", type=float, default=600, help="Median time to the first generated token")
+    parser.add_argument("--first-token-p99-ms", type=float, default=2500)
+    parser.add_argument("--tokens-per-second", type=float, default=60)
+    parser.add_argument("--response-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of service calls failing with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of service calls failing with 429")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    fake_client = FakeProjectClient(FakeServiceConfig(
+        request_latency=Latency(args.request_ms, args.request_p99_ms),
+        first_token_latency=Latency(args.first_token_ms, args.first_token_p99_ms),
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    ))
+
+    server = ServerThread(fake_client)
+    server.start()
+    print(f"API under test at {server.base_url} (fake agent service)")
+    print(f"Generating {args.rps} req/s for {args.duration}s against: {args.endpoint}")
+
+    lag_samples = []
+    stop = threading.Event()
+    lag_future = asyncio.run_coroutine_threadsafe(monitor_loop_lag(lag_samples, stop), server.loop)
+
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(run_load(
+            server.base_url, args.endpoint, args.rps, args.duration,
+            args.max_in_flight, args.poisson, args.seed,
+        ))
+    finally:
+        wall_time = time.perf_counter() - start
+        stop.set()
+        lag_future.result(timeout=5)
+        server.stop()
+
+    report = build_report(results, lag_samples, wall_time, args)
+    report["service_calls"] = dict(fake_client.agents.backend.calls)
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nReport saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark the ingestion chunker against the previous character-based one.
+
+Generates large synthetic documents (markdown sections, paragraphs, and long
+unbroken runs as seen in badly extracted PDFs), then times
+`scripts/chunker.chunk_text` against the original regex/join implementation
+kept here as `legacy_chunk_text`. Usage:
+    python chunking.py --sizes 100000 1000000 4000000
+    python chunking.py --sizes 2000000 --output chunking.json
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from chunker import chunk_text  # noqa: E402
+from embeddings import count_tokens  # noqa: E402
+
+WORDS = (
+    "contoso product policy return warranty support customer order shipping "
+    "refund hardware software license service device battery display network "
+    "security data privacy account billing invoice escalation response"
+).split()
+
+
+def legacy_chunk_text(text: str, max_size: int = 1000, overlap: int = 200) -> list[str]:
+    """The chunker 01_upload_data.py used before scripts/chunker.py."""
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    chunks = []
+    current_chunk = []
+    current_length = 0
+
+    for sentence in sentences:
+        sentence_len = len(sentence)
+
+        if current_length + sentence_len > max_size and current_chunk:
+            chunks.append(' '.join(current_chunk))
+            # Keep overlap
+            overlap_text = ' '.join(current_chunk)[-overlap:]
+            current_chunk = [overlap_text] if overlap_text else []
+            current_length = len(overlap_text)
+
+        current_chunk.append(sentence)
+        current_length += sentence_len
+
+    if current_chunk:
+        chunks.append(' '.join(current_chunk))
+
+    return chunks
+
+
+def make_document(size: int, rng: random.Random, unbroken: bool = False) -> str:
+    """Synthetic markdown document of about `size` characters."""
+    if unbroken:
+        return " ".join(rng.choice(WORDS) for _ in range(size // 7))[:size]
+
+    parts = []
+    length = 0
+    section = 0
+    while length < size:
+        if rng.random() < 0.1:
+            section += 1
+            part = f"## Section {section}"
+        else:
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 30))).capitalize() + "."
+                for _ in range(rng.randint(2, 8))
+            ]
+            part = " ".join(sentences)
+        parts.append(part)
+        length += len(part) + 2
+    return "\n\n".join(parts)
+
+
+def timed(fn, *args) -> tuple[float, list]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Document sizes in characters")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in args.sizes:
+        for kind in ("structured", "unbroken"):
+            text = make_document(size, rng, unbroken=kind == "unbroken")
+            legacy_seconds, legacy = timed(legacy_chunk_text, text)
+            new_seconds, chunks = timed(chunk_text, text)
+            row = {
+                "kind": kind,
+                "chars": len(text),
+                "legacy_seconds": round(legacy_seconds, 4),
+                "legacy_chunks": len(legacy),
+                "legacy_max_tokens": max(count_tokens(c) for c in legacy),
+                "new_seconds": round(new_seconds, 4),
+                "new_chunks": len(chunks),
+                "new_max_tokens": max(c.tokens for c in chunks),
+                "new_mb_per_second": round(len(text) / 1e6 / max(new_seconds, 1e-9), 2),
+            }
+            results.append(row)
+            print(
+                f"{kind:>10} {row['chars']:>10,} chars | legacy {legacy_seconds:8.3f}s "
+                f"{len(legacy):>6} chunks (max {row['legacy_max_tokens']} tokens) | "
+                f"new {new_seconds:8.3f}s {len(chunks):>6} chunks (max {row['new_max_tokens']} tokens)"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""In-process stand-in for the `AIProjectClient.agents` surface.
+
+Mimics the threads, messages and runs operations used by `src/api/chat.py`
+with configurable latency distributions, token streaming rates and error
+injection, so the API can be benchmarked without a Foundry project.
+
+Like the real SDK, every call blocks the calling thread while it "waits" on
+the service. Handlers that call it directly from `async def` code therefore
+stall the event loop, which is exactly what the load test should expose.
+"""
+
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Optional
+
+
+class FakeServiceError(Exception):
+    """Injected service failure, shaped like an Azure HttpResponseError."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"({status_code}) {message}")
+        self.status_code = status_code
+
+
+@dataclass
+class Latency:
+    """Log-normal latency distribution described by its median and p99 (ms)."""
+    median_ms: float
+    p99_ms: Optional[float] = None
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        if not self.p99_ms or self.p99_ms <= self.median_ms:
+            return self.median_ms / 1000
+        # z(0.99) = 2.326 for a standard normal
+        sigma = math.log(self.p99_ms / self.median_ms) / 2.326
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+
+@dataclass
+class FakeServiceConfig:
+    """Behaviour of the fake agent service."""
+    request_latency: Latency = field(default_factory=lambda: Latency(20, 80))
+    first_token_latency: Latency = field(default_factory=lambda: Latency(600, 2500))
+    tokens_per_second: float = 60.0
+    response_tokens: int = 120
+    prompt_tokens_per_message: int = 150
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+def _text_content(text: str) -> SimpleNamespace:
+    return SimpleNamespace(text=SimpleNamespace(value=text, annotations=[]))
+
+
+class _FakeBackend:
+    """Shared state and timing behaviour for all fake operations."""
+
+    def __init__(self, config: FakeServiceConfig):
+        self.config = config
+        self.threads: dict[str, list[SimpleNamespace]] = {}
+        self.calls: dict[str, int] = {}
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def _sample(self, latency: Latency) -> float:
+        with self._lock:
+            return latency.sample(self._rng)
+
+    def call(self, operation: str):
+        """Account for a service call: block for its latency and maybe fail."""
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            roll = self._rng.random()
+        time.sleep(self._sample(self.config.request_latency))
+        if roll < self.config.throttle_rate:
+            raise FakeServiceError(429, "Rate limit is exceeded. Try again later.")
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            raise FakeServiceError(500, "Injected service error")
+
+    def get_thread(self, thread_id: str) -> list[SimpleNamespace]:
+        with self._lock:
+            if thread_id not in self.threads:
+                raise FakeServiceError(404, f"No thread found with id '{thread_id}'")
+            return self.threads[thread_id]
+
+    def add_message(self, thread_id: str, role: str, content: str) -> SimpleNamespace:
+        message = SimpleNamespace(
+            id=f"msg_{uuid.uuid4().hex[:24]}",
+            thread_id=thread_id,
+            role=role,
+            content=[_text_content(content)],
+            created_at=time.time(),
+        )
+        message.text_messages = message.content
+        self.get_thread(thread_id).append(message)
+        return message
+
+    def reply_text(self, tokens: int) -> list[str]:
+        """Words of a canned assistant reply, one per token."""
+        return [f"token{i}" for i in range(tokens)]
+
+    def new_run(self, thread_id: str, agent_id: str) -> SimpleNamespace:
+        prompt_tokens = len(self.get_thread(thread_id)) * self.config.prompt_tokens_per_message
+        return SimpleNamespace(
+            id=f"run_{uuid.uuid4().hex[:24]}",
+            thread_id=thread_id,
+            agent_id=agent_id,
+            status="completed",
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=self.config.response_tokens,
+                total_tokens=prompt_tokens + self.config.response_tokens,
+            ),
+        )
+
+
+class _FakeThreads:
+    def __init__(self, backend: _FakeBackend):
+        self._backend = backend
+
+    def create(self, **kwargs) -> SimpleNamespace:
+        self._backend.call("threads.create")
+        thread_id = f"thread_{uuid.uuid4().hex[:24]}"
+        with self._backend._lock:
+            self._backend.threads[thread_id] = []
+        for message in kwargs.get("messages") or []:
+            self._backend.add_message(thread_id, message["role"], message["content"])
+        return SimpleNamespace(id=thread_id)
+
+    def delete(self, thread_id: str, **kwargs):
+        self._backend.call("threads.delete")
+        with self._backend._lock:
+            self._backend.threads.pop(thread_id, None)
+
+
+class _FakeMessages:
+    def __init__(self, backend: _FakeBackend):
+        self._backend = backend
+
+    def create(self, thread_id: str, *, role: str, content: str, **kwargs) -> SimpleNamespace:
+        self._backend.call("messages.create")
+        return self._backend.add_message(thread_id, role, content)
+
+    def list(self, thread_id: str, *, order: Optional[str] = None, **kwargs) -> list:
+        self._backend.call("messages.list")
+        messages = list(self._backend.get_thread(thread_id))
+        # The service lists newest first unless ascending order is requested
+        if str(order).lower() not in ("asc", "listsortorder.ascending"):
+            messages.reverse()
+        return messages
+
+
+class _FakeRunStream:
+    """Context manager yielding message deltas and the completed run."""
+
+    def __init__(self, backend: _FakeBackend, thread_id: str, agent_id: str):
+        self._backend = backend
+        self._thread_id = thread_id
+        self._agent_id = agent_id
+        self.run = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        backend = self._backend
+        config = backend.config
+        run = self.run = backend.new_run(self._thread_id, self._agent_id)
+        yield SimpleNamespace(event="thread.run.created", data=run)
+
+        time.sleep(backend._sample(config.first_token_latency))
+        words = backend.reply_text(config.response_tokens)
+        delay = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(delay)
+            delta = SimpleNamespace(content=[_text_content(("" if i == 0 else " ") + word)])
+            yield SimpleNamespace(event="thread.message.delta", data=SimpleNamespace(delta=delta))
+
+        backend.add_message(self._thread_id, "assistant", " ".join(words))
+        yield SimpleNamespace(event="thread.run.completed", data=run)
+
+
+class _FakeRuns:
+    def __init__(self, backend: _FakeBackend):
+        self._backend = backend
+
+    def create_and_process(self, thread_id: str, *, agent_id: str, **kwargs) -> SimpleNamespace:
+        self._backend.call("runs.create_and_process")
+        stream = _FakeRunStream(self._backend, thread_id, agent_id)
+        for _ in stream:
+            pass
+        return stream.run
+
+    def stream(self, thread_id: str, *, agent_id: str, **kwargs) -> _FakeRunStream:
+        self._backend.call("runs.stream")
+        return _FakeRunStream(self._backend, thread_id, agent_id)
+
+
+class FakeAgentsClient:
+    """Drop-in for `AIProjectClient.agents` covering threads, messages and runs."""
+
+    def __init__(self, config: Optional[FakeServiceConfig] = None):
+        self.backend = _FakeBackend(config or FakeServiceConfig())
+        self.threads = _FakeThreads(self.backend)
+        self.messages = _FakeMessages(self.backend)
+        self.runs = _FakeRuns(self.backend)
+
+    def create_agent(self, *, model: str, name: str, **kwargs) -> SimpleNamespace:
+        self.backend.call("create_agent")
+        return SimpleNamespace(id=f"asst_{uuid.uuid4().hex[:24]}", name=name, model=model)
+
+    def delete_agent(self, agent_id: str, **kwargs):
+        self.backend.call("delete_agent")
+
+
+class FakeProjectClient:
+    """Drop-in for `AIProjectClient` exposing only the `agents` surface."""
+
+    def __init__(self, config: Optional[FakeServiceConfig] = None):
+        self.agents = FakeAgentsClient(config)
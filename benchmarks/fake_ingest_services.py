@@ -0,0 +1,172 @@
+"""In-process stand-ins for the embeddings API and the search index.
+
+FakeEmbeddingClient mimics `AzureOpenAI.embeddings.create` with per-request
+latency and the deployment's requests-per-minute and tokens-per-minute
+quota: requests over quota fail with 429 and a Retry-After header, like the
+real service. FakeSearchClient mimics `SearchClient` document uploads with
+latency, a payload size limit and per-document failure injection.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Optional
+
+from fake_agents import Latency
+
+
+class FakeApiError(Exception):
+    """Injected failure, shaped like openai.APIStatusError / HttpResponseError."""
+
+    def __init__(self, status_code: int, message: str, retry_after: float = None):
+        super().__init__(f"({status_code}) {message}")
+        self.status_code = status_code
+        headers = {"retry-after-ms": str(int(retry_after * 1000))} if retry_after else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+@dataclass
+class FakeEmbeddingConfig:
+    """Behaviour of the fake embedding deployment."""
+    latency: Latency = field(default_factory=lambda: Latency(120, 400))
+    # Extra latency per 1K input tokens
+    ms_per_1k_tokens: float = 5.0
+    dimensions: int = 1536
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class _SlidingWindow:
+    """Usage over the last 60 seconds, for quota enforcement."""
+
+    def __init__(self):
+        self.events = deque()
+        self.total = 0
+
+    def usage(self, now: float) -> float:
+        while self.events and self.events[0][0] <= now - 60:
+            self.total -= self.events.popleft()[1]
+        return self.total
+
+    def add(self, now: float, amount: float):
+        self.events.append((now, amount))
+        self.total += amount
+
+    def retry_after(self, now: float) -> float:
+        return max(0.05, self.events[0][0] + 60 - now) if self.events else 1.0
+
+
+class FakeEmbeddingClient:
+    """`client.embeddings.create(...)` with latency and quota behaviour."""
+
+    def __init__(self, config: FakeEmbeddingConfig = None):
+        self.config = config or FakeEmbeddingConfig()
+        self.embeddings = self
+        self.requests = 0
+        self.inputs = 0
+        self.throttled = 0
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._request_window = _SlidingWindow()
+        self._token_window = _SlidingWindow()
+
+    def with_options(self, **kwargs) -> "FakeEmbeddingClient":
+        return self
+
+    def _vector(self, text: str, dimensions: int) -> list[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        rng = random.Random(seed)
+        return [rng.uniform(-1, 1) for _ in range(dimensions)]
+
+    def create(self, input: list[str], model: str, dimensions: int = None, **kwargs):
+        tokens = sum(len(text) // 4 + 1 for text in input)
+        config = self.config
+        with self._lock:
+            now = time.monotonic()
+            if config.requests_per_minute and self._request_window.usage(now) + 1 > config.requests_per_minute:
+                self.throttled += 1
+                raise FakeApiError(429, "Requests per minute exceeded", self._request_window.retry_after(now))
+            if config.tokens_per_minute and self._token_window.usage(now) + tokens > config.tokens_per_minute:
+                self.throttled += 1
+                raise FakeApiError(429, "Tokens per minute exceeded", self._token_window.retry_after(now))
+            self._request_window.add(now, 1)
+            self._token_window.add(now, tokens)
+            delay = config.latency.sample(self._rng) + config.ms_per_1k_tokens * tokens / 1e6
+            failed = self._rng.random() < config.error_rate
+
+        time.sleep(delay)
+        if failed:
+            raise FakeApiError(503, "Service unavailable")
+        with self._lock:
+            self.requests += 1
+            self.inputs += len(input)
+        size = dimensions or config.dimensions
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=self._vector(text, size)) for i, text in enumerate(input)
+        ])
+
+
+@dataclass
+class FakeSearchConfig:
+    """Behaviour of the fake search index."""
+    latency: Latency = field(default_factory=lambda: Latency(80, 300))
+    # Extra latency per MB of request payload
+    ms_per_mb: float = 40.0
+    max_request_bytes: int = 16 * 1024 * 1024
+    document_failure_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class FakeSearchClient:
+    """`SearchClient` document operations with latency and limits; stores nothing."""
+
+    def __init__(self, config: FakeSearchConfig = None):
+        self.config = config or FakeSearchConfig()
+        self.requests = 0
+        self.documents = 0
+        self.keys: set[str] = set()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+
+    def _index(self, documents: list[dict]) -> list[SimpleNamespace]:
+        size = len(json.dumps(documents, separators=(",", ":")))
+        if size > self.config.max_request_bytes:
+            raise FakeApiError(413, "Request entity too large")
+        with self._lock:
+            delay = self.config.latency.sample(self._rng) + self.config.ms_per_mb * size / 1e9
+            failures = [self._rng.random() < self.config.document_failure_rate for _ in documents]
+        time.sleep(delay)
+        results = []
+        with self._lock:
+            self.requests += 1
+            for doc, failed in zip(documents, failures):
+                if not failed:
+                    self.keys.add(doc["id"])
+                    self.documents += 1
+                results.append(SimpleNamespace(
+                    key=doc["id"], succeeded=not failed, status_code=503 if failed else 201,
+                    error_message="Service busy" if failed else None,
+                ))
+        return results
+
+    def upload_documents(self, documents: list[dict]):
+        return self._index(documents)
+
+    def merge_documents(self, documents: list[dict]):
+        return self._index(documents)
+
+    def delete_documents(self, documents: list[dict]):
+        with self._lock:
+            for doc in documents:
+                self.keys.discard(doc["id"])
+        return [SimpleNamespace(key=doc["id"], succeeded=True, status_code=200) for doc in documents]
+
+    def close(self):
+        pass
@@ -0,0 +1,159 @@
+"""Minimal in-process Redis-protocol server.
+
+Serves the subset of commands used by `src/api/shared_state.RedisState`
+(GET, SET with PX/EX/NX, DEL, INCR, EXPIRE, TTL, PING, AUTH, SELECT), so the
+Redis backend can be exercised without a Redis installation.
+
+Usage:
+    python fake_redis.py --port 6379
+    SHARED_STATE_URL=redis://127.0.0.1:6379/0 uvicorn app:app --workers 4
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+from typing import Optional
+
+
+class FakeRedisStore:
+    """Thread-safe key space with millisecond expiry."""
+
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+
+    def live(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return b"-ERR " + str(reply).encode() + b"\r\n"
+    if isinstance(reply, str):
+        return b"+" + reply.encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":" + str(reply).encode() + b"\r\n"
+    if isinstance(reply, bytes):
+        return b"$" + str(len(reply)).encode() + b"\r\n" + reply + b"\r\n"
+    return b"*" + str(len(reply)).encode() + b"\r\n" + b"".join(_encode(r) for r in reply)
+
+
+def execute(store: FakeRedisStore, args: list[bytes]):
+    """Run one command against the store and return its reply."""
+    command = args[0].upper()
+    now = time.time()
+    with store.lock:
+        if command in (b"PING", b"AUTH", b"SELECT"):
+            return "PONG" if command == b"PING" else "OK"
+        if command == b"GET":
+            return store.live(args[1])
+        if command == b"SET":
+            key, value, expires_at, nx = args[1], args[2], None, False
+            options = [a.upper() for a in args[3:]]
+            for i, option in enumerate(options):
+                if option == b"PX":
+                    expires_at = now + int(args[4 + i]) / 1000
+                elif option == b"EX":
+                    expires_at = now + int(args[4 + i])
+                elif option == b"NX":
+                    nx = True
+            if nx and store.live(key) is not None:
+                return None
+            store.data[key] = (value, expires_at)
+            return "OK"
+        if command == b"DEL":
+            return sum(1 for key in args[1:] if store.data.pop(key, None) is not None)
+        if command == b"INCR":
+            current = store.live(args[1])
+            value = int(current or 0) + 1
+            expires_at = store.data[args[1]][1] if current is not None else None
+            store.data[args[1]] = (str(value).encode(), expires_at)
+            return value
+        if command in (b"EXPIRE", b"PEXPIRE"):
+            current = store.live(args[1])
+            if current is None:
+                return 0
+            seconds = int(args[2]) / (1000 if command == b"PEXPIRE" else 1)
+            store.data[args[1]] = (current, now + seconds)
+            return 1
+        if command == b"TTL":
+            if store.live(args[1]) is None:
+                return -2
+            expires_at = store.data[args[1]][1]
+            return -1 if expires_at is None else int(expires_at - now)
+        if command == b"FLUSHALL":
+            store.data.clear()
+            return "OK"
+    return ValueError(f"unknown command '{command.decode()}'")
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self) -> Optional[list[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            try:
+                reply = execute(self.server.store, args)
+            except (IndexError, ValueError) as e:
+                reply = ValueError(f"bad arguments: {e}")
+            self.wfile.write(_encode(reply))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP server. Use port 0 to pick a free port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _RespHandler)
+        self.store = FakeRedisStore()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "FakeRedisServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a minimal Redis-protocol stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = FakeRedisServer(args.host, args.port)
+    print(f"Fake Redis listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Keyword, vector and hybrid retrieval on the sample data, scored against evals.
+
+Chunks `data/*.txt` with the ingestion chunker, loads them into the local
+search index (`scripts/local_search.py`), and runs each question in
+`evals/ground_truth.jsonl` as a BM25, vector and hybrid (RRF) query.
+
+The ground truth holds answers rather than chunk IDs, so a chunk counts as
+relevant when it contains at least half as many of the answer's terms as the
+best-matching chunk does. Vectors come from an offline hashed bag-of-words
+embedder, so vector and hybrid numbers check ranking and fusion mechanics,
+not embedding quality. Usage:
+    python hybrid_search.py --k 3
+    python hybrid_search.py --k 5 --chunk-tokens 32 --output hybrid.json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from chunker import chunk_text  # noqa: E402
+from keyword_search import tokenize  # noqa: E402
+from local_search import LocalSearchClient  # noqa: E402
+
+DIMENSIONS = 256
+
+
+def hashed_embedding(text: str) -> np.ndarray:
+    """Deterministic bag-of-words vector: each term adds +-1 to a hashed slot."""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for term in tokenize(text):
+        digest = hashlib.blake2b(term.encode(), digest_size=8).digest()
+        slot = int.from_bytes(digest[:4], "little") % DIMENSIONS
+        vector[slot] += 1 if digest[4] & 1 else -1
+    return vector
+
+
+def relevant_ids(truth: str, documents: list[dict]) -> set[str]:
+    terms = set(tokenize(truth))
+    coverage = {doc["id"]: len(terms & set(tokenize(doc["content"]))) for doc in documents}
+    best = max(coverage.values())
+    return {doc_id for doc_id, count in coverage.items() if best and count * 2 >= best}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=3, help="Cut-off for recall@k")
+    parser.add_argument("--chunk-tokens", type=int, default=48,
+                        help="Chunk size; smaller than ingestion's so the tiny sample corpus has enough chunks to rank")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs of each query")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    documents = []
+    for path in sorted((ROOT / "data").glob("*.txt")):
+        for i, chunk in enumerate(chunk_text(path.read_text(encoding="utf-8"), args.chunk_tokens, 0)):
+            documents.append({
+                "id": f"{path.stem}_c{i}", "content": chunk.text, "title": path.stem.replace("_", " ").title(),
+                "source": path.name, "page_number": 1, "embedding": hashed_embedding(chunk.text),
+            })
+    client = LocalSearchClient("hybrid_benchmark", Path(tempfile.mkdtemp()))
+    client.upload_documents(documents)
+
+    questions = [json.loads(line) for line in (ROOT / "evals" / "ground_truth.jsonl").read_text().splitlines() if line.strip()]
+    modes = {
+        "bm25": lambda q: client.search(search_text=q, top=args.k),
+        "vector": lambda q: client.search(vector_queries=[SimpleNamespace(vector=hashed_embedding(q), k_nearest_neighbors=50)], top=args.k),
+        "hybrid": lambda q: client.search(
+            search_text=q, vector_queries=[SimpleNamespace(vector=hashed_embedding(q), k_nearest_neighbors=50)], top=args.k
+        ),
+    }
+
+    print(f"{len(documents)} chunks, {len(questions)} questions, recall@{args.k}")
+    results = {"chunks": len(documents), "questions": len(questions), "k": args.k}
+    for mode, run in modes.items():
+        recalls, latencies = [], []
+        for item in questions:
+            relevant = relevant_ids(item["truth"], documents)
+            found = {r["id"] for r in run(item["question"])}
+            recalls.append(len(found & relevant) / len(relevant))
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                list(run(item["question"]))
+                latencies.append((time.perf_counter() - started) * 1000)
+        row = {
+            "recall": round(float(np.mean(recalls)), 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        }
+        results[mode] = row
+        print(f"  {mode:>6}: recall@{args.k} {row['recall']:.3f} | p50 {row['p50_ms']}ms p95 {row['p95_ms']}ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Ingestion throughput benchmark on a synthetic corpus, fully offline.
+
+Generates PDFs and text files (`synthetic_corpus.py`), then times each
+ingestion stage on its own and the streaming pipeline end to end, with the
+embeddings API and search index replaced by fakes
+(`fake_ingest_services.py`) that have realistic latency and quota:
+
+    extract   pages/sec through PdfExtractor's worker processes
+    chunk     chunks/sec through build_documents (chunk_text), as 01_upload_data.py runs it
+    embed     embeddings/sec through EmbeddingScheduler
+    upload    documents/sec through SearchUploader
+    pipeline  chunks/sec through run_pipeline, as 01_upload_data.py runs it
+
+Peak RSS of this process and its extraction workers is reported per stage.
+Results are written as JSON with the git commit, so runs on different
+commits can be compared. Usage:
+    python ingest_bench.py --pdfs 20 --pages 50 --txts 20
+    python ingest_bench.py --corpus ../data --embed-ms 50 --output ingest.json
+    python ingest_bench.py --tpm 200000 --rpm 1200 --output ingest_quota.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from embeddings import EmbeddingScheduler  # noqa: E402
+from fake_agents import Latency  # noqa: E402
+from fake_ingest_services import (  # noqa: E402
+    FakeEmbeddingClient, FakeEmbeddingConfig, FakeSearchClient, FakeSearchConfig,
+)
+from ingest_pipeline import batch_documents, run_pipeline  # noqa: E402
+from pdf_extract import PdfExtractor  # noqa: E402
+from search_uploader import SearchUploader  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+
+def load_upload_script():
+    """Import scripts/01_upload_data.py (not a valid module name) for build_documents."""
+    spec = importlib.util.spec_from_file_location("upload_data", ROOT / "scripts" / "01_upload_data.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _rss_kb(pid: str = "self") -> int:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> list[str]:
+    try:
+        return Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    except OSError:
+        return []
+
+
+class PeakMemory:
+    """Sample resident memory of this process and its children in the background.
+
+    Without /proc (macOS, Windows) only this process's lifetime peak from
+    getrusage is available.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            total = _rss_kb() + sum(_rss_kb(child) for child in _children(os.getpid()))
+            self.peak_kb = max(self.peak_kb, total)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakMemory":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if not self.peak_kb:
+            # ru_maxrss is KB on Linux, bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak_kb = peak // 1024 if sys.platform == "darwin" else peak
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak_kb / 1024, 1)
+
+
+@contextmanager
+def stage(results: dict, name: str, unit: str):
+    """Time a stage; the body sets row["items"] to the number of units processed."""
+    row = {"items": 0}
+    with PeakMemory() as memory:
+        started = time.perf_counter()
+        yield row
+        elapsed = time.perf_counter() - started
+    row.update({
+        "seconds": round(elapsed, 3),
+        f"{unit}_per_sec": round(row["items"] / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": memory.peak_mb,
+    })
+    results[name] = row
+    extras = ", ".join(f"{k} {v}" for k, v in row.items() if k not in ("items", "seconds", f"{unit}_per_sec", "peak_rss_mb"))
+    print(
+        f"  {name:>8}: {row['items']:>7} {unit} in {row['seconds']:>7.2f}s = {row[f'{unit}_per_sec']:>9,.1f} {unit}/s"
+        f" | peak RSS {row['peak_rss_mb']} MB" + (f" | {extras}" if extras else "")
+    )
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="Benchmark these .pdf/.txt files instead of a synthetic corpus")
+    parser.add_argument("--pdfs", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=20, help="Pages per synthetic PDF")
+    parser.add_argument("--txts", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-ms", type=float, default=120, help="Median embedding request latency")
+    parser.add_argument("--embed-p99-ms", type=float, default=400)
+    parser.add_argument("--rpm", type=int, default=0, help="Fake deployment requests/min quota (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Fake deployment tokens/min quota (0 = unlimited)")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--upload-ms", type=float, default=80, help="Median search upload request latency")
+    parser.add_argument("--upload-p99-ms", type=float, default=300)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = args.corpus
+    else:
+        corpus = Path(tempfile.mkdtemp(prefix="ingest_bench_"))
+        started = time.perf_counter()
+        counts = generate_corpus(corpus, args.pdfs, args.pages, args.txts, seed=args.seed)
+        print(f"Generated {counts['pdfs']} PDF(s) / {counts['pdf_pages']} pages and {counts['txts']} text file(s) "
+              f"in {time.perf_counter() - started:.1f}s at {corpus}")
+    paths = sorted(p for p in corpus.iterdir() if p.suffix.lower() in (".pdf", ".txt"))
+    pdfs = [p for p in paths if p.suffix.lower() == ".pdf"]
+
+    # Both fakes are deterministic for a given seed
+    def embedding_client():
+        return FakeEmbeddingClient(FakeEmbeddingConfig(
+            latency=Latency(args.embed_ms, args.embed_p99_ms), dimensions=args.dimensions,
+            requests_per_minute=args.rpm, tokens_per_minute=args.tpm, seed=args.seed,
+        ))
+
+    def search_client():
+        return FakeSearchClient(FakeSearchConfig(latency=Latency(args.upload_ms, args.upload_p99_ms), seed=args.seed))
+
+    # Quotas are enforced by the fake; the scheduler gets the same limits, as it would from the environment
+    quota = {"requests_per_minute": args.rpm or 10**9, "tokens_per_minute": args.tpm or 10**12}
+    upload_data = load_upload_script()
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "corpus": {"path": str(corpus), "pdfs": len(pdfs), "txts": len(paths) - len(pdfs)},
+        "config": {k: v for k, v in vars(args).items() if k not in ("corpus", "output")},
+    }
+    stages = results["stages"] = {}
+    print(f"Benchmarking {len(paths)} file(s) on {os.cpu_count()} CPU(s), commit {results['commit'][:12]}")
+
+    pages = {}
+    with stage(stages, "extract", "pages") as row:
+        extractor = PdfExtractor()
+        for path, file_pages in extractor.iter_pages(pdfs):
+            pages[path] = file_pages
+            row["items"] += len(file_pages)
+        extractor.close()
+        row["quarantined"] = len(extractor.quarantined)
+
+    texts = [text for file_pages in pages.values() for _, text in file_pages]
+    texts += [p.read_text(encoding="utf-8") for p in paths if p.suffix.lower() == ".txt"]
+    with stage(stages, "chunk", "chunks") as row:
+        documents = []
+        for path in paths:
+            documents.extend(upload_data.build_documents(path, pages.get(path)))
+        row["items"] = len(documents)
+    results["corpus"]["pages"] = sum(len(p) for p in pages.values())
+    results["corpus"]["characters"] = sum(len(t) for t in texts)
+
+    with stage(stages, "embed", "embeddings") as row:
+        client = embedding_client()
+        scheduler = EmbeddingScheduler(client, dimensions=args.dimensions, **quota)
+        futures = [scheduler.submit([d["content"] for d in batch]) for batch in batch_documents(documents)]
+        vectors = [vector for future in futures for vector in future.result()]
+        scheduler.close()
+        row["items"] = len(vectors)
+        row["requests"] = client.requests
+        row["throttled"] = client.throttled
+    for doc, vector in zip(documents, vectors):
+        doc["embedding"] = vector
+
+    with stage(stages, "upload", "docs") as row:
+        uploader = SearchUploader(search_client())
+        failed = uploader.upload(documents)
+        uploader.close()
+        row["items"] = len(documents) - len(failed)
+        row["failed"] = len(failed)
+    del documents, vectors
+
+    with stage(stages, "pipeline", "chunks") as row:
+        client = embedding_client()
+        scheduler = EmbeddingScheduler(client, dimensions=args.dimensions, **quota)
+        uploader = SearchUploader(search_client())
+        extractor = PdfExtractor()
+        try:
+            pipeline = run_pipeline(upload_data.iter_sources(paths, extractor), scheduler, uploader)
+        finally:
+            extractor.close()
+            scheduler.close()
+            uploader.close()
+        row["items"] = pipeline.uploaded
+        row["failed"] = len(pipeline.failed_ids)
+        row["throttled"] = client.throttled
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Synthetic PDF and text corpora for ingestion benchmarks.
+
+Documents look like the sample data: markdown-style headings, policy-like
+paragraphs and bullet lists, with a share of boilerplate repeated across
+files. PDFs are written directly (uncompressed text streams, standard
+Helvetica), so no PDF library is needed. Usage:
+    python synthetic_corpus.py out/ --pdfs 20 --pages 50 --txts 20
+"""
+
+import argparse
+import random
+from pathlib import Path
+
+WORDS = (
+    "contoso product policy return warranty support customer order shipping refund "
+    "hardware software license service device battery display network security data "
+    "privacy account billing invoice escalation response cloud platform analytics "
+    "subscription enterprise agreement priority ticket replacement inspection"
+).split()
+
+BOILERPLATE = [
+    "All prices are in USD and subject to change without notice.",
+    "Contact support at support@contoso.com or 1-800-CONTOSO for assistance.",
+    "This document is provided for informational purposes only.",
+]
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + "."
+
+
+def page_lines(rng: random.Random, lines: int = 45) -> list[str]:
+    """One page worth of lines, at most ~90 characters each."""
+    result = []
+    while len(result) < lines:
+        roll = rng.random()
+        if roll < 0.08:
+            result.append(f"## {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}")
+        elif roll < 0.3:
+            result.append(f"- {sentence(rng)}"[:90])
+        elif roll < 0.35:
+            result.append(rng.choice(BOILERPLATE))
+        else:
+            words = sentence(rng).split()
+            line = []
+            for word in words:
+                if sum(len(w) + 1 for w in line) + len(word) > 88:
+                    result.append(" ".join(line))
+                    line = []
+                line.append(word)
+            result.append(" ".join(line))
+    return result[:lines]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: list[list[str]]):
+    """Write a minimal PDF with one text stream per page."""
+    objects = []
+    page_ids = []
+    font_id = 3
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(None)  # pages tree, filled in once page IDs are known
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for lines in pages:
+        body = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        body += [f"({_escape(line)}) '" for line in lines]
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def generate_corpus(directory: Path, pdfs: int, pages: int, txts: int, txt_pages: int = 5, seed: int = 0) -> dict:
+    """Write `pdfs` PDFs of `pages` pages and `txts` text files. Returns counts."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for i in range(pdfs):
+        write_pdf(directory / f"synthetic_{i:04d}.pdf", [page_lines(rng) for _ in range(pages)])
+    for i in range(txts):
+        text = "\n\n".join("\n".join(page_lines(rng)) for _ in range(txt_pages))
+        (directory / f"synthetic_{i:04d}.txt").write_text(f"# Synthetic Document {i}\n\n{text}\n", encoding="utf-8")
+    return {"pdfs": pdfs, "pdf_pages": pdfs * pages, "txts": txts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--pdfs", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=20, help="Pages per PDF")
+    parser.add_argument("--txts", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    counts = generate_corpus(args.directory, args.pdfs, args.pages, args.txts, seed=args.seed)
+    print(f"Wrote {counts['pdfs']} PDF(s) with {counts['pdf_pages']} pages and {counts['txts']} text file(s) to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
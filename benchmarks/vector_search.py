@@ -0,0 +1,101 @@
+"""Retrieval latency and recall of the local vector index.
+
+Loads clustered synthetic vectors into `scripts/local_search.LocalSearchClient`
+and compares exact (brute-force) search with the IVF index on the same
+queries: recall@k of IVF against the exact results, and p50/p95 latency of
+both, with and without a filter. Usage:
+    python vector_search.py --documents 200000 --dimensions 256
+    python vector_search.py --documents 1000000 --nprobe 16 --output vector_search.json
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import local_search  # noqa: E402
+from local_search import LocalSearchClient  # noqa: E402
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def timed_search(client: LocalSearchClient, vector, k: int, exhaustive: bool, filter: str = None):
+    query = SimpleNamespace(vector=vector, k_nearest_neighbors=k, fields="embedding")
+    started = time.perf_counter()
+    ids = [r["id"] for r in client.search(vector_queries=[query], filter=filter, exhaustive=exhaustive, select=["id"])]
+    return (time.perf_counter() - started) * 1000, ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200_000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=500, help="Topics in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=local_search.IVF_NPROBE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    local_search.IVF_THRESHOLD = 0
+    local_search.IVF_NPROBE = args.nprobe
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(args.clusters, args.dimensions)).astype(np.float32)
+
+    client = LocalSearchClient("benchmark", Path(tempfile.mkdtemp()))
+    started = time.perf_counter()
+    for start in range(0, args.documents, 10_000):
+        count = min(10_000, args.documents - start)
+        vectors = centers[rng.integers(0, args.clusters, count)] + 0.5 * rng.normal(size=(count, args.dimensions))
+        client.upload_documents([
+            {"id": str(start + i), "source": f"doc_{(start + i) % 100}.pdf", "page_number": (start + i) % 50,
+             "embedding": vectors[i].astype(np.float32)}
+            for i in range(count)
+        ])
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    timed_search(client, centers[0], args.k, exhaustive=False)
+    build_seconds = time.perf_counter() - started
+
+    results = {"documents": args.documents, "dimensions": args.dimensions, "k": args.k, "nprobe": args.nprobe,
+               "load_seconds": round(load_seconds, 2), "ivf_build_seconds": round(build_seconds, 2)}
+    print(f"Loaded {args.documents:,} x {args.dimensions} vectors in {load_seconds:.1f}s, "
+          f"IVF built in {build_seconds:.1f}s")
+
+    for label, filter in (("unfiltered", None), ("filtered", "source eq 'doc_7.pdf' and page_number lt 20")):
+        exact_ms, ivf_ms, recalls = [], [], []
+        for _ in range(args.queries):
+            center = centers[rng.integers(0, args.clusters)]
+            vector = center + 0.5 * rng.normal(size=args.dimensions)
+            ms, exact = timed_search(client, vector, args.k, exhaustive=True, filter=filter)
+            exact_ms.append(ms)
+            ms, approximate = timed_search(client, vector, args.k, exhaustive=False, filter=filter)
+            ivf_ms.append(ms)
+            if exact:
+                recalls.append(len(set(exact) & set(approximate)) / len(exact))
+        row = {
+            "exact_p50_ms": round(percentile(exact_ms, 50), 2), "exact_p95_ms": round(percentile(exact_ms, 95), 2),
+            "ivf_p50_ms": round(percentile(ivf_ms, 50), 2), "ivf_p95_ms": round(percentile(ivf_ms, 95), 2),
+            "recall": round(float(np.mean(recalls)), 4) if recalls else None,
+        }
+        results[label] = row
+        print(f"  {label:>10}: exact p50 {row['exact_p50_ms']}ms p95 {row['exact_p95_ms']}ms | "
+              f"IVF p50 {row['ivf_p50_ms']}ms p95 {row['ivf_p95_ms']}ms | recall@{args.k} {row['recall']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
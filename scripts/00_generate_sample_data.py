@@ -31,19 +31,25 @@ Options (environment variables):
     NUM_CUSTOMERS=10     Number of customer records (default: 10)
     NUM_PRODUCTS=5       Number of product records (default: 5)
     NUM_ORDERS=15        Number of order records (default: 15)
+    GENERATION_CONCURRENCY=8  Prompts sent to the model at once (default: 8)
+    GENERATION_PAGE_ROWS=50   Rows requested per prompt for CSV tables (default: 50)
 """
 
 import os
 import sys
 import json
 import csv
-import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
 
+from synthetic_data import SyntheticDataEngine, ontology_from_columns
+from token_provider import get_credential
+
 # Load environment from azd
 azure_dir = Path(__file__).parent.parent / ".azure"
 env_name = os.environ.get("AZURE_ENV_NAME", "")
@@ -65,6 +71,8 @@ NUM_DOCUMENTS = int(os.environ.get("NUM_DOCUMENTS", "2"))   # PDFs for Foundry I
 NUM_CUSTOMERS = int(os.environ.get("NUM_CUSTOMERS", "10"))  # Customer records
 NUM_PRODUCTS = int(os.environ.get("NUM_PRODUCTS", "5"))     # Product records
 NUM_ORDERS = int(os.environ.get("NUM_ORDERS", "15"))        # Order records
+GENERATION_CONCURRENCY = int(os.environ.get("GENERATION_CONCURRENCY", "8"))  # Parallel model calls
+GENERATION_PAGE_ROWS = int(os.environ.get("GENERATION_PAGE_ROWS", "50"))     # Rows per prompt, within the output limit
 
 
 # =============================================================================
@@ -78,40 +86,103 @@ def get_project_client():
         raise ValueError("AZURE_AI_PROJECT_ENDPOINT not set. Run 'azd up' first.")
     
     return AIProjectClient(
-        credential=DefaultAzureCredential(),
+        credential=get_credential(),
         endpoint=endpoint,
     )
 
 
-def call_ai(client: AIProjectClient, prompt: str) -> str:
-    """Call AI model and return response text."""
-    model = os.environ.get("AZURE_CHAT_MODEL", "gpt-4o-mini")
+class AIGenerator:
+    """One data-generation agent for the whole session, called from a bounded thread pool.
+
+    Each prompt runs on its own agent thread, so prompts are independent and
+    can run concurrently against the same agent.
+    """
     
-    agent = client.agents.create_agent(
-        model=model,
-        name="data-generator",
-        instructions="You are a helpful data generation assistant. Follow instructions exactly and return only the requested format."
-    )
+    def __init__(self, client: AIProjectClient, concurrency: int = GENERATION_CONCURRENCY):
+        self.client = client
+        self.model = os.environ.get("AZURE_CHAT_MODEL", "gpt-4o-mini")
+        self.agent = None
+        self.lock = threading.Lock()
+        self.concurrency = max(1, concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="generate")
     
-    try:
-        thread = client.agents.threads.create()
-        client.agents.messages.create(thread_id=thread.id, role="user", content=prompt)
-        client.agents.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
+    def _agent_id(self) -> str:
+        with self.lock:
+            if self.agent is None:
+                self.agent = self.client.agents.create_agent(
+                    model=self.model,
+                    name="data-generator",
+                    instructions="You are a helpful data generation assistant. Follow instructions exactly and return only the requested format."
+                )
+            return self.agent.id
+    
+    def call(self, prompt: str) -> str:
+        """Call AI model and return response text."""
+        agent_id = self._agent_id()
+        thread = self.client.agents.threads.create()
+        try:
+            self.client.agents.messages.create(thread_id=thread.id, role="user", content=prompt)
+            self.client.agents.runs.create_and_process(thread_id=thread.id, agent_id=agent_id)
+            
+            messages = self.client.agents.messages.list(thread_id=thread.id)
+            for msg in messages:
+                if msg.role == "assistant":
+                    return msg.content[0].text.value
+            return ""
+        finally:
+            self.client.agents.threads.delete(thread.id)
+    
+    def map(self, prompts: list[str], on_done: Callable[[int, str], None] = None) -> list[str]:
+        """Run prompts concurrently and return the responses in prompt order.
         
-        messages = client.agents.messages.list(thread_id=thread.id)
-        for msg in messages:
-            if msg.role == "assistant":
-                return msg.content[0].text.value
-        return ""
-    finally:
-        client.agents.delete_agent(agent.id)
+        `on_done(index, response)` is called on the calling thread as each
+        prompt finishes, for progress reporting.
+        """
+        futures = {self.executor.submit(self.call, prompt): i for i, prompt in enumerate(prompts)}
+        responses = [None] * len(prompts)
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                responses[i] = future.result()
+                if on_done is not None:
+                    on_done(i, responses[i])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return responses
+    
+    def imap(self, prompts: Iterable[str]) -> Iterator[str]:
+        """Run prompts concurrently, yielding the responses in prompt order.
+        
+        Only a couple of prompts per worker are submitted ahead of the one
+        being yielded, so a long stream of prompts holds a bounded number
+        of responses in memory.
+        """
+        pending = deque()
+        try:
+            for prompt in prompts:
+                pending.append(self.executor.submit(self.call, prompt))
+                if len(pending) >= self.concurrency * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.agent is not None:
+            self.client.agents.delete_agent(self.agent.id)
+            self.agent = None
 
 
 # =============================================================================
 # FOUNDRY IQ: UNSTRUCTURED DATA (PDFs)
 # =============================================================================
 
-def generate_documents(client: AIProjectClient, scenario: str, data_dir: Path):
+def generate_documents(generator: AIGenerator, scenario: str, data_dir: Path):
     """Generate PDF documents for Foundry IQ knowledge base."""
     print(f"\n📄 Generating {NUM_DOCUMENTS} PDF documents for Foundry IQ...")
     
@@ -134,7 +205,7 @@ These should be policy documents, guides, FAQs, or procedures.
 Return ONLY a JSON array of objects with "title" and "description" fields.
 Example: [{{"title": "Return Policy", "description": "Guidelines for product returns"}}]"""
 
-    response = call_ai(client, prompt)
+    response = generator.call(prompt)
     
     try:
         # Extract JSON from response
@@ -144,20 +215,25 @@ Example: [{{"title": "Return Policy", "description": "Guidelines for product ret
     except:
         topics = [{"title": f"Document {i}", "description": scenario} for i in range(1, NUM_DOCUMENTS + 1)]
     
-    for i, topic in enumerate(topics[:NUM_DOCUMENTS], 1):
-        print(f"   Creating document {i}/{NUM_DOCUMENTS}: {topic['title']}")
-        
-        content_prompt = f"""Write a detailed business document for: {topic['title']}
+    topics = topics[:NUM_DOCUMENTS]
+    prompts = []
+    for topic in topics:
+        prompts.append(f"""Write a detailed business document for: {topic['title']}
 Business context: {scenario}
 Description: {topic.get('description', '')}
 
 Write 3-4 paragraphs (300-400 words total) of professional business content.
 Include specific policies, procedures, or guidelines as appropriate.
-Do not include any markdown formatting - just plain text paragraphs."""
-
-        content = call_ai(client, content_prompt)
-        
-        filename = f"doc_{i:02d}_{topic['title'].lower().replace(' ', '_')[:30]}"
+Do not include any markdown formatting - just plain text paragraphs.""")
+    
+    print(f"   Writing {len(topics)} documents, {GENERATION_CONCURRENCY} at a time...")
+    created = 0
+    
+    def write_document(index: int, content: str):
+        # File names come from the topic order, whatever order responses arrive in
+        nonlocal created
+        topic = topics[index]
+        filename = f"doc_{index + 1:02d}_{topic['title'].lower().replace(' ', '_')[:30]}"
         
         if has_reportlab:
             filepath = data_dir / f"{filename}.pdf"
@@ -167,7 +243,10 @@ Do not include any markdown formatting - just plain text paragraphs."""
             with open(filepath, "w") as f:
                 f.write(f"{topic['title']}\n{'='*len(topic['title'])}\n\n{content}")
         
-        print(f"   ✓ Created: {filepath.name}")
+        created += 1
+        print(f"   ✓ Created {created}/{len(topics)}: {filepath.name}")
+    
+    generator.map(prompts, on_done=write_document)
 
 
 def create_pdf(filepath: Path, title: str, content: str):
@@ -202,7 +281,7 @@ def create_pdf(filepath: Path, title: str, content: str):
 # FABRIC IQ: STRUCTURED DATA (CSVs)
 # =============================================================================
 
-def generate_structured_data(client: AIProjectClient, scenario: str, data_dir: Path):
+def generate_structured_data(generator: AIGenerator, scenario: str, data_dir: Path):
     """Generate CSV files for Fabric IQ ontology/NL→SQL."""
     print(f"\n📊 Generating structured data for Fabric IQ...")
     
@@ -225,7 +304,7 @@ Return ONLY valid JSON in this exact format:
 
 Make entities related (e.g., Customers, Products, Orders/Transactions)."""
 
-    response = call_ai(client, schema_prompt)
+    response = generator.call(schema_prompt)
     
     try:
         start = response.find("{")
@@ -240,7 +319,7 @@ Make entities related (e.g., Customers, Products, Orders/Transactions)."""
             {"name": "Orders", "columns": ["OrderID", "CustomerID", "ProductID", "Quantity", "Total", "Date"]}
         ]
     
-    # Generate data for each entity
+    tables = []
     for entity in entities[:3]:  # Limit to 3 entities
         entity_name = entity["name"]
         columns = entity.get("columns", ["ID", "Name", "Value"])[:6]  # Limit columns
@@ -252,75 +331,99 @@ Make entities related (e.g., Customers, Products, Orders/Transactions)."""
             row_count = NUM_PRODUCTS
         else:
             row_count = NUM_ORDERS
+        tables.append((entity_name, columns, row_count))
+    
+    # Tell every page which ID ranges the other tables use, so references line up
+    id_ranges = ", ".join(f"{name} 1-{count}" for name, _, count in tables)
+    
+    # Large tables are requested a page of rows at a time, with IDs continuing
+    # across pages; all pages of all tables run concurrently and each one is
+    # appended to its CSV (in order) as soon as it is validated
+    pages = [
+        (table, start, min(GENERATION_PAGE_ROWS, row_count - start + 1))
+        for table, (_, _, row_count) in enumerate(tables)
+        for start in range(1, row_count + 1, GENERATION_PAGE_ROWS)
+    ]
+    prompts = (
+        page_prompt(scenario, tables[table][0], tables[table][1], start, count, id_ranges)
+        for table, start, count in pages
+    )
+    
+    # Rows the model didn't return are filled in synthetically, with
+    # references drawn from the other tables' ID ranges
+    synthetic = SyntheticDataEngine(
+        ontology_from_columns([(name, columns) for name, columns, _ in tables]),
+        {name: count for name, _, count in tables},
+    )
+    
+    files = []
+    writers = []
+    written = [0] * len(tables)
+    fallback_pages = [0] * len(tables)
+    try:
+        for entity_name, columns, row_count in tables:
+            filename = f"{entity_name.lower().replace(' ', '_')}.csv"
+            f = open(data_dir / filename, "w", newline="", encoding="utf-8")
+            files.append(f)
+            writers.append(csv.DictWriter(f, fieldnames=columns))
+            writers[-1].writeheader()
+            print(f"   Creating {entity_name} ({row_count} rows)...")
         
-        print(f"   Creating {entity_name} ({row_count} rows)...")
-        
-        data_prompt = f"""Generate exactly {row_count} rows of realistic sample data for a "{entity_name}" table.
+        for (table, start, count), response in zip(pages, generator.imap(prompts)):
+            entity_name, columns, row_count = tables[table]
+            rows = parse_page(response, columns, start, count)
+            if not rows:
+                fallback_pages[table] += 1
+            if len(rows) < count:
+                rows += synthetic.rows_for(entity_name, start + len(rows), count - len(rows))
+            writers[table].writerows(rows)
+            written[table] += len(rows)
+            if written[table] == row_count:
+                files[table].close()
+                note = f" ({fallback_pages[table]} page(s) from fallback data)" if fallback_pages[table] else ""
+                print(f"   ✓ Created: {Path(files[table].name).name}{note}")
+            elif row_count > GENERATION_PAGE_ROWS:
+                print(f"     {entity_name}: {written[table]}/{row_count} rows")
+    finally:
+        for f in files:
+            f.close()
+
+
+def page_prompt(scenario: str, entity_name: str, columns: list, start: int, count: int, id_ranges: str) -> str:
+    """Prompt for rows start..start+count-1 of a table."""
+    return f"""Generate exactly {count} rows of realistic sample data for a "{entity_name}" table.
 Business context: {scenario}
 Columns: {', '.join(columns)}
 
 Return ONLY a valid JSON array of objects. Each object should have these exact keys: {columns}
 Use realistic values appropriate for the business scenario.
-For IDs, use sequential numbers starting from 1.
+Number this table's own ID column sequentially from {start} to {start + count - 1}.
+IDs that reference other tables must be within these ranges: {id_ranges}.
 For dates, use format YYYY-MM-DD within the last 12 months.
 For prices/amounts, use reasonable numbers with 2 decimal places.
 
 Example format: [{{"Column1": "value1", "Column2": "value2"}}]"""
 
-        response = call_ai(client, data_prompt)
-        
-        try:
-            start = response.find("[")
-            end = response.rfind("]") + 1
-            rows = json.loads(response[start:end])
-        except:
-            # Generate fallback data
-            rows = generate_fallback_data(entity_name, columns, row_count)
-        
-        # Write CSV
-        filename = f"{entity_name.lower().replace(' ', '_')}.csv"
-        filepath = data_dir / filename
-        
-        with open(filepath, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=columns)
-            writer.writeheader()
-            for row in rows[:row_count]:
-                # Ensure all columns exist
-                clean_row = {col: row.get(col, "") for col in columns}
-                writer.writerow(clean_row)
-        
-        print(f"   ✓ Created: {filename}")
-
-
-def generate_fallback_data(entity_name: str, columns: list, count: int) -> list:
-    """Generate fallback data if AI fails."""
-    rows = []
-    base_date = datetime.now()
-    
-    for i in range(1, count + 1):
-        row = {}
-        for col in columns:
-            col_lower = col.lower()
-            if "id" in col_lower:
-                row[col] = i
-            elif "name" in col_lower:
-                row[col] = f"{entity_name[:-1] if entity_name.endswith('s') else entity_name} {i}"
-            elif "email" in col_lower:
-                row[col] = f"user{i}@example.com"
-            elif "price" in col_lower or "total" in col_lower or "amount" in col_lower:
-                row[col] = round(random.uniform(10, 500), 2)
-            elif "quantity" in col_lower or "stock" in col_lower:
-                row[col] = random.randint(1, 100)
-            elif "date" in col_lower:
-                days_ago = random.randint(1, 365)
-                row[col] = (base_date - timedelta(days=days_ago)).strftime("%Y-%m-%d")
-            elif "category" in col_lower or "segment" in col_lower or "region" in col_lower:
-                options = ["A", "B", "C"]
-                row[col] = random.choice(options)
-            else:
-                row[col] = f"Value {i}"
-        rows.append(row)
+
+def parse_page(response: str, columns: list, start: int, count: int) -> list:
+    """Validate a page of rows from the model. Returns [] if it's unusable.
     
+    Missing keys are left empty, extra rows are dropped, and the table's own
+    ID column (the first column, if it is an ID) is renumbered so IDs
+    continue across pages. The page may come back short.
+    """
+    try:
+        begin = response.find("[")
+        end = response.rfind("]") + 1
+        data = json.loads(response[begin:end])
+    except (ValueError, AttributeError):
+        return []
+    if not isinstance(data, list):
+        return []
+    rows = [{col: row.get(col, "") for col in columns} for row in data if isinstance(row, dict)][:count]
+    if columns and "id" in columns[0].lower():
+        for i, row in enumerate(rows):
+            row[columns[0]] = start + i
     return rows
 
 
@@ -353,12 +456,15 @@ def main():
     data_dir.mkdir(parents=True, exist_ok=True)
     print(f"\nOutput folder: {data_dir}")
     
-    # Get AI client
-    client = get_project_client()
+    # One agent and worker pool for every model call
+    generator = AIGenerator(get_project_client())
     
     # Generate both types of data
-    generate_documents(client, scenario, data_dir)
-    generate_structured_data(client, scenario, data_dir)
+    try:
+        generate_documents(generator, scenario, data_dir)
+        generate_structured_data(generator, scenario, data_dir)
+    finally:
+        generator.close()
     
     print("\n" + "="*60)
     print("✅ DATA GENERATION COMPLETE")
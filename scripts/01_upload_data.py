@@ -1,21 +1,18 @@
 """Upload PDF files to Azure AI Search with embeddings."""
 
 import os
+import sys
 import json
-import re
+import argparse
 from pathlib import Path
+from typing import Iterable, Iterator
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from openai import AzureOpenAI
-from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
     SearchIndex,
     SearchField,
     SearchFieldDataType,
-    VectorSearch,
-    HnswAlgorithmConfiguration,
-    VectorSearchProfile,
     AzureOpenAIVectorizer,
     AzureOpenAIVectorizerParameters,
     SemanticConfiguration,
@@ -23,7 +20,22 @@ from azure.search.documents.indexes.models import (
     SemanticPrioritizedFields,
     SemanticSearch,
 )
-from pypdf import PdfReader
+
+from chunker import chunk_text
+from dedup import Deduplicator
+from embeddings import EmbeddingScheduler, embed_batch
+from embedding_cache import EmbeddingCache
+from index_manifest import IndexManifest, ManifestDiff, delete_documents
+from index_versions import (
+    delete_old_versions, live_index, swap_alias, unfinished_version, validate_index, versioned_name,
+)
+from ingest_journal import IngestJournal
+from ingest_pipeline import run_pipeline
+from local_search import LocalIndexClient, LocalSearchClient
+from pdf_extract import PdfExtractor, iter_pdf_pages
+from search_uploader import SearchUploader
+from token_provider import bearer_token_provider, get_credential
+from vector_compression import VectorSettings, build_vector_search, embedding_field
 
 # Load environment from azd
 azure_dir = Path(__file__).parent.parent / ".azure"
@@ -37,9 +49,8 @@ env_path = azure_dir / env_name / ".env"
 if env_path.exists():
     load_dotenv(env_path)
 
-INDEX_NAME = "documents"
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 200
+# Agents query this name; with --rebuild it is an alias over versioned indexes
+INDEX_NAME = os.environ.get("AZURE_SEARCH_INDEX_NAME", "documents")
 
 
 def get_openai_client():
@@ -48,32 +59,33 @@ def get_openai_client():
     if not endpoint:
         raise ValueError("AZURE_AI_ENDPOINT not set. Run 'azd up' first.")
     
-    credential = DefaultAzureCredential()
-    token = credential.get_token("https://cognitiveservices.azure.com/.default")
-    
+    # The client asks the provider for a token before each request, so runs
+    # longer than the token lifetime keep working
     return AzureOpenAI(
         azure_endpoint=endpoint,
-        api_key=token.token,
+        azure_ad_token_provider=bearer_token_provider(),
         api_version="2024-10-21",
     )
 
 
-def get_search_clients():
-    """Create Azure Search clients."""
+def get_index_client():
+    """Create the Azure Search index client, or a local stand-in with SEARCH_BACKEND=local.
+
+    Search clients for a particular index come from `index_client.get_search_client(name)`.
+    """
+    if os.environ.get("SEARCH_BACKEND") == "local":
+        return LocalIndexClient()
+    
     endpoint = os.environ.get("AZURE_AI_SEARCH_ENDPOINT")
     if not endpoint:
         raise ValueError("AZURE_AI_SEARCH_ENDPOINT not set")
     
-    credential = DefaultAzureCredential()
-    index_client = SearchIndexClient(endpoint, credential)
-    search_client = SearchClient(endpoint, INDEX_NAME, credential)
-    
-    return index_client, search_client
+    return SearchIndexClient(endpoint, get_credential())
 
 
-def create_index(index_client: SearchIndexClient):
+def create_index(index_client: SearchIndexClient, settings: VectorSettings, index_name: str = INDEX_NAME):
     """Create search index with vector search."""
-    embedding_model = os.environ.get("AZURE_EMBEDDING_MODEL", "text-embedding-3-small")
+    embedding_model = settings.model
     ai_endpoint = os.environ.get("AZURE_AI_ENDPOINT")
     
     fields = [
@@ -83,13 +95,10 @@ def create_index(index_client: SearchIndexClient):
         SearchField(name="source", type=SearchFieldDataType.String, filterable=True),
         SearchField(name="page_number", type=SearchFieldDataType.Int32, filterable=True, sortable=True),
         SearchField(name="chunk_id", type=SearchFieldDataType.Int32, sortable=True),
-        SearchField(
-            name="embedding",
-            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-            searchable=True,
-            vector_search_dimensions=1536,
-            vector_search_profile_name="default-profile"
-        ),
+        SearchField(name="start_offset", type=SearchFieldDataType.Int32),
+        SearchField(name="end_offset", type=SearchFieldDataType.Int32),
+        SearchField(name="alternate_sources", type=SearchFieldDataType.Collection(SearchFieldDataType.String)),
+        embedding_field(settings),
     ]
     
     vectorizer = AzureOpenAIVectorizer(
@@ -101,15 +110,7 @@ def create_index(index_client: SearchIndexClient):
         )
     )
     
-    vector_search = VectorSearch(
-        algorithms=[HnswAlgorithmConfiguration(name="default-algorithm")],
-        profiles=[VectorSearchProfile(
-            name="default-profile",
-            algorithm_configuration_name="default-algorithm",
-            vectorizer_name="openai-vectorizer"
-        )],
-        vectorizers=[vectorizer]
-    )
+    vector_search = build_vector_search(settings, vectorizer)
     
     semantic_config = SemanticConfiguration(
         name="default-semantic",
@@ -122,60 +123,89 @@ def create_index(index_client: SearchIndexClient):
     semantic_search = SemanticSearch(configurations=[semantic_config])
     
     index = SearchIndex(
-        name=INDEX_NAME,
+        name=index_name,
         fields=fields,
         vector_search=vector_search,
         semantic_search=semantic_search
     )
     index_client.create_or_update_index(index)
-    print(f"Index '{INDEX_NAME}' ready")
-
+    print(f"Index '{index_name}' ready ({settings.describe()})")
 
-def extract_pages_from_pdf(filepath: Path) -> list[tuple[int, str]]:
-    """Extract text from PDF pages."""
-    reader = PdfReader(filepath)
-    pages = []
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text()
-        if text and text.strip():
-            pages.append((i + 1, text.strip()))
-    return pages
 
-
-def chunk_text(text: str, max_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
-    """Split text into overlapping chunks."""
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for sentence in sentences:
-        sentence_len = len(sentence)
-        
-        if current_length + sentence_len > max_size and current_chunk:
-            chunks.append(' '.join(current_chunk))
-            # Keep overlap
-            overlap_text = ' '.join(current_chunk)[-overlap:]
-            current_chunk = [overlap_text] if overlap_text else []
-            current_length = len(overlap_text)
-        
-        current_chunk.append(sentence)
-        current_length += sentence_len
+def build_documents(path: Path, pages: Iterable[tuple[int, str]] = None) -> Iterator[dict]:
+    """Chunk one PDF or text file into index documents (without embeddings).
     
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
+    PDF pages extracted elsewhere can be passed in `pages`; an iterator is
+    consumed lazily, so chunks flow before the whole file has been read.
+    """
+    title = path.stem.replace("_", " ").title()
     
-    return chunks
+    if path.suffix.lower() == ".pdf":
+        if pages is None:
+            pages = iter_pdf_pages(path)
+        for page_num, page_text in pages:
+            for chunk_idx, chunk in enumerate(chunk_text(page_text)):
+                yield {
+                    "id": f"{path.stem}_p{page_num}_c{chunk_idx}",
+                    "content": chunk.text,
+                    "title": title,
+                    "source": path.name,
+                    "page_number": page_num,
+                    "chunk_id": chunk_idx,
+                    "start_offset": chunk.start,
+                    "end_offset": chunk.end,
+                }
+    else:
+        text = path.read_text(encoding='utf-8')
+        for chunk_idx, chunk in enumerate(chunk_text(text)):
+            yield {
+                "id": f"{path.stem}_c{chunk_idx}",
+                "content": chunk.text,
+                "title": title,
+                "source": path.name,
+                "page_number": 1,
+                "chunk_id": chunk_idx,
+                "start_offset": chunk.start,
+                "end_offset": chunk.end,
+            }
+
+
+def iter_sources(paths: list[Path], extractor: PdfExtractor) -> Iterator[tuple[Path, Iterator[dict]]]:
+    """Yield each file with its documents, extracting PDFs in parallel ahead of use."""
+    pdf_pages = extractor.iter_files([p for p in paths if p.suffix.lower() == ".pdf"])
+    for path in paths:
+        if path.suffix.lower() == ".pdf":
+            _, pages = next(pdf_pages)
+            yield path, build_documents(path, pages)
+        else:
+            yield path, build_documents(path)
 
 
-def get_embedding(client: AzureOpenAI, text: str) -> list[float]:
-    """Generate embedding for text."""
-    model = os.environ.get("AZURE_EMBEDDING_MODEL", "text-embedding-3-small")
-    response = client.embeddings.create(input=[text], model=model)
-    return response.data[0].embedding
+def print_diff(diff: ManifestDiff, new_ids: dict[str, list[str]], stale_ids: dict[str, list[str]]):
+    """Print what this run changed, file by file."""
+    print("\nIndex changes:")
+    for path in diff.added:
+        print(f"  + {path.name} ({len(new_ids[path.name])} chunks)")
+    for path in diff.changed:
+        print(f"  ~ {path.name} ({len(new_ids[path.name])} chunks, {len(stale_ids.get(path.name, []))} removed)")
+    for name in diff.removed:
+        print(f"  - {name} ({len(stale_ids.get(name, []))} chunks removed)")
+    if diff.unchanged:
+        print(f"  = {len(diff.unchanged)} file(s) unchanged")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Upload documents to Azure AI Search")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process new or changed files and delete chunks of removed ones")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run, skipping files and chunks it already uploaded")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Build a new index version, validate it, then switch the alias to it")
+    args = parser.parse_args()
+    if args.rebuild and args.incremental:
+        parser.error("--rebuild always reprocesses every file; drop --incremental")
+    
     data_dir = Path(__file__).parent.parent / "data"
     if not data_dir.exists():
         print("Creating data folder with sample documents...")
@@ -183,70 +213,166 @@ def main():
         # Create a simple text file as placeholder
         (data_dir / "sample.txt").write_text("This is sample content for testing.")
     
-    pdf_files = list(data_dir.glob("*.pdf"))
-    txt_files = list(data_dir.glob("*.txt"))
+    pdf_files = sorted(data_dir.glob("*.pdf"))
+    txt_files = sorted(data_dir.glob("*.txt"))
+    manifest = IndexManifest(INDEX_NAME)
     
-    if not pdf_files and not txt_files:
+    if not pdf_files and not txt_files and not manifest.files:
         print("No documents found in data folder.")
         return
     
     print(f"Found {len(pdf_files)} PDF(s) and {len(txt_files)} text file(s)")
     
+    if args.rebuild:
+        # The new version starts empty: nothing to compare with or clean up
+        manifest.files = {}
+    diff = manifest.diff(pdf_files + txt_files)
+    if not args.incremental:
+        # Full rebuild: reprocess everything, but still clean up orphans
+        diff.changed += diff.unchanged
+        diff.unchanged = []
+    elif not diff.to_process and not diff.removed:
+        print("Index is up to date - nothing to do.")
+        manifest.save()
+        return
+    
+    settings = VectorSettings.from_env()
     openai_client = get_openai_client()
-    index_client, search_client = get_search_clients()
+    index_client = get_index_client()
+    if args.rebuild:
+        # Writes go to a new version; the alias keeps serving the current one
+        target = unfinished_version(index_client, INDEX_NAME) if args.resume else None
+        target = target or versioned_name(INDEX_NAME)
+        print(f"Rebuilding into '{target}' (live: {live_index(index_client, INDEX_NAME) or 'none'})")
+    else:
+        # Update whichever version the alias serves, or the plain index
+        target = live_index(index_client, INDEX_NAME) or INDEX_NAME
+    search_client = index_client.get_search_client(target)
     
-    create_index(index_client)
+    create_index(index_client, settings, target)
     
-    documents = []
+    dedup = Deduplicator() if os.environ.get("DEDUP", "1") != "0" else None
+    # The local index only reaches disk when saved; the journal saves it periodically
+    save_index = search_client.save if isinstance(search_client, LocalSearchClient) else None
+    journal = IngestJournal(INDEX_NAME, {
+        "model": settings.model, "dimensions": settings.request_dimensions, "dedup": dedup is not None,
+        "index": target,
+    }, sync=save_index)
+    if args.resume:
+        if not journal.load():
+            print("No resumable run found - starting from scratch")
+    elif journal.exists:
+        print("Discarding the checkpoint of an interrupted run (use --resume to continue it)")
+    journal.start(diff.to_process)
     
-    # Process PDFs
-    for pdf_path in pdf_files:
-        print(f"Processing: {pdf_path.name}")
-        pages = extract_pages_from_pdf(pdf_path)
-        
-        for page_num, page_text in pages:
-            chunks = chunk_text(page_text)
-            
-            for chunk_idx, chunk in enumerate(chunks):
-                doc_id = f"{pdf_path.stem}_p{page_num}_c{chunk_idx}"
-                embedding = get_embedding(openai_client, chunk)
-                
-                doc = {
-                    "id": doc_id,
-                    "content": chunk,
-                    "title": pdf_path.stem.replace("_", " ").title(),
-                    "source": pdf_path.name,
-                    "page_number": page_num,
-                    "chunk_id": chunk_idx,
-                    "embedding": embedding
-                }
-                documents.append(doc)
-    
-    # Process text files
-    for txt_path in txt_files:
-        print(f"Processing: {txt_path.name}")
-        text = txt_path.read_text(encoding='utf-8')
-        chunks = chunk_text(text)
-        
-        for chunk_idx, chunk in enumerate(chunks):
-            doc_id = f"{txt_path.stem}_c{chunk_idx}"
-            embedding = get_embedding(openai_client, chunk)
-            
-            doc = {
-                "id": doc_id,
-                "content": chunk,
-                "title": txt_path.stem.replace("_", " ").title(),
-                "source": txt_path.name,
-                "page_number": 1,
-                "chunk_id": chunk_idx,
-                "embedding": embedding
-            }
-            documents.append(doc)
+    # Files an interrupted run finished are not processed again
+    resumed = {path: journal.completed(path) for path in diff.to_process if journal.completed(path)}
+    if resumed or journal.files:
+        uploaded = sum(len(entry["uploaded"]) for entry in journal.files.values())
+        print(f"Resuming: {len(resumed)} file(s) already complete, {uploaded} chunk(s) already uploaded")
+    if dedup is not None:
+        for path, record in resumed.items():
+            dedup.restore(path.name, record.get("fingerprints", {}))
+            for canonical, label in record["alternates"]:
+                if label not in dedup.alternates[canonical]:
+                    dedup.alternates[canonical].append(label)
+    
+    # Stream files through extract -> chunk -> embed -> upload
+    scheduler = EmbeddingScheduler(openai_client, settings.model, settings.request_dimensions)
+    uploader = SearchUploader(search_client)
+    extractor = PdfExtractor()
+    cache = EmbeddingCache.from_env()
+    journal.quarantined = extractor.quarantined
+    try:
+        sources = iter_sources([p for p in diff.to_process if p not in resumed], extractor)
+        result = run_pipeline(sources, scheduler, uploader, cache=cache, dedup=dedup, journal=journal)
+        if dedup is not None and dedup.alternates:
+            # Point canonical chunks at the sources of the copies that were dropped
+            uploader.upload(dedup.metadata_updates(), action="merge")
+    finally:
+        extractor.close()
+        scheduler.close()
+        uploader.close()
+        # Also saves the local index
+        journal.close()
+    if cache is not None:
+        print(f"Embedding cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+    if scheduler.stats["requests"]:
+        scheduler.report()
+    uploader.report()
+    for path, record in resumed.items():
+        result.new_ids[path.name] = record["chunk_ids"]
+        result.duplicates[path.name] = record["duplicates"]
+    new_ids, failed_ids = result.new_ids, result.failed_ids
+    print(f"Uploaded {result.uploaded}/{result.embedded} documents")
+    if result.resumed:
+        print(f"Skipped {result.resumed} chunk(s) uploaded before the interruption")
+    if dedup is not None and (dedup.exact_duplicates or dedup.near_duplicates):
+        print(
+            f"Skipped {dedup.exact_duplicates} exact and {dedup.near_duplicates} near-duplicate chunk(s) "
+            f"across {len(dedup.alternates)} canonical chunk(s)"
+        )
+    if uploader.failures:
+        report_path = uploader.write_failure_report()
+        print(f"{len(uploader.failures)} document(s) failed to upload, see {report_path}")
+    if extractor.quarantined:
+        report_path = extractor.write_quarantine_report()
+        print(f"{len(extractor.quarantined)} PDF page(s) skipped during extraction, see {report_path}")
+    
+    # Chunk IDs no longer produced by any file
+    stale_ids = {}
+    for path in diff.changed:
+        current = set(new_ids[path.name])
+        stale_ids[path.name] = [i for i in manifest.chunk_ids(path.name) if i not in current]
+    for name in diff.removed:
+        stale_ids[name] = manifest.chunk_ids(name)
+    
+    orphans = [doc_id for ids in stale_ids.values() for doc_id in ids]
+    if orphans:
+        print(f"\nDeleting {len(orphans)} orphaned chunks...")
+        deleted = delete_documents(search_client, orphans)
+        print(f"Deleted {deleted}/{len(orphans)} documents")
+    
+    if args.rebuild:
+        expected = len({doc_id for ids in new_ids.values() for doc_id in ids} - failed_ids)
+        print(f"\nValidating '{target}'...")
+        problems = validate_index(
+            search_client, expected, lambda texts: embed_batch(openai_client, texts, settings.model, settings.request_dimensions)
+        )
+        if failed_ids:
+            problems.append(f"{len(failed_ids)} document(s) failed to upload")
+        if problems:
+            for problem in problems:
+                print(f"  ✗ {problem}")
+            print(f"Not switching '{INDEX_NAME}'; it still serves the previous version")
+            search_client.close()
+            sys.exit(1)
+        previous = swap_alias(index_client, INDEX_NAME, target)
+        print(f"  ✓ '{INDEX_NAME}' now serves '{target}'" + (f" (was '{previous}')" if previous else ""))
+    
+    # Only record files whose pages and chunks all made it, so failures are retried next run
+    quarantined_files = {q["source"] for q in extractor.quarantined}
+    quarantined_files |= {path.name for path, record in resumed.items() if record["quarantined"]}
+    for path in diff.to_process:
+        if path.name not in quarantined_files and not failed_ids.intersection(new_ids[path.name]):
+            duplicates = result.duplicates.get(path.name, {})
+            if path in resumed:
+                sources = resumed[path]["duplicate_sources"]
+            else:
+                sources = dedup.duplicate_sources(path.name, duplicates) if duplicates else []
+            manifest.record(path, new_ids[path.name], sources)
+    for name in diff.removed:
+        manifest.remove(name)
+    manifest.save()
+    # The manifest now covers this run; nothing is left to resume
+    journal.discard()
+    if args.rebuild:
+        for name in delete_old_versions(index_client, INDEX_NAME):
+            print(f"Deleted old index version '{name}'")
+    
+    search_client.close()
     
-    print(f"\nUploading {len(documents)} chunks...")
-    result = search_client.upload_documents(documents)
-    succeeded = sum(1 for r in result if r.succeeded)
-    print(f"Uploaded {succeeded}/{len(documents)} documents")
+    print_diff(diff, new_ids, stale_ids)
     print("Done!")
 
 
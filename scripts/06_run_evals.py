@@ -10,13 +10,14 @@ from pprint import pprint
 
 import pandas as pd
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from azure.ai.evaluation import evaluate
 from azure.ai.evaluation import RelevanceEvaluator, GroundednessEvaluator
 from azure.ai.evaluation import AzureOpenAIModelConfiguration
 from azure.ai.agents import AgentsClient
 from azure.ai.agents.models import ListSortOrder
 
+from token_provider import get_credential
+
 # Load environment from azd
 azure_dir = Path(__file__).parent.parent / ".azure"
 env_name = os.environ.get("AZURE_ENV_NAME", "")
@@ -45,7 +46,7 @@ def get_agents_client():
         endpoint = os.environ.get("AZURE_AI_PROJECT_ENDPOINT")
         _agents_client = AgentsClient(
             endpoint=endpoint,
-            credential=DefaultAzureCredential(),
+            credential=get_credential(),
         )
     return _agents_client
 
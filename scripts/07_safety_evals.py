@@ -9,7 +9,7 @@ from pprint import pprint
 
 import pandas as pd
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential, AzureDeveloperCliCredential
+from azure.identity import AzureDeveloperCliCredential
 from azure.ai.evaluation import ContentSafetyEvaluator, evaluate
 from azure.ai.evaluation.simulator import (
     AdversarialScenario,
@@ -19,6 +19,8 @@ from azure.ai.evaluation.simulator import (
 from azure.ai.agents import AgentsClient
 from azure.ai.agents.models import ListSortOrder
 
+from token_provider import RefreshingCredential, get_credential
+
 logging.basicConfig(level=logging.WARNING, format="%(message)s")
 logger = logging.getLogger("safety_eval")
 logger.setLevel(logging.INFO)
@@ -38,12 +40,21 @@ if env_path.exists():
 OUTPUT_DIR = Path(__file__).parent.parent / "evals" / "safety_results"
 
 
+_azd_credential = None
+
+
 def get_azure_credential():
-    """Get Azure credential."""
-    tenant_id = os.getenv("AZURE_TENANT_ID")
-    if tenant_id:
-        return AzureDeveloperCliCredential(tenant_id=tenant_id, process_timeout=60)
-    return AzureDeveloperCliCredential(process_timeout=60)
+    """Get Azure credential (one per process, caching and refreshing its tokens)."""
+    global _azd_credential
+    if _azd_credential is None:
+        tenant_id = os.getenv("AZURE_TENANT_ID")
+        if tenant_id:
+            cli_credential = AzureDeveloperCliCredential(tenant_id=tenant_id, process_timeout=60)
+        else:
+            cli_credential = AzureDeveloperCliCredential(process_timeout=60)
+        # Each azd token request starts a subprocess; reuse tokens until they near expiry
+        _azd_credential = RefreshingCredential(cli_credential)
+    return _azd_credential
 
 
 def get_agents_client():
@@ -51,7 +62,7 @@ def get_agents_client():
     endpoint = os.environ.get("AZURE_AI_PROJECT_ENDPOINT")
     return AgentsClient(
         endpoint=endpoint,
-        credential=DefaultAzureCredential(),
+        credential=get_credential(),
     )
 
 
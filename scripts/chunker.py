@@ -0,0 +1,230 @@
+"""Token-aware, structure-aware text chunking in a single linear pass.
+
+Text is split once into units (headings, lines and sentences) with their
+character offsets and token counts. Units are then packed greedily into
+chunks of at most `max_tokens`, preferring to break at headings and
+paragraph boundaries, with a token-bounded overlap carried into the next
+chunk. Chunk text is a slice of the source, so each chunk's offsets point at
+the exact span it came from.
+"""
+
+import bisect
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+import embeddings
+from embeddings import count_tokens, token_offsets
+
+# Roughly the previous 1000/200 character chunks
+CHUNK_TOKENS = int(os.environ.get("CHUNK_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "48"))
+
+# Blank line, line break, or whitespace after sentence-ending punctuation
+BOUNDARY = re.compile(r"\n[ \t\r\f\v]*\n\s*|\n|(?<=[.!?])[ \t]+")
+HEADING = re.compile(r"#{1,6}\s")
+WORD = re.compile(r"\S+\s*")
+
+# Break strength of the boundary before a unit
+LINE, PARAGRAPH, SECTION = 0, 1, 2
+
+
+@dataclass
+class Chunk:
+    """A span of the source text."""
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+@dataclass
+class _Unit:
+    start: int
+    end: int
+    tokens: int
+    level: int
+
+
+def _split_word(
+    text: str, start: int, end: int, tokens: int, max_tokens: int, count: Callable[[str], int]
+) -> list[tuple]:
+    """Cut one unbroken run of `tokens` tokens (a URL, base64, CJK text) into spans of at most max_tokens."""
+    offsets = token_offsets(text[start:end]) if count is embeddings.count_tokens else None
+    if offsets is not None:
+        # Slice the run's token ids once, cutting at the first token of a character
+        spans = []
+        first, position = 0, 0
+        while len(offsets) - first > max_tokens:
+            cut = offsets[first + max_tokens]
+            stop = bisect.bisect_left(offsets, cut, first)
+            if stop == first:
+                # A single character of more than max_tokens tokens can't be cut
+                stop = bisect.bisect_right(offsets, offsets[first], first)
+                if stop == len(offsets):
+                    break
+                cut = offsets[stop]
+            spans.append((start + position, start + cut, stop - first))
+            first, position = stop, cut
+        spans.append((start + position, end, len(offsets) - first))
+        return spans
+
+    # Other tokenizers: size pieces by the run's average token width, counting only each piece
+    spans = []
+    width = (end - start) / max(tokens, 1)
+    while start < end:
+        stop = min(end, start + max(1, int(max_tokens * width)))
+        piece_tokens = count(text[start:stop])
+        while piece_tokens > max_tokens and stop - start > 1:
+            stop = start + max(1, (stop - start) * 9 // 10)
+            piece_tokens = count(text[start:stop])
+        spans.append((start, stop, piece_tokens))
+        start = stop
+    return spans
+
+
+def _split_oversized(text: str, unit: _Unit, max_tokens: int, count: Callable[[str], int]) -> list[_Unit]:
+    """Split a unit into pieces of at most max_tokens at word boundaries.
+
+    A single word longer than max_tokens is cut by characters.
+    """
+    pieces = []
+    start = unit.start
+    tokens = 0
+    end = start
+
+    def add(start: int, end: int, tokens: int):
+        pieces.append(_Unit(start, end, tokens, unit.level if not pieces else LINE))
+
+    for match in WORD.finditer(text, unit.start, unit.end):
+        word_tokens = count(match.group())
+        word_end = match.start() + len(match.group().rstrip())
+        if word_tokens > max_tokens:
+            if tokens:
+                add(start, end, tokens)
+            for span in _split_word(text, match.start(), word_end, word_tokens, max_tokens, count):
+                add(*span)
+            start, tokens, end = match.end(), 0, match.end()
+            continue
+        if tokens and tokens + word_tokens > max_tokens:
+            add(start, end, tokens)
+            start, tokens = match.start(), 0
+        tokens += word_tokens
+        end = word_end
+    if tokens:
+        add(start, end, tokens)
+    return pieces
+
+
+def _units(text: str, max_tokens: int, piece_tokens: int, count: Callable[[str], int]) -> list[_Unit]:
+    """Split text into units at line, sentence, paragraph and heading boundaries.
+
+    Units longer than max_tokens are cut into word runs of piece_tokens.
+    A unit's tokens include the separator before it, so the units of a
+    chunk add up to the tokens of the chunk's text.
+    """
+    units = []
+    position = 0
+    level = PARAGRAPH
+    previous_end = 0
+
+    def add(start: int, end: int, level: int):
+        nonlocal previous_end
+        # Trim whitespace so offsets cover only the content
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return
+        if HEADING.match(text, start):
+            level = SECTION
+        separator = count(text[previous_end:start]) if previous_end and previous_end < start else 0
+        previous_end = end
+        unit = _Unit(start, end, count(text[start:end]), level)
+        if unit.tokens + separator > max_tokens:
+            pieces = _split_oversized(text, unit, piece_tokens, count)
+            pieces[0].tokens += separator
+            units.extend(pieces)
+        else:
+            unit.tokens += separator
+            units.append(unit)
+
+    for match in BOUNDARY.finditer(text):
+        add(position, match.start(), level)
+        separator = match.group()
+        level = PARAGRAPH if separator.count("\n") > 1 else LINE
+        position = match.end()
+    add(position, len(text), level)
+    return units
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    count_tokens: Callable[[str], int] = count_tokens,
+) -> list[Chunk]:
+    """Split text into chunks of at most max_tokens with offsets into `text`.
+
+    `count_tokens` is the tokenizer used for sizing; pass the embedding
+    model's tokenizer to size chunks the way the model will see them.
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be at least 0 and less than max_tokens")
+    # Cut unbroken text finely enough that overlap can still be carried over
+    piece_tokens = overlap_tokens or max_tokens
+    units = _units(text, max_tokens, piece_tokens, count_tokens)
+    if not units:
+        return []
+
+    # prefix[i] = tokens in units[:i], so any run of units is sized in O(1)
+    prefix = [0]
+    for unit in units:
+        prefix.append(prefix[-1] + unit.tokens)
+
+    chunks = []
+    # Headings only start a new chunk once the current one has some body
+    min_tokens = max_tokens // 4
+
+    def emit(first: int, stop: int):
+        start, end = units[first].start, units[stop - 1].end
+        chunks.append(Chunk(text[start:end], start, end, prefix[stop] - prefix[first]))
+
+    def overlap_start(first: int, stop: int) -> int:
+        k = stop
+        while k - 1 > first and prefix[stop] - prefix[k - 1] <= overlap_tokens:
+            k -= 1
+        return k
+
+    first = 0
+    i = 0
+    while i < len(units):
+        unit = units[i]
+        size = prefix[i] - prefix[first]
+        if unit.level == SECTION and size >= min_tokens:
+            emit(first, i)
+            first = i
+        elif i > first and size + unit.tokens > max_tokens:
+            # Prefer the last paragraph or heading break in the second half of the chunk
+            split = i
+            for j in range(i - 1, first, -1):
+                if prefix[j] - prefix[first] < max_tokens // 2:
+                    break
+                if units[j].level >= PARAGRAPH:
+                    split = j
+                    break
+            emit(first, split)
+            first = overlap_start(first, split) if units[split].level != SECTION else split
+            if prefix[i] - prefix[first] + unit.tokens > max_tokens:
+                first = max(first, split)
+            if prefix[i] - prefix[first] + unit.tokens > max_tokens:
+                first = i
+            continue
+        i += 1
+
+    emit(first, len(units))
+    return chunks
@@ -0,0 +1,145 @@
+"""Exact and near-duplicate chunk detection before embedding.
+
+Each chunk is normalized and hashed to catch exact copies, then reduced to a
+MinHash signature over word shingles. Signatures are split into bands and
+indexed with locality-sensitive hashing, so only chunks sharing a band are
+compared. A chunk whose estimated Jaccard similarity with an earlier chunk
+reaches the threshold is dropped, and its source is recorded on the
+canonical (first seen) chunk instead.
+"""
+
+import base64
+import hashlib
+import os
+import re
+from collections import defaultdict
+from typing import Optional
+
+import numpy as np
+
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.9"))
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs above ~0.5 similarity almost always share a band
+BANDS = 32
+
+# Universal hashing modulo a Mersenne prime; products stay below 2**62
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.int64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.int64)
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase words only, so whitespace and punctuation changes don't matter."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def minhash(normalized: str) -> np.ndarray:
+    """MinHash signature of the text's word shingles."""
+    words = normalized.split()
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {normalized}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.int64,
+        count=len(shingles),
+    ) % _PRIME
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def source_label(doc: dict) -> str:
+    """How a duplicate's location is recorded on the canonical chunk."""
+    return f"{doc['source']}#page={doc['page_number']}"
+
+
+class Deduplicator:
+    """Streaming duplicate filter: the first chunk of each group is canonical."""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, bands: int = BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.exact: dict[str, str] = {}
+        self.buckets: dict[tuple, list[str]] = defaultdict(list)
+        self.signatures: dict[str, np.ndarray] = {}
+        self.sources: dict[str, str] = {}
+        self.digests: dict[str, str] = {}
+        # canonical id -> sources of the chunks dropped in its favour
+        self.alternates: dict[str, list[str]] = defaultdict(list)
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def check(self, doc: dict) -> Optional[str]:
+        """Return the canonical ID if `doc` duplicates an earlier chunk, else register it."""
+        normalized = normalize(doc["content"])
+        digest = hashlib.sha256(normalized.encode()).hexdigest()
+        canonical = self.exact.get(digest)
+        if canonical is not None:
+            self.exact_duplicates += 1
+            self._add_alternate(canonical, doc)
+            return canonical
+
+        signature = minhash(normalized)
+        keys = self._band_keys(signature)
+        candidates = {doc_id for key in keys for doc_id in self.buckets.get(key, ())}
+        best, best_similarity = None, 0.0
+        for doc_id in candidates:
+            similarity = float(np.mean(self.signatures[doc_id] == signature))
+            if similarity > best_similarity:
+                best, best_similarity = doc_id, similarity
+        if best is not None and best_similarity >= self.threshold:
+            self.near_duplicates += 1
+            self._add_alternate(best, doc)
+            return best
+
+        self._register(doc["id"], doc["source"], digest, signature, keys)
+        return None
+
+    def _band_keys(self, signature: np.ndarray) -> list[tuple]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _register(self, doc_id: str, source: str, digest: str, signature: np.ndarray, keys: list[tuple]):
+        self.exact[digest] = doc_id
+        self.digests[doc_id] = digest
+        self.signatures[doc_id] = signature
+        self.sources[doc_id] = source
+        for key in keys:
+            self.buckets[key].append(doc_id)
+
+    def fingerprints(self, doc_ids: list[str]) -> dict[str, list[str]]:
+        """JSON-serializable fingerprints of canonical chunks, for `restore` in a later run."""
+        return {
+            doc_id: [self.digests[doc_id], base64.b64encode(self.signatures[doc_id].astype(np.uint32).tobytes()).decode()]
+            for doc_id in doc_ids
+            if doc_id in self.digests
+        }
+
+    def restore(self, source: str, fingerprints: dict[str, list[str]]):
+        """Register canonical chunks of `source` saved with `fingerprints`, without their text."""
+        for doc_id, (digest, encoded) in fingerprints.items():
+            signature = np.frombuffer(base64.b64decode(encoded), dtype=np.uint32).astype(np.int64)
+            self._register(doc_id, source, digest, signature, self._band_keys(signature))
+
+    def _add_alternate(self, canonical: str, doc: dict):
+        label = source_label(doc)
+        if label not in self.alternates[canonical]:
+            self.alternates[canonical].append(label)
+
+    def duplicate_sources(self, source: str, duplicate_ids: dict[str, str]) -> list[str]:
+        """Files holding the canonical copies of chunks dropped from `source`."""
+        return sorted({self.sources[canonical] for canonical in duplicate_ids.values()} - {source})
+
+    def metadata_updates(self) -> list[dict]:
+        """Partial documents setting `alternate_sources` on canonical chunks."""
+        return [
+            {"id": doc_id, "alternate_sources": sources}
+            for doc_id, sources in self.alternates.items()
+        ]
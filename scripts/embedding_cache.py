@@ -0,0 +1,119 @@
+"""Persistent embedding cache for re-ingestion.
+
+Vectors are keyed by a hash of the chunk text, embedding model and
+dimensions, and stored as packed float32 in a local SQLite file, so
+re-running ingestion on unchanged content makes no embedding calls.
+The least recently used entries are evicted beyond a size cap.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from array import array
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "embeddings.sqlite"
+MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+# SQLite's default limit on bound parameters per statement is 999
+LOOKUP_CHUNK = 500
+
+
+def cache_key(text: str, model: str, dimensions: Optional[int] = None) -> bytes:
+    """Content hash identifying one embedding."""
+    digest = hashlib.sha256()
+    digest.update(f"{model}\0{dimensions or 'default'}\0".encode())
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """SQLite-backed map from cache_key() to a float32 vector."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["EmbeddingCache"]:
+        """Open the cache at EMBEDDING_CACHE_PATH, or None if EMBEDDING_CACHE=0."""
+        if os.environ.get("EMBEDDING_CACHE", "1") == "0":
+            return None
+        return cls(Path(os.environ.get("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)))
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, list[float]]:
+        """Look up many keys at once. Returns only the keys that were found."""
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start:start + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = unpack_vector(blob)
+
+        if found:
+            now = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: dict[bytes, list[float]]):
+        """Store many vectors in one transaction, then enforce the size cap."""
+        if not items:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, pack_vector(vector), now) for key, vector in items.items()],
+            )
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries beyond max_entries."""
+        count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "  SELECT key FROM embeddings ORDER BY last_used LIMIT ?"
+                ")",
+                (excess,),
+            )
+        return excess
+
+    def close(self):
+        self.conn.close()
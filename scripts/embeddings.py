@@ -0,0 +1,282 @@
+"""Batched, concurrent embedding requests for the ingestion scripts.
+
+The embeddings API accepts many inputs per call, so chunks are packed into
+batches that respect the per-request input count and token limits, and the
+returned vectors are mapped back to their inputs by index.
+
+Batches are sent concurrently by EmbeddingScheduler under token buckets for
+the deployment's requests-per-minute and tokens-per-minute quota, so the
+quota rather than network latency bounds throughput. 429 responses pause all
+workers for the server's Retry-After and temporarily reduce concurrency.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+# Service limits: 2048 inputs per request, 8191 tokens per input
+MAX_BATCH_INPUTS = int(os.environ.get("EMBEDDING_BATCH_SIZE", "256"))
+MAX_BATCH_TOKENS = int(os.environ.get("EMBEDDING_BATCH_TOKENS", "20000"))
+MAX_INPUT_TOKENS = 8191
+
+# Quota of the embedding deployment (infra default: 80K TPM, 6 RPM per 1K TPM)
+EMBEDDING_TPM = int(os.environ.get("EMBEDDING_TPM", "80000"))
+EMBEDDING_RPM = int(os.environ.get("EMBEDDING_RPM", "480"))
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", "8"))
+MAX_RETRIES = 8
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+
+def get_embedding_model() -> str:
+    """Embedding deployment/model name from the environment."""
+    return os.environ.get("AZURE_EMBEDDING_MODEL", "text-embedding-3-small")
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate ~4 characters per token without it."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def token_offsets(text: str) -> Optional[list[int]]:
+    """Character offset where each token of `text` starts, or None without tiktoken.
+
+    A character split across tokens is the offset of all of them.
+    """
+    if _encoding is None:
+        return None
+    return _encoding.decode_with_offsets(_encoding.encode(text, disallowed_special=()))[1]
+
+
+def truncate_input(text: str, max_tokens: int = MAX_INPUT_TOKENS) -> str:
+    """Cut text to at most max_tokens, as counted by count_tokens."""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens])
+    return text if count_tokens(text) <= max_tokens else text[:(max_tokens - 1) * 4]
+
+
+def make_batches(
+    items: Iterable,
+    text: Callable = None,
+    max_inputs: int = MAX_BATCH_INPUTS,
+    max_tokens: int = MAX_BATCH_TOKENS,
+) -> Iterator[list]:
+    """Group a stream of texts into batches within the input count and token limits.
+
+    Items that aren't strings (e.g. index documents) are sized by `text(item)`.
+    """
+    batch = []
+    batch_tokens = 0
+    for item in items:
+        tokens = min(count_tokens(text(item) if text else item), MAX_INPUT_TOKENS)
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def embed_batch(client, texts: list[str], model: str = None, dimensions: int = None) -> list[list[float]]:
+    """Embed one batch in a single request, returning vectors in input order.
+
+    `dimensions` requests shortened vectors (text-embedding-3 models only).
+    """
+    kwargs = {"dimensions": dimensions} if dimensions else {}
+    response = client.embeddings.create(input=texts, model=model or get_embedding_model(), **kwargs)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        """Block until `amount` tokens are available, then take them."""
+        if self.capacity <= 0:
+            return
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the service reports we exceeded quota."""
+        with self.lock:
+            self.tokens = 0
+            self.updated = time.monotonic()
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def is_retryable(error: Exception) -> bool:
+    """Throttling, server errors and connection problems are worth retrying."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500 or status == 408
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in (
+        "APIConnectionError", "APITimeoutError",
+    )
+
+
+def retry_after_seconds(error: Exception) -> float:
+    """Read the server's requested wait from Retry-After headers, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    value = headers.get("retry-after")
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0.0
+
+
+class EmbeddingScheduler:
+    """Embed batches concurrently within the deployment's RPM/TPM quota."""
+
+    def __init__(
+        self,
+        client,
+        model: str = None,
+        dimensions: int = None,
+        max_workers: int = EMBEDDING_CONCURRENCY,
+        requests_per_minute: int = EMBEDDING_RPM,
+        tokens_per_minute: int = EMBEDDING_TPM,
+    ):
+        # Retries and backoff are handled here, not inside the SDK
+        self.client = client.with_options(max_retries=0) if hasattr(client, "with_options") else client
+        self.model = model or get_embedding_model()
+        self.dimensions = dimensions
+        self.max_workers = max(1, max_workers)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+        # Adaptive concurrency: halved on 429, grows back by one per success
+        self.concurrency = self.max_workers
+        self.active = 0
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+
+        self.stats = {"requests": 0, "inputs": 0, "tokens": 0, "throttled": 0, "retries": 0, "truncated": 0}
+        self.stats_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embed")
+        self.started = time.monotonic()
+
+    def _enter(self):
+        with self.condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.active < self.concurrency:
+                    self.active += 1
+                    return
+                self.condition.wait(timeout=wait if wait > 0 else None)
+
+    def _exit(self, throttled_for: float = None):
+        with self.condition:
+            self.active -= 1
+            if throttled_for is not None:
+                self.concurrency = max(1, self.concurrency // 2)
+                self.paused_until = max(self.paused_until, time.monotonic() + throttled_for)
+            elif self.concurrency < self.max_workers:
+                self.concurrency += 1
+            self.condition.notify_all()
+
+    def _embed_with_retry(self, texts: list[str], tokens: int) -> list[list[float]]:
+        for attempt in range(MAX_RETRIES + 1):
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(tokens)
+            self._enter()
+            try:
+                vectors = embed_batch(self.client, texts, self.model, self.dimensions)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not is_retryable(e):
+                    self._exit()
+                    raise
+                backoff = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                if is_rate_limited(e):
+                    wait = retry_after_seconds(e) or backoff
+                    self.token_bucket.drain()
+                    self._exit(throttled_for=wait)
+                    with self.stats_lock:
+                        self.stats["throttled"] += 1
+                else:
+                    self._exit()
+                    time.sleep(backoff)
+                with self.stats_lock:
+                    self.stats["retries"] += 1
+                continue
+
+            self._exit()
+            with self.stats_lock:
+                self.stats["requests"] += 1
+                self.stats["inputs"] += len(texts)
+                self.stats["tokens"] += tokens
+            return vectors
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue one batch (already within the batch limits). The future yields its vectors.
+
+        Inputs over the per-input token limit are truncated: the service
+        rejects them with a 400 that fails the whole batch.
+        """
+        counts = [count_tokens(t) for t in texts]
+        over = [i for i, n in enumerate(counts) if n > MAX_INPUT_TOKENS]
+        if over:
+            texts = list(texts)
+            for i in over:
+                texts[i] = truncate_input(texts[i])
+            with self.stats_lock:
+                self.stats["truncated"] += len(over)
+            print(f"  Truncated {len(over)} input(s) over {MAX_INPUT_TOKENS} tokens")
+        tokens = sum(min(n, MAX_INPUT_TOKENS) for n in counts)
+        return self.executor.submit(self._embed_with_retry, texts, tokens)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def report(self):
+        """Print achieved throughput against the configured quota."""
+        elapsed = time.monotonic() - self.started
+        minutes = max(elapsed, 1e-9) / 60
+        stats = self.stats
+        print(
+            f"  Embedded {stats['inputs']} chunks in {elapsed:.1f}s: "
+            f"{stats['tokens'] / minutes:,.0f} tokens/min (quota {self.token_bucket.capacity:,.0f}), "
+            f"{stats['requests'] / minutes:,.0f} requests/min (quota {self.request_bucket.capacity:,.0f}), "
+            f"{stats['throttled']} throttled, {stats['retries']} retried"
+        )
+
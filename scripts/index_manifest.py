@@ -0,0 +1,126 @@
+"""File manifest for incremental indexing.
+
+Records, per source file, its content hash, mtime, size and the chunk IDs it
+produced in the search index. Comparing the manifest with the data folder
+tells which files are new, changed, unchanged or deleted, and which chunk IDs
+have become orphans and must be removed from the index.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+MANIFEST_DIR = Path(__file__).parent.parent / ".cache"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestDiff:
+    """Files grouped by what an incremental run has to do with them."""
+    added: list[Path] = field(default_factory=list)
+    changed: list[Path] = field(default_factory=list)
+    unchanged: list[Path] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def to_process(self) -> list[Path]:
+        return self.added + self.changed
+
+
+class IndexManifest:
+    """Per-index record of indexed files, stored as JSON."""
+
+    def __init__(self, index_name: str, path: Path = None):
+        self.index_name = index_name
+        self.path = Path(path) if path else MANIFEST_DIR / f"manifest_{index_name}.json"
+        self.files: dict[str, dict] = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.files = data.get("files", {})
+
+    def diff(self, paths: list[Path]) -> ManifestDiff:
+        """Compare files on disk with the manifest.
+
+        Files whose mtime and size match are trusted without hashing; others
+        are hashed so a touched-but-identical file is still unchanged.
+        """
+        result = ManifestDiff()
+        seen = set()
+
+        for path in paths:
+            seen.add(path.name)
+            entry = self.files.get(path.name)
+            if entry is None:
+                result.added.append(path)
+                continue
+            stat = path.stat()
+            if entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                result.unchanged.append(path)
+            elif entry["sha256"] == file_sha256(path):
+                entry["mtime"] = stat.st_mtime
+                result.unchanged.append(path)
+            else:
+                result.changed.append(path)
+
+        result.removed = sorted(name for name in self.files if name not in seen)
+
+        # Files whose duplicate chunks were dropped in favour of a file that is
+        # now changing must be reprocessed, or that content would go missing
+        touched = {path.name for path in result.added + result.changed} | set(result.removed)
+        while True:
+            affected = [
+                path for path in result.unchanged
+                if touched.intersection(self.files[path.name].get("duplicate_sources", []))
+            ]
+            if not affected:
+                return result
+            for path in affected:
+                result.unchanged.remove(path)
+                result.changed.append(path)
+                touched.add(path.name)
+
+    def chunk_ids(self, name: str) -> list[str]:
+        return self.files.get(name, {}).get("chunk_ids", [])
+
+    def record(self, path: Path, chunk_ids: list[str], duplicate_sources: list[str] = None):
+        """Record an indexed file, its chunk IDs and the files holding its deduplicated chunks."""
+        stat = path.stat()
+        self.files[path.name] = {
+            "sha256": file_sha256(path),
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "chunk_ids": chunk_ids,
+            "duplicate_sources": duplicate_sources or [],
+        }
+
+    def remove(self, name: str):
+        self.files.pop(name, None)
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves it half-written."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"index": self.index_name, "files": self.files}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.path)
+
+
+def delete_documents(search_client, doc_ids: list[str], batch_size: int = 1000) -> int:
+    """Delete documents from the index by key, in batches. Returns the number deleted."""
+    deleted = 0
+    for start in range(0, len(doc_ids), batch_size):
+        batch = [{"id": doc_id} for doc_id in doc_ids[start:start + batch_size]]
+        result = search_client.delete_documents(batch)
+        deleted += sum(1 for r in result if r.succeeded)
+    return deleted
@@ -0,0 +1,125 @@
+"""Blue/green index rebuilds behind a search alias.
+
+Agents query an alias (AZURE_SEARCH_INDEX_NAME, default `documents`) rather
+than an index. A rebuild creates a new versioned index `<alias>-v<timestamp>`,
+fills it while the alias keeps serving the current version, checks document
+counts and sample queries, and only then repoints the alias, which takes
+effect atomically. Superseded versions are deleted, keeping the most recent
+ones for rollback.
+
+An existing plain index with the alias's name (from before aliases were
+used) has to be deleted for the alias to take its name; that first switch
+is the only moment the name does not resolve.
+"""
+
+import os
+import re
+import time
+from typing import Callable, Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.search.documents.indexes.models import SearchAlias
+from azure.search.documents.models import VectorizedQuery
+
+# Previous versions kept after a swap, for rollback
+KEEP_VERSIONS = int(os.environ.get("INDEX_VERSIONS_KEEP", "1"))
+VALIDATION_SAMPLES = int(os.environ.get("INDEX_VALIDATION_SAMPLES", "5"))
+# Document counts lag indexing by a few seconds
+VALIDATION_TIMEOUT = float(os.environ.get("INDEX_VALIDATION_TIMEOUT", "120"))
+# Share of sample chunks that keyword and vector queries must find
+MIN_SAMPLE_RECALL = 0.8
+
+
+def versioned_name(alias: str) -> str:
+    return f"{alias}-v{time.strftime('%Y%m%d%H%M%S', time.gmtime())}"
+
+
+def list_versions(index_client, alias: str) -> list[str]:
+    """Versioned indexes of an alias, oldest first."""
+    pattern = re.compile(rf"^{re.escape(alias)}-v\d{{14}}$")
+    return sorted(name for name in index_client.list_index_names() if pattern.match(name))
+
+
+def live_index(index_client, alias: str) -> Optional[str]:
+    """The index an alias points at, or None if the alias doesn't exist."""
+    try:
+        indexes = index_client.get_alias(alias).indexes
+    except ResourceNotFoundError:
+        return None
+    return indexes[0] if indexes else None
+
+
+def unfinished_version(index_client, alias: str) -> Optional[str]:
+    """The newest version built after the live one, i.e. an interrupted rebuild."""
+    live = live_index(index_client, alias)
+    newer = [name for name in list_versions(index_client, alias) if live is None or name > live]
+    return newer[-1] if newer else None
+
+
+def _wait_for_count(search_client, expected: int, timeout: float) -> int:
+    deadline = time.monotonic() + timeout
+    while True:
+        count = search_client.get_document_count()
+        if count >= expected or time.monotonic() >= deadline:
+            return count
+        time.sleep(2)
+
+
+def validate_index(
+    search_client,
+    expected_count: int,
+    embed: Callable[[list[str]], list[list[float]]],
+    samples: int = VALIDATION_SAMPLES,
+    timeout: float = VALIDATION_TIMEOUT,
+) -> list[str]:
+    """Check a freshly built index before it goes live. Returns the problems found.
+
+    The index must hold `expected_count` documents, and keyword and vector
+    queries for a few of its own chunks must find those chunks.
+    """
+    problems = []
+    count = _wait_for_count(search_client, expected_count, timeout)
+    if count < expected_count:
+        problems.append(f"index holds {count} document(s), expected {expected_count}")
+    if not count:
+        return problems or ["index is empty"]
+
+    docs = list(search_client.search(search_text="*", select=["id", "content"], top=samples))
+    vectors = embed([doc["content"] for doc in docs])
+    keyword_hits = vector_hits = 0
+    for doc, vector in zip(docs, vectors):
+        query = " ".join(doc["content"].split()[:30])
+        results = search_client.search(search_text=query, select=["id"], top=10)
+        keyword_hits += any(r["id"] == doc["id"] for r in results)
+        results = search_client.search(
+            vector_queries=[VectorizedQuery(vector=vector, k_nearest_neighbors=10, fields="embedding")],
+            select=["id"],
+            top=10,
+        )
+        vector_hits += any(r["id"] == doc["id"] for r in results)
+    for kind, hits in (("keyword", keyword_hits), ("vector", vector_hits)):
+        if hits < MIN_SAMPLE_RECALL * len(docs):
+            problems.append(f"{kind} queries found {hits}/{len(docs)} sample chunk(s)")
+    return problems
+
+
+def swap_alias(index_client, alias: str, index_name: str) -> Optional[str]:
+    """Point the alias at `index_name`. Returns the index it pointed at before."""
+    previous = live_index(index_client, alias)
+    if previous is None and alias in set(index_client.list_index_names()):
+        print(f"  Deleting pre-alias index '{alias}' so the alias can take its name")
+        index_client.delete_index(alias)
+    index_client.create_or_update_alias(SearchAlias(name=alias, indexes=[index_name]))
+    return previous
+
+
+def delete_old_versions(index_client, alias: str, keep: int = KEEP_VERSIONS) -> list[str]:
+    """Delete versions other than the live one and the `keep` newest before it."""
+    live = live_index(index_client, alias)
+    versions = [name for name in list_versions(index_client, alias) if name != live]
+    older = [name for name in versions if live is None or name < live]
+    kept = set(older[-keep:]) if keep > 0 else set()
+    deleted = [name for name in versions if name not in kept]
+    for name in deleted:
+        index_client.delete_index(name)
+    return deleted
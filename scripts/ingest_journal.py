@@ -0,0 +1,234 @@
+"""Checkpoint journal for resumable ingestion runs.
+
+The pipeline appends to a JSON-lines journal as it goes: the chunk IDs of
+every upload batch that succeeded, and a completion record for every file
+whose chunks have all been uploaded (with the chunk IDs, duplicates and
+alternate sources the manifest and dedup metadata need at the end of the
+run). Records are appended and fsynced after every uploaded batch (other
+records go out with the next flush, or after the flush interval), so a crash
+loses at most the batches in flight; a torn last line is ignored on load.
+
+With `--resume`, completed files are skipped entirely, with their dedup
+fingerprints restored so copies in other files are still dropped. Chunks
+already uploaded from partially processed files are not embedded or
+uploaded again. Vectors of chunks that were embedded but not yet uploaded
+come back from the embedding cache. Files modified since they were
+journaled, and journals written with a different embedding model or
+dimensions, are ignored.
+
+An index that keeps uploads in memory (the local backend) passes `sync` to
+save itself. Saving is too costly to do per batch, so it runs every
+flush interval and at close, each time followed by a `synced` marker. On
+resume, such a journal is only trusted up to its last marker; chunks
+uploaded after it are uploaded again.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+JOURNAL_DIR = Path(__file__).parent.parent / ".cache"
+FLUSH_INTERVAL = float(os.environ.get("JOURNAL_FLUSH_SECONDS", "5"))
+
+
+def file_stamp(path: Path) -> list:
+    """Cheap identity of a file's contents: modification time and size."""
+    stat = path.stat()
+    return [stat.st_mtime, stat.st_size]
+
+
+class IngestJournal:
+    """Append-only record of uploaded chunks and completed files for one index."""
+
+    def __init__(
+        self,
+        index_name: str,
+        settings: dict,
+        path: Path = None,
+        flush_interval: float = FLUSH_INTERVAL,
+        sync: Callable[[], None] = None,
+    ):
+        self.index_name = index_name
+        self.settings = settings
+        self.path = Path(path) if path else JOURNAL_DIR / f"journal_{index_name}.jsonl"
+        self.flush_interval = flush_interval
+        # Makes the index durable; records after the last call aren't trusted on resume
+        self.sync = sync
+        # File name -> stamp, uploaded IDs and (once complete) completion record
+        self.files: dict[str, dict] = {}
+        # PdfExtractor.quarantined, so completion records note files with skipped pages
+        self.quarantined: list[dict] = []
+        self._expected: dict[str, set[str]] = {}
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = None
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> bool:
+        """Read a previous run's journal. Returns False if it can't be resumed."""
+        if not self.path.exists():
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Torn write at the crash; everything before it is intact
+                break
+        if not records or records[0].get("settings") != self.settings:
+            return False
+        if records[0].get("synced"):
+            # The index was only saved up to the last marker
+            last = max((i for i, record in enumerate(records) if "synced" in record), default=0)
+            records = records[:last + 1]
+        for record in records[1:]:
+            if "file" in record:
+                self.files[record["file"]] = {"stamp": record["stamp"], "uploaded": set(), "done": None}
+            elif "uploaded" in record:
+                for name, ids in record["uploaded"].items():
+                    if name in self.files:
+                        self.files[name]["uploaded"].update(ids)
+            elif "done" in record:
+                if record["done"] in self.files:
+                    self.files[record["done"]]["done"] = record
+        return True
+
+    def start(self, paths: list[Path]):
+        """Begin writing: forget entries of files that changed, and rewrite the journal compactly."""
+        for path in paths:
+            entry = self.files.get(path.name)
+            if entry is not None and entry["stamp"] != file_stamp(path):
+                del self.files[path.name]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            header = {"index": self.index_name, "settings": self.settings}
+            if self.sync is not None:
+                header["synced"] = True
+            f.write(json.dumps(header) + "\n")
+            for name, entry in self.files.items():
+                f.write(json.dumps({"file": name, "stamp": entry["stamp"]}) + "\n")
+                if entry["uploaded"]:
+                    f.write(json.dumps({"uploaded": {name: sorted(entry["uploaded"])}}) + "\n")
+                if entry["done"]:
+                    f.write(json.dumps(entry["done"]) + "\n")
+            if self.sync is not None:
+                # Everything kept was synced by an earlier run
+                f.write(json.dumps({"synced": True}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def completed(self, path: Path):
+        """Completion record of a file finished by an earlier run, or None."""
+        entry = self.files.get(path.name)
+        return entry["done"] if entry else None
+
+    def is_uploaded(self, name: str, doc_id: str) -> bool:
+        entry = self.files.get(name)
+        return entry is not None and doc_id in entry["uploaded"]
+
+    def begin_file(self, path: Path):
+        with self._lock:
+            if path.name not in self.files:
+                self.files[path.name] = {"stamp": file_stamp(path), "uploaded": set(), "done": None}
+                self._write({"file": path.name, "stamp": self.files[path.name]["stamp"]})
+
+    def end_file(
+        self,
+        name: str,
+        chunk_ids: list[str],
+        duplicates: dict,
+        duplicate_sources: list[str],
+        alternates: list,
+        fingerprints: dict = None,
+    ):
+        """All chunks of a file have been queued; it completes once they are all uploaded.
+
+        `fingerprints` is the Deduplicator state of the file's chunks, so a
+        resumed run still drops later copies of them.
+        """
+        with self._lock:
+            entry = self.files[name]
+            entry["pending_done"] = {
+                "done": name, "chunk_ids": chunk_ids, "duplicates": duplicates,
+                "duplicate_sources": duplicate_sources, "alternates": alternates,
+                "fingerprints": fingerprints or {},
+                "quarantined": any(q["source"] == name for q in self.quarantined),
+            }
+            self._expected[name] = set(chunk_ids)
+            self._check_done(name)
+
+    def record_uploaded(self, docs: list[dict]):
+        """Journal successfully uploaded documents."""
+        by_file: dict[str, list[str]] = {}
+        for doc in docs:
+            by_file.setdefault(doc["source"], []).append(doc["id"])
+        with self._lock:
+            for name, ids in by_file.items():
+                self.files[name]["uploaded"].update(ids)
+            self._write({"uploaded": by_file})
+            for name in by_file:
+                if name in self._expected:
+                    self._check_done(name)
+            # Each uploaded batch is journaled before the next one completes
+            self._flush()
+            if self.sync is not None and time.monotonic() - self._last_sync >= self.flush_interval:
+                self._sync()
+
+    def _check_done(self, name: str):
+        entry = self.files[name]
+        if self._expected[name] <= entry["uploaded"]:
+            entry["done"] = entry.pop("pending_done")
+            del self._expected[name]
+            self._write(entry["done"])
+
+    def _write(self, record: dict):
+        self._buffer.append(json.dumps(record))
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer and self._file is not None:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def _sync(self):
+        """Make the index durable, then mark everything journaled so far as safe to skip."""
+        self.sync()
+        self._buffer.append(json.dumps({"synced": True}))
+        self._flush()
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self.sync is not None and self._file is not None:
+                self._sync()
+            else:
+                self._flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Delete the journal once the run has finished and the manifest is saved."""
+        self.close()
+        self.path.unlink(missing_ok=True)
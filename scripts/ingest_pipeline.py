@@ -0,0 +1,194 @@
+"""Streaming extract → chunk → embed → upload pipeline.
+
+Each stage runs on its own thread and hands documents to the next through a
+bounded queue, so extraction, embedding and upload overlap and peak memory
+depends on the queue sizes rather than the corpus size. Documents become
+searchable batch by batch while later files are still being processed.
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from dedup import source_label
+from embedding_cache import cache_key
+from embeddings import make_batches
+
+QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "1000"))
+
+_DONE = object()
+
+
+@dataclass
+class PipelineResult:
+    """What a pipeline run produced."""
+    new_ids: dict[str, list[str]] = field(default_factory=dict)
+    # Per file: dropped duplicate ID -> canonical ID
+    duplicates: dict[str, dict[str, str]] = field(default_factory=dict)
+    failed_ids: set[str] = field(default_factory=set)
+    embedded: int = 0
+    uploaded: int = 0
+    # Chunks skipped because an interrupted run already uploaded them
+    resumed: int = 0
+
+
+class _Stop(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    """Put with back-pressure, giving up if the pipeline is stopping."""
+    while True:
+        if stop.is_set():
+            raise _Stop()
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def iter_queue(q: queue.Queue, stop: threading.Event) -> Iterator:
+    """Yield items from a queue until the upstream stage signals it is done."""
+    while True:
+        if stop.is_set():
+            raise _Stop()
+        try:
+            item = q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            return
+        yield item
+
+
+def batch_documents(documents: Iterable[dict]) -> Iterator[list[dict]]:
+    """Group a document stream into embedding batches within count and token limits."""
+    return make_batches(documents, lambda doc: doc["content"])
+
+
+def run_pipeline(
+    sources: Iterable[tuple[Path, Iterable[dict]]],
+    scheduler,
+    uploader,
+    cache=None,
+    dedup=None,
+    journal=None,
+) -> PipelineResult:
+    """Stream files through extraction, embedding and upload.
+
+    `sources` yields each file with its index documents (without embeddings);
+    it is consumed lazily on the extract thread. `scheduler` is an
+    EmbeddingScheduler and `uploader` a SearchUploader. With a Deduplicator,
+    duplicate chunks are dropped before embedding. With an IngestJournal,
+    uploads are checkpointed and chunks it already records as uploaded are
+    skipped.
+    """
+    result = PipelineResult()
+    chunk_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    upload_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+    errors = []
+    # Batches in flight at the embedding service beyond which the stage waits
+    max_pending = scheduler.max_workers * 2
+
+    def extract_stage():
+        for path, documents in sources:
+            print(f"Processing: {path.name}")
+            ids = result.new_ids.setdefault(path.name, [])
+            alternates = []
+            if journal is not None:
+                journal.begin_file(path)
+            for doc in documents:
+                canonical = dedup.check(doc) if dedup is not None else None
+                if canonical is not None:
+                    result.duplicates.setdefault(path.name, {})[doc["id"]] = canonical
+                    alternates.append([canonical, source_label(doc)])
+                    continue
+                ids.append(doc["id"])
+                if journal is not None and journal.is_uploaded(path.name, doc["id"]):
+                    result.resumed += 1
+                    continue
+                _put(chunk_queue, doc, stop)
+            if journal is not None:
+                duplicates = result.duplicates.get(path.name, {})
+                duplicate_sources = dedup.duplicate_sources(path.name, duplicates) if duplicates else []
+                fingerprints = dedup.fingerprints(ids) if dedup is not None else {}
+                journal.end_file(path.name, ids, duplicates, duplicate_sources, alternates, fingerprints)
+
+    def embed_stage():
+        pending = deque()
+
+        def complete_oldest():
+            docs, keys, cached, missing, future = pending.popleft()
+            fresh = dict(zip(missing, future.result())) if future else {}
+            if cache is not None and fresh:
+                cache.put_many(fresh)
+            for doc, key in zip(docs, keys):
+                doc["embedding"] = fresh[key] if key in fresh else cached[key]
+                _put(upload_queue, doc, stop)
+            result.embedded += len(docs)
+
+        for docs in batch_documents(iter_queue(chunk_queue, stop)):
+            keys = [cache_key(doc["content"], scheduler.model, scheduler.dimensions) for doc in docs]
+            cached = cache.get_many(list(set(keys))) if cache is not None else {}
+            # Embed each distinct missing text once
+            texts = {key: doc["content"] for doc, key in zip(docs, keys) if key not in cached}
+            missing = list(texts)
+            future = scheduler.submit([texts[key] for key in missing]) if missing else None
+            pending.append((docs, keys, cached, missing, future))
+            if len(pending) >= max_pending:
+                complete_oldest()
+
+        while pending:
+            complete_oldest()
+
+    def upload_stage():
+        pending = deque()
+
+        def complete_oldest():
+            batch, future = pending.popleft()
+            failed = future.result()
+            result.failed_ids.update(failed)
+            if journal is not None:
+                journal.record_uploaded([doc for doc in batch if doc["id"] not in failed])
+            result.uploaded += len(batch) - len(failed)
+            print(f"  Uploaded {result.uploaded} chunks so far ({len(result.failed_ids)} failed)")
+
+        for batch in uploader.batches(iter_queue(upload_queue, stop)):
+            pending.append((batch, uploader.submit(batch)))
+            # Finished batches are recorded promptly so the journal stays current
+            while pending and (len(pending) >= uploader.concurrency * 2 or pending[0][1].done()):
+                complete_oldest()
+
+        while pending:
+            complete_oldest()
+
+    def run_stage(stage: Callable, downstream: queue.Queue = None):
+        try:
+            stage()
+            if downstream is not None:
+                _put(downstream, _DONE, stop)
+        except _Stop:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [
+        threading.Thread(target=run_stage, args=(extract_stage, chunk_queue), name="extract"),
+        threading.Thread(target=run_stage, args=(embed_stage, upload_queue), name="embed"),
+        threading.Thread(target=run_stage, args=(upload_stage,), name="upload"),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return result
@@ -0,0 +1,178 @@
+"""BM25 keyword index and reciprocal rank fusion for the local search index.
+
+An inverted index over chunk `title` and `content`: each term maps to the
+rows containing it and the term's frequency there, with title occurrences
+weighted higher. Documents are added incrementally; deleted rows are
+masked at query time and dropped when the index is compacted. Queries score
+all postings of the query terms with vectorized BM25.
+
+On disk the postings of all terms are stored back to back as delta-encoded
+row numbers and frequencies in one compressed NumPy archive, with a term
+table of offsets.
+"""
+
+import json
+import math
+import re
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2
+# Rank constant used by Azure AI Search for reciprocal rank fusion
+RRF_K = 60
+
+_TERM = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the "
+    "this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TERM.findall(text.lower()) if t not in STOPWORDS]
+
+
+class KeywordIndex:
+    """Incremental BM25 inverted index keyed by row number."""
+
+    def __init__(self):
+        self.postings: dict[str, array] = defaultdict(lambda: array("I"))
+        self.freqs: dict[str, array] = defaultdict(lambda: array("I"))
+        self.lengths = array("f")
+        self.alive = array("b")
+        self.live = 0
+        self.total_length = 0.0
+        self._arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.live
+
+    def add(self, row: int, title: str, content: str):
+        """Index a document at `row`. Rows must be added in increasing order."""
+        counts = Counter(tokenize(content))
+        for term in tokenize(title or ""):
+            counts[term] += TITLE_WEIGHT
+        while len(self.lengths) <= row:
+            self.lengths.append(0.0)
+            self.alive.append(0)
+        for term, count in counts.items():
+            self.postings[term].append(row)
+            self.freqs[term].append(count)
+            self._arrays.pop(term, None)
+        length = float(sum(counts.values()))
+        self.lengths[row] = length
+        self.alive[row] = 1
+        self.live += 1
+        self.total_length += length
+
+    def delete(self, row: int):
+        if row < len(self.alive) and self.alive[row]:
+            self.alive[row] = 0
+            self.live -= 1
+            self.total_length -= self.lengths[row]
+
+    def _term_arrays(self, term: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        if term not in self.postings:
+            return None
+        if term not in self._arrays:
+            # Copies: a NumPy view would stop the array from growing
+            self._arrays[term] = (
+                np.array(self.postings[term], dtype=np.int64),
+                np.array(self.freqs[term], dtype=np.float32),
+            )
+        return self._arrays[term]
+
+    def scores(self, query: str, rows: int) -> np.ndarray:
+        """BM25 score of rows 0..rows-1 for the query (0 where no term matches)."""
+        size = max(rows, len(self.lengths))
+        scores = np.zeros(size, dtype=np.float32)
+        if not self.live:
+            return scores[:rows]
+        lengths = np.array(self.lengths, dtype=np.float32)
+        average = self.total_length / self.live
+        for term, query_count in Counter(tokenize(query)).items():
+            arrays = self._term_arrays(term)
+            if arrays is None:
+                continue
+            docs, tf = arrays
+            df = len(docs)
+            idf = math.log(1 + (self.live - df + 0.5) / (df + 0.5))
+            norm = K1 * (1 - B + B * lengths[docs] / average)
+            # A row appears at most once per term, so plain fancy indexing accumulates correctly
+            scores[docs] += query_count * idf * tf * (K1 + 1) / (tf + norm)
+        scores[:len(self.alive)] *= np.array(self.alive, dtype=np.float32)
+        return scores[:rows]
+
+    def compact(self, keep: np.ndarray) -> "KeywordIndex":
+        """New index containing only rows in `keep`, renumbered 0..len(keep)-1."""
+        remap = np.full(len(self.lengths), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        compacted = KeywordIndex()
+        compacted.lengths = array("f", np.array(self.lengths, dtype=np.float32)[keep].tobytes())
+        compacted.alive = array("b", b"\x01" * len(keep))
+        compacted.live = len(keep)
+        compacted.total_length = float(sum(compacted.lengths))
+        for term in self.postings:
+            docs, tf = self._term_arrays(term)
+            new_docs = remap[docs]
+            kept = new_docs >= 0
+            if kept.any():
+                compacted.postings[term] = array("I", new_docs[kept].astype(np.uint32).tobytes())
+                compacted.freqs[term] = array("I", tf[kept].astype(np.uint32).tobytes())
+        return compacted
+
+    def save(self, path: Path):
+        """Write postings as delta-encoded arrays in one compressed archive."""
+        terms = sorted(self.postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(self.postings[term])
+        deltas = np.empty(offsets[-1], dtype=np.uint32)
+        freqs = np.empty(offsets[-1], dtype=np.uint32)
+        for i, term in enumerate(terms):
+            docs, tf = self._term_arrays(term)
+            deltas[offsets[i]:offsets[i + 1]] = np.diff(docs, prepend=0)
+            freqs[offsets[i]:offsets[i + 1]] = tf
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                terms=np.frombuffer(json.dumps(terms).encode(), dtype=np.uint8),
+                offsets=offsets,
+                deltas=deltas,
+                freqs=freqs.astype(np.uint16) if freqs.size and freqs.max() < 2**16 else freqs,
+                lengths=np.array(self.lengths, dtype=np.float32),
+                alive=np.array(self.alive, dtype=np.int8),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "KeywordIndex":
+        index = cls()
+        with np.load(path) as data:
+            terms = json.loads(data["terms"].tobytes())
+            offsets, deltas, freqs = data["offsets"], data["deltas"], data["freqs"]
+            index.lengths = array("f", data["lengths"].astype(np.float32).tobytes())
+            index.alive = array("b", data["alive"].astype(np.int8).tobytes())
+        for i, term in enumerate(terms):
+            start, stop = offsets[i], offsets[i + 1]
+            index.postings[term] = array("I", np.cumsum(deltas[start:stop], dtype=np.uint32).tobytes())
+            index.freqs[term] = array("I", freqs[start:stop].astype(np.uint32).tobytes())
+        alive = np.array(index.alive, dtype=bool)
+        index.live = int(alive.sum())
+        index.total_length = float(np.array(index.lengths, dtype=np.float32)[alive].sum())
+        return index
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = RRF_K) -> list[tuple[int, float]]:
+    """Fuse ranked lists of rows: score = sum of 1 / (k + rank) over the lists."""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, 1):
+            fused[row] += 1 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,473 @@
+"""Local stand-in for the Azure AI Search index.
+
+LocalSearchClient implements the part of `SearchClient` the scripts use
+(upload/merge/delete documents, keyword, vector and hybrid search with
+filters, get_document_count) on top of a contiguous float32 NumPy matrix and
+a BM25 index (keyword_search.py), and LocalIndexClient the index and alias
+management of `SearchIndexClient`, so ingestion, evaluation and benchmarks
+can run without a search service.
+
+Small indexes are searched exactly with one matrix-vector product. From
+IVF_THRESHOLD documents on, an inverted-file index (k-means centroids with
+per-cluster row lists) limits each query to the `nprobe` nearest clusters.
+Indexes are persisted to a directory and can be reopened memory-mapped.
+
+Filters support the OData subset used here: `eq`, `ne`, `gt`, `ge`, `lt`,
+`le` and `search.in()` on `source` and `page_number`, combined with `and`,
+`or` and parentheses.
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, Optional
+
+import numpy as np
+from azure.core.exceptions import ResourceNotFoundError
+
+from keyword_search import KeywordIndex, reciprocal_rank_fusion
+
+DEFAULT_DIR = Path(__file__).parent.parent / ".cache" / "local_search"
+IVF_THRESHOLD = int(os.environ.get("LOCAL_SEARCH_IVF_THRESHOLD", "50000"))
+IVF_NPROBE = int(os.environ.get("LOCAL_SEARCH_NPROBE", "8"))
+FILTER_FIELDS = ("source", "page_number")
+
+
+@dataclass
+class IndexingResult:
+    """Same shape as azure.search.documents.models.IndexingResult."""
+    key: str
+    succeeded: bool
+    status_code: int
+    error_message: Optional[str] = None
+
+
+class IvfIndex:
+    """Inverted-file index over normalized vectors."""
+
+    def __init__(self, vectors: np.ndarray, rows: np.ndarray, nlist: int = None, iterations: int = 10, seed: int = 0):
+        nlist = nlist or max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(seed)
+        data = vectors[rows]
+        centroids = data[rng.choice(len(rows), size=min(nlist, len(rows)), replace=False)].copy()
+        # Spherical k-means on a sample keeps training time bounded
+        sample = data[rng.choice(len(rows), size=min(len(rows), nlist * 256), replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(len(centroids)):
+                members = sample[assignment == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+        assignment = np.empty(len(rows), dtype=np.int64)
+        for start in range(0, len(rows), 65536):
+            assignment[start:start + 65536] = np.argmax(data[start:start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self.centroids = centroids
+        self.rows = rows[order]
+        self.offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+        # Rows at or beyond this were added after the build
+        self.indexed = int(rows.max()) + 1
+
+    def probed_rows(self, nprobe: int) -> int:
+        """Expected number of rows a query scans."""
+        return len(self.rows) * min(nprobe, len(self.centroids)) // len(self.centroids)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the nprobe clusters nearest the query."""
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.concatenate([self.rows[self.offsets[c]:self.offsets[c + 1]] for c in nearest])
+
+
+_TOKEN = re.compile(r"\s*(\(|\)|'(?:[^']|'')*'|-?\d+(?:\.\d+)?|[A-Za-z_][\w.]*|,)")
+
+
+class _FilterParser:
+    """Recursive-descent parser turning an OData filter into a row mask."""
+
+    def __init__(self, expression: str, columns: dict):
+        self.tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if not match:
+                raise ValueError(f"Unsupported filter near: {expression[position:]!r}")
+            self.tokens.append(match.group(1))
+            position = match.end()
+        self.position = 0
+        self.columns = columns
+
+    def parse(self) -> np.ndarray:
+        mask = self._or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.position]!r} in filter")
+        return mask
+
+    def _next(self) -> str:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _or(self) -> np.ndarray:
+        mask = self._and()
+        while self._peek() == "or":
+            self._next()
+            mask = mask | self._and()
+        return mask
+
+    def _and(self) -> np.ndarray:
+        mask = self._term()
+        while self._peek() == "and":
+            self._next()
+            mask = mask & self._term()
+        return mask
+
+    def _term(self) -> np.ndarray:
+        token = self._next()
+        if token == "not":
+            return ~self._term()
+        if token == "(":
+            mask = self._or()
+            if self._next() != ")":
+                raise ValueError("Missing ')' in filter")
+            return mask
+        if token == "search.in":
+            self._next()  # (
+            column = self._column(self._next())
+            self._next()  # ,
+            values = self._literal(self._next())
+            self._next()  # )
+            return np.isin(column, [v.strip() for v in str(values).split(",")])
+        column = self._column(token)
+        operator = self._next()
+        value = self._literal(self._next())
+        comparisons = {
+            "eq": np.equal, "ne": np.not_equal, "gt": np.greater,
+            "ge": np.greater_equal, "lt": np.less, "le": np.less_equal,
+        }
+        if operator not in comparisons:
+            raise ValueError(f"Unsupported filter operator {operator!r}")
+        return comparisons[operator](column, value)
+
+    def _column(self, name: str) -> np.ndarray:
+        if name not in self.columns:
+            raise ValueError(f"Field {name!r} is not filterable (supported: {', '.join(FILTER_FIELDS)})")
+        return self.columns[name]
+
+    @staticmethod
+    def _literal(token: str):
+        if token.startswith("'"):
+            return token[1:-1].replace("''", "'")
+        return float(token) if "." in token else int(token)
+
+
+class LocalSearchClient:
+    """In-process vector index with the SearchClient methods used by the scripts."""
+
+    def __init__(self, index_name: str, directory: Path = DEFAULT_DIR, mmap: bool = False):
+        self.index_name = index_name
+        self.path = Path(directory) / index_name
+        self.lock = threading.RLock()
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.count = 0
+        self.documents: list[Optional[dict]] = []
+        self.rows: dict[str, int] = {}
+        self.ivf: Optional[IvfIndex] = None
+        self.keywords = KeywordIndex()
+        self._columns = None
+        if (self.path / "documents.json").exists():
+            self._load(mmap)
+
+    # Storage
+
+    def _reserve(self, rows: int, dimensions: int):
+        if self.vectors.shape[1] == 0:
+            self.vectors = np.zeros((max(rows, 1024), dimensions), dtype=np.float32)
+        elif self.vectors.shape[1] != dimensions:
+            raise ValueError(f"Vector has {dimensions} dimensions, index has {self.vectors.shape[1]}")
+        elif rows > len(self.vectors) or not self.vectors.flags.writeable:
+            # Grow geometrically; a memory-mapped matrix is copied on first write
+            grown = np.zeros((max(rows, len(self.vectors) * 2), dimensions), dtype=np.float32)
+            kept = min(self.count, len(self.vectors))
+            grown[:kept] = self.vectors[:kept]
+            self.vectors = grown
+
+    def _store(self, doc: dict, merge: bool) -> IndexingResult:
+        """Write a document to a new row; a previous version's row becomes a tombstone."""
+        doc_id = doc["id"]
+        old = self.rows.get(doc_id)
+        if merge:
+            if old is None:
+                return IndexingResult(doc_id, False, 404, "Document not found")
+            doc = {**self.documents[old], **doc}
+        vector = doc.pop("embedding", None)
+        if vector is None and merge:
+            vector = self.vectors[old].copy()
+
+        row = self.count
+        self.count += 1
+        self.documents.append(doc)
+        self.rows[doc_id] = row
+        if old is not None:
+            self.documents[old] = None
+            self.keywords.delete(old)
+
+        self._reserve(self.count, len(vector) if vector is not None else self.vectors.shape[1])
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            self.vectors[row] = vector / norm if norm else vector
+        self.keywords.add(row, doc.get("title", ""), doc.get("content", ""))
+        return IndexingResult(doc_id, True, 200 if merge else 201)
+
+    def _write(self, documents: list[dict], merge: bool) -> list[IndexingResult]:
+        with self.lock:
+            results = [self._store(dict(doc), merge) for doc in documents]
+            self._columns = None
+            return results
+
+    def upload_documents(self, documents: list[dict]) -> list[IndexingResult]:
+        return self._write(documents, merge=False)
+
+    def merge_documents(self, documents: list[dict]) -> list[IndexingResult]:
+        return self._write(documents, merge=True)
+
+    def merge_or_upload_documents(self, documents: list[dict]) -> list[IndexingResult]:
+        with self.lock:
+            results = [self._store(dict(doc), merge=doc["id"] in self.rows) for doc in documents]
+            self._columns = None
+            return results
+
+    def delete_documents(self, documents: list[dict]) -> list[IndexingResult]:
+        with self.lock:
+            results = []
+            for doc in documents:
+                row = self.rows.pop(doc["id"], None)
+                if row is not None:
+                    self.documents[row] = None
+                    self.keywords.delete(row)
+                results.append(IndexingResult(doc["id"], True, 200))
+            self._columns = None
+            return results
+
+    def get_document(self, key: str, selected_fields: list[str] = None) -> dict:
+        with self.lock:
+            if key not in self.rows:
+                raise KeyError(key)
+            row = self.rows[key]
+            return self._project(row, selected_fields)
+
+    def get_document_count(self) -> int:
+        return len(self.rows)
+
+    # Search
+
+    def _active(self) -> np.ndarray:
+        """Mask of rows holding a live document."""
+        return self.columns()["_active"]
+
+    def columns(self) -> dict:
+        """Filterable fields as arrays aligned with matrix rows (cached until the next write)."""
+        if self._columns is None:
+            self._columns = {
+                "_active": np.fromiter((d is not None for d in self.documents), dtype=bool, count=self.count),
+                "source": np.array([d.get("source", "") if d else "" for d in self.documents], dtype=object),
+                "page_number": np.array([d.get("page_number", 0) if d else 0 for d in self.documents], dtype=np.int64),
+            }
+        return self._columns
+
+    def _ensure_ivf(self):
+        """Build or rebuild the IVF index when the corpus is large and has grown."""
+        if len(self.rows) < IVF_THRESHOLD:
+            self.ivf = None
+        elif self.ivf is None or self.count > self.ivf.indexed * 1.5:
+            self.ivf = IvfIndex(self.vectors, np.flatnonzero(self._active()))
+
+    def _project(self, row: int, select: list[str] = None) -> dict:
+        doc = self.documents[row]
+        if select:
+            return {name: doc.get(name) for name in select}
+        return dict(doc)
+
+    def _vector_ranking(self, query, mask: np.ndarray, exhaustive: bool) -> list[tuple[int, float]]:
+        """Nearest rows to a vector query as (row, cosine similarity)."""
+        k = getattr(query, "k_nearest_neighbors", None) or getattr(query, "k", None) or 50
+        vector = np.asarray(query.vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        exhaustive = exhaustive or getattr(query, "exhaustive", False)
+
+        self._ensure_ivf()
+        candidates = None
+        matching = int(mask.sum())
+        # A selective filter leaves fewer rows than the probed clusters hold:
+        # scanning them exactly is cheaper and finds the true neighbours
+        if self.ivf is not None and not exhaustive and matching > self.ivf.probed_rows(IVF_NPROBE):
+            candidates = self.ivf.candidates(vector, IVF_NPROBE)
+            # Rows added since the index was built are searched exactly
+            candidates = np.concatenate([candidates, np.arange(self.ivf.indexed, self.count)])
+            candidates = candidates[mask[candidates]]
+        if candidates is None or len(candidates) < k:
+            candidates = np.flatnonzero(mask)
+
+        if not len(candidates):
+            return []
+        if len(candidates) * 4 > self.count:
+            # Scanning the contiguous matrix beats gathering most of its rows
+            similarity = self.vectors[:self.count] @ vector
+            similarity = np.where(mask, similarity, -np.inf)[candidates]
+        else:
+            similarity = self.vectors[candidates] @ vector
+        k = min(k, len(candidates))
+        best = np.argpartition(-similarity, k - 1)[:k]
+        best = best[np.argsort(-similarity[best])]
+        return [(int(candidates[i]), float(similarity[i])) for i in best]
+
+    def _text_ranking(self, search_text: str, mask: np.ndarray, limit: int) -> list[tuple[int, float]]:
+        """Best BM25 matches as (row, score)."""
+        scores = np.where(mask, self.keywords.scores(search_text, self.count), 0)
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(int(row), float(scores[row])) for row in matched]
+
+    def search(
+        self,
+        search_text: str = None,
+        vector_queries: list = None,
+        filter: str = None,
+        top: int = None,
+        select: list[str] = None,
+        exhaustive: bool = False,
+        **kwargs,
+    ) -> Iterator[dict]:
+        """Keyword, vector or hybrid search with an optional filter.
+
+        Like Azure AI Search, hybrid queries fuse the BM25 and vector rankings
+        with reciprocal rank fusion, and `@search.score` is the fused score.
+        """
+        top = top or 50
+        with self.lock:
+            mask = self._active().copy()
+            if filter:
+                mask &= _FilterParser(filter, self.columns()).parse()
+
+            rankings = []
+            if search_text not in (None, "", "*"):
+                rankings.append(self._text_ranking(search_text, mask, max(top, 50)))
+            if vector_queries:
+                # Azure AI Search reports cosine similarity as 1 / (1 + cosine distance)
+                rankings.append([
+                    (row, 1 / (2 - similarity))
+                    for row, similarity in self._vector_ranking(vector_queries[0], mask, exhaustive)
+                ])
+
+            if not rankings:
+                ranked = [(int(row), 1.0) for row in np.flatnonzero(mask)[:top]]
+            elif len(rankings) == 1:
+                ranked = rankings[0]
+            else:
+                ranked = reciprocal_rank_fusion([[row for row, _ in ranking] for ranking in rankings])
+            return iter([{**self._project(row, select), "@search.score": score} for row, score in ranked[:top]])
+
+    # Persistence
+
+    def save(self):
+        """Write the index to disk, dropping deleted rows. Files are replaced atomically."""
+        with self.lock:
+            active = np.flatnonzero(self._active())
+            self.path.mkdir(parents=True, exist_ok=True)
+            vectors_tmp = self.path / "vectors.tmp.npy"
+            np.save(vectors_tmp, self.vectors[active] if self.count else self.vectors[:0])
+            documents_tmp = self.path / "documents.tmp.json"
+            documents_tmp.write_text(json.dumps([self.documents[r] for r in active]), encoding="utf-8")
+            keywords_tmp = self.path / "keywords.tmp.npz"
+            self.keywords.compact(active).save(keywords_tmp)
+            os.replace(vectors_tmp, self.path / "vectors.npy")
+            os.replace(documents_tmp, self.path / "documents.json")
+            os.replace(keywords_tmp, self.path / "keywords.npz")
+
+    def _load(self, mmap: bool):
+        documents = json.loads((self.path / "documents.json").read_text(encoding="utf-8"))
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r" if mmap else None)
+        self.count = len(documents)
+        self.documents = documents
+        self.rows = {doc["id"]: row for row, doc in enumerate(documents)}
+        if (self.path / "keywords.npz").exists():
+            self.keywords = KeywordIndex.load(self.path / "keywords.npz")
+        else:
+            for row, doc in enumerate(documents):
+                self.keywords.add(row, doc.get("title", ""), doc.get("content", ""))
+
+    def close(self):
+        self.save()
+
+
+class LocalIndexClient:
+    """Stand-in for SearchIndexClient: index definitions are accepted and ignored.
+
+    Aliases are kept in `aliases.json`; search clients opened on an alias
+    use the index it points at.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_DIR):
+        self.directory = Path(directory)
+
+    def create_or_update_index(self, index):
+        (self.directory / index.name).mkdir(parents=True, exist_ok=True)
+        return index
+
+    def delete_index(self, index):
+        name = getattr(index, "name", index)
+        path = self.directory / name
+        if path.is_dir():
+            for file in path.glob("*"):
+                file.unlink()
+            path.rmdir()
+
+    def list_index_names(self) -> list[str]:
+        if not self.directory.exists():
+            return []
+        return sorted(path.name for path in self.directory.iterdir() if path.is_dir())
+
+    def _aliases(self) -> dict[str, list[str]]:
+        path = self.directory / "aliases.json"
+        return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+    def _save_aliases(self, aliases: dict[str, list[str]]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / "aliases.tmp.json"
+        tmp_path.write_text(json.dumps(aliases, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.directory / "aliases.json")
+
+    def get_alias(self, name: str) -> SimpleNamespace:
+        aliases = self._aliases()
+        if name not in aliases:
+            raise ResourceNotFoundError(f"Alias '{name}' not found")
+        return SimpleNamespace(name=name, indexes=aliases[name])
+
+    def create_or_update_alias(self, alias):
+        aliases = self._aliases()
+        aliases[alias.name] = list(alias.indexes)
+        self._save_aliases(aliases)
+        return alias
+
+    def delete_alias(self, alias):
+        aliases = self._aliases()
+        aliases.pop(getattr(alias, "name", alias), None)
+        self._save_aliases(aliases)
+
+    def list_alias_names(self) -> list[str]:
+        return sorted(self._aliases())
+
+    def get_search_client(self, index_name: str) -> LocalSearchClient:
+        index_name = self._aliases().get(index_name, [index_name])[0]
+        return LocalSearchClient(index_name, self.directory)
@@ -0,0 +1,232 @@
+"""Parallel PDF text extraction across a process pool.
+
+pypdf's `extract_text()` is pure Python and CPU-bound, so PDFs are split into
+page ranges that are extracted in worker processes, one core each. Results
+are yielded per file in input order regardless of which range finishes
+first. A page that takes longer than the per-page timeout or raises is
+quarantined (skipped and reported) instead of stalling or failing the run.
+
+Pages are streamed: a file's pages are handed on range by range as they are
+extracted, and readers work from the open file rather than a copy of it in
+memory and are dropped after each range. Memory is bounded by the ranges in
+flight, not by the size of the largest PDF.
+"""
+
+import json
+import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pypdf import PdfReader
+
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "16"))
+PAGE_TIMEOUT = float(os.environ.get("PDF_PAGE_TIMEOUT", "30"))
+
+DEFAULT_REPORT_PATH = Path(__file__).parent.parent / ".cache" / "quarantined_pages.json"
+
+
+class PageTimeout(Exception):
+    """Raised in a worker when one page takes longer than the timeout."""
+
+
+@contextmanager
+def _time_limit(seconds: float):
+    """Interrupt the block after `seconds`.
+
+    Needs SIGALRM and the main thread, which pool workers provide; elsewhere
+    the block runs without a limit.
+    """
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    if seconds <= 0 or not hasattr(signal, "SIGALRM") or not in_main_thread:
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise PageTimeout(f"extraction took longer than {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+@contextmanager
+def open_pdf(path: Path) -> Iterator[PdfReader]:
+    """PdfReader that reads objects from the open file as needed.
+
+    Given a path, pypdf reads the whole file into memory first. PDFs
+    encrypted with an empty user password (permissions only) are decrypted;
+    others raise.
+    """
+    with open(path, "rb") as f:
+        reader = PdfReader(f)
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise PermissionError("PDF is encrypted with a password")
+        yield reader
+
+
+def quarantine_record(source: str, page_number: Optional[int], error: Exception) -> dict:
+    """How a skipped page (or a whole file, page_number None) is reported."""
+    return {"source": source, "page_number": page_number, "reason": f"{type(error).__name__}: {error}"}
+
+
+def _extract_page(reader: PdfReader, index: int, page_timeout: float) -> Optional[str]:
+    with _time_limit(page_timeout):
+        text = reader.pages[index].extract_text()
+    return text.strip() if text and text.strip() else None
+
+
+def iter_pdf_pages(path: Path, page_timeout: float = PAGE_TIMEOUT, quarantined: list = None) -> Iterator[tuple[int, str]]:
+    """Yield the non-empty pages of one PDF as (page_number, text), one at a time.
+
+    Pages that fail are skipped and appended to `quarantined` as
+    quarantine records.
+    """
+    with open_pdf(path) as reader:
+        for i in range(len(reader.pages)):
+            try:
+                text = _extract_page(reader, i, page_timeout)
+            except Exception as e:
+                if quarantined is not None:
+                    quarantined.append(quarantine_record(path.name, i + 1, e))
+                continue
+            if text:
+                yield i + 1, text
+
+
+def extract_page_range(path: str, start: int, stop: int, page_timeout: float = PAGE_TIMEOUT):
+    """Extract pages [start, stop) of one PDF.
+
+    Returns (pages, quarantined): non-empty pages as (page_number, text), and
+    quarantine records of pages that timed out or failed.
+    """
+    source = Path(path).name
+    pages = []
+    quarantined = []
+    try:
+        with open_pdf(path) as reader:
+            for i in range(start, stop):
+                try:
+                    text = _extract_page(reader, i, page_timeout)
+                except Exception as e:
+                    quarantined.append(quarantine_record(source, i + 1, e))
+                    continue
+                if text:
+                    pages.append((i + 1, text))
+    except Exception as e:
+        # The file itself could not be opened in this worker: lose the range, not the run
+        done = {number for number, _ in pages} | {record["page_number"] for record in quarantined}
+        quarantined += [quarantine_record(source, i + 1, e) for i in range(start, stop) if i + 1 not in done]
+    return pages, quarantined
+
+
+class PdfExtractor:
+    """Extract many PDFs in parallel, yielding pages per file in input order."""
+
+    def __init__(
+        self,
+        max_workers: int = PDF_WORKERS,
+        pages_per_task: int = PAGES_PER_TASK,
+        page_timeout: float = PAGE_TIMEOUT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self.page_timeout = page_timeout
+        self.quarantined: list[dict] = []
+        # Even one worker process keeps extraction off the caller's GIL and
+        # lets the per-page timeout interrupt it
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def _submit(self, path: Path, start: int, stop: int) -> Future:
+        return self.executor.submit(extract_page_range, str(path), start, stop, self.page_timeout)
+
+    def _tasks(self, paths: list[Path]) -> Iterator[tuple[Path, int, int, bool]]:
+        """Split files into page ranges; the flag marks the last range of a file."""
+        for path in paths:
+            try:
+                with open_pdf(path) as reader:
+                    page_count = len(reader.pages)
+            except Exception as e:
+                self.quarantined.append(quarantine_record(path.name, None, e))
+                page_count = 0
+            if page_count == 0:
+                yield path, 0, 0, True
+                continue
+            for start in range(0, page_count, self.pages_per_task):
+                stop = min(start + self.pages_per_task, page_count)
+                yield path, start, stop, stop == page_count
+
+    def _ranges(self, paths: list[Path]) -> Iterator[tuple[Path, list[tuple[int, str]], bool]]:
+        """Yield (path, pages, last) per page range, in input order.
+
+        Only a bounded window of page ranges is in flight, so memory does not
+        grow with the corpus when the consumer is slower than extraction.
+        """
+        window = self.max_workers * 4
+        pending = deque()
+        tasks = self._tasks(paths)
+
+        def fill():
+            while len(pending) < window:
+                task = next(tasks, None)
+                if task is None:
+                    return
+                path, start, stop, last = task
+                future = self._submit(path, start, stop) if stop > start else None
+                pending.append((path, last, future))
+
+        fill()
+        while pending:
+            path, last, future = pending.popleft()
+            fill()
+            pages = []
+            if future is not None:
+                pages, quarantined = future.result()
+                self.quarantined.extend(quarantined)
+            yield path, pages, last
+
+    def iter_files(self, paths: list[Path]) -> Iterator[tuple[Path, Iterator[tuple[int, str]]]]:
+        """Yield (path, pages) for each PDF in input order, with pages streamed lazily.
+
+        Each file's pages arrive range by range as they are extracted, so
+        chunking starts before a large file is fully parsed. Pages of a file
+        left unread when the next file is requested are skipped.
+        """
+        ranges = self._ranges(paths)
+
+        def file_pages():
+            for _, pages, last in ranges:
+                yield from pages
+                if last:
+                    return
+
+        for path in paths:
+            pages = file_pages()
+            yield path, pages
+            # Keep the shared range stream aligned with the next file
+            for _ in pages:
+                pass
+
+    def iter_pages(self, paths: list[Path]) -> Iterator[tuple[Path, list[tuple[int, str]]]]:
+        """Yield (path, pages) for each PDF in input order, with each file's pages in a list."""
+        for path, pages in self.iter_files(paths):
+            yield path, list(pages)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def write_quarantine_report(self, path: Path = DEFAULT_REPORT_PATH) -> Path:
+        """Write pages that were skipped to a JSON report."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.quarantined, indent=2))
+        return path
@@ -0,0 +1,165 @@
+"""Size-aware, concurrent uploads to the search index with per-document retry.
+
+Azure AI Search accepts at most 1000 documents and 16 MB per indexing
+request. Documents are packed into batches under both limits, batches are
+uploaded from a thread pool, and only the keys that failed with a transient
+status are retried with backoff. Whatever still fails is written to a
+failure report instead of being silently dropped.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+MAX_BATCH_DOCS = int(os.environ.get("UPLOAD_BATCH_DOCS", "1000"))
+MAX_BATCH_BYTES = int(os.environ.get("UPLOAD_BATCH_BYTES", str(12 * 1024 * 1024)))
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", "4"))
+MAX_RETRIES = 5
+
+# Per-document statuses worth retrying (conflicts, throttling, service busy)
+RETRYABLE_STATUSES = {409, 422, 429, 500, 502, 503, 504}
+DEFAULT_REPORT_PATH = Path(__file__).parent.parent / ".cache" / "upload_failures.json"
+
+
+def document_size(doc: dict) -> int:
+    """Serialized size of a document in the request body."""
+    return len(json.dumps(doc, separators=(",", ":")).encode("utf-8"))
+
+
+class SearchUploader:
+    """Upload documents in size-limited batches from a thread pool."""
+
+    def __init__(
+        self,
+        search_client,
+        concurrency: int = UPLOAD_CONCURRENCY,
+        max_docs: int = MAX_BATCH_DOCS,
+        max_bytes: int = MAX_BATCH_BYTES,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.search_client = search_client
+        self.concurrency = max(1, concurrency)
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="upload")
+        self.failures: dict[str, dict] = {}
+        self.stats = {"requests": 0, "uploaded": 0, "bytes": 0, "retried": 0}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def batches(self, documents: Iterable[dict]) -> Iterator[list[dict]]:
+        """Group a document stream into batches under the count and byte limits."""
+        batch = []
+        batch_bytes = 0
+        for doc in documents:
+            size = document_size(doc)
+            if batch and (len(batch) >= self.max_docs or batch_bytes + size > self.max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(doc)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _backoff(self, attempt: int):
+        time.sleep(min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0))
+
+    def _record_failure(self, doc_id: str, status, message: str, attempts: int):
+        with self.lock:
+            self.failures[doc_id] = {
+                "id": doc_id,
+                "status_code": status,
+                "error": message,
+                "attempts": attempts,
+            }
+
+    def _upload_with_retry(self, batch: list[dict], action: str = "upload") -> set[str]:
+        """Upload one batch, retrying transient failures. Returns keys that failed.
+
+        `action` is "upload" (replace documents) or "merge" (update fields).
+        """
+        send = getattr(self.search_client, f"{action}_documents")
+        pending = batch
+        failed = set()
+        for attempt in range(self.max_retries + 1):
+            try:
+                results = send(pending)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status == 413 and len(pending) > 1:
+                    # Payload too large after all: split and try each half
+                    middle = len(pending) // 2
+                    return (
+                        failed
+                        | self._upload_with_retry(pending[:middle], action)
+                        | self._upload_with_retry(pending[middle:], action)
+                    )
+                if (status in RETRYABLE_STATUSES or status is None) and attempt < self.max_retries:
+                    with self.lock:
+                        self.stats["retried"] += len(pending)
+                    self._backoff(attempt)
+                    continue
+                for doc in pending:
+                    self._record_failure(doc["id"], status, str(e), attempt + 1)
+                return failed | {doc["id"] for doc in pending}
+
+            retry_keys = set()
+            for r in results:
+                if r.succeeded:
+                    continue
+                if r.status_code in RETRYABLE_STATUSES and attempt < self.max_retries:
+                    retry_keys.add(r.key)
+                else:
+                    failed.add(r.key)
+                    self._record_failure(r.key, r.status_code, r.error_message, attempt + 1)
+
+            with self.lock:
+                self.stats["requests"] += 1
+                self.stats["uploaded"] += sum(1 for r in results if r.succeeded)
+                self.stats["bytes"] += sum(document_size(doc) for doc in pending)
+                self.stats["retried"] += len(retry_keys)
+
+            if not retry_keys:
+                break
+            pending = [doc for doc in pending if doc["id"] in retry_keys]
+            self._backoff(attempt)
+
+        return failed
+
+    def submit(self, batch: list[dict], action: str = "upload") -> Future:
+        """Upload one batch in the background. The future yields the failed keys."""
+        return self.executor.submit(self._upload_with_retry, batch, action)
+
+    def upload(self, documents: Iterable[dict], action: str = "upload") -> set[str]:
+        """Upload all documents concurrently and return the keys that failed."""
+        futures = [self.submit(batch, action) for batch in self.batches(documents)]
+        failed = set()
+        for future in futures:
+            failed |= future.result()
+        return failed
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def report(self):
+        """Print achieved upload throughput."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        stats = self.stats
+        print(
+            f"  Uploaded {stats['uploaded']} docs in {stats['requests']} request(s): "
+            f"{stats['uploaded'] / elapsed:,.0f} docs/s, {stats['bytes'] / elapsed / 1e6:,.1f} MB/s, "
+            f"{stats['retried']} retried, {len(self.failures)} failed"
+        )
+
+    def write_failure_report(self, path: Path = DEFAULT_REPORT_PATH) -> Path:
+        """Write documents that could not be uploaded to a JSON report."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(sorted(self.failures.values(), key=lambda f: f["id"]), indent=2))
+        return path
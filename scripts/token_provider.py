@@ -0,0 +1,135 @@
+"""Shared Azure AD credential with proactive token refresh for long-running scripts.
+
+Passing `credential.get_token(...).token` to a client as a static key stops
+working once the token expires (about an hour), halfway through a large
+ingestion or generation run. RefreshingCredential instead caches one token
+per scope for the whole process and fetches a new one a few minutes before
+expiry, with a single refresh per scope even when many threads or
+coroutines need a token at once. If a refresh fails while the old token is
+still valid, the old token keeps being used and the refresh is retried
+shortly after.
+
+Azure SDK clients take the credential itself; the OpenAI client takes
+`bearer_token_provider(...)` (or `async_bearer_token_provider(...)`) as its
+`azure_ad_token_provider`, which it calls before every request.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable
+
+from azure.identity import DefaultAzureCredential
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# Refresh tokens this long before they expire
+REFRESH_MARGIN = float(os.environ.get("TOKEN_REFRESH_MARGIN", "300"))
+# Wait between refresh attempts while a failing refresh falls back to the old token
+RETRY_INTERVAL = 30.0
+
+
+class RefreshingCredential:
+    """TokenCredential that caches tokens per scope and refreshes them before expiry."""
+
+    def __init__(self, credential=None, refresh_margin: float = REFRESH_MARGIN):
+        self.credential = credential or DefaultAzureCredential()
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+        self._tokens = {}
+        self._retry_at: dict[tuple, float] = {}
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _cached(self, key: tuple):
+        """The cached token if it is not yet due for refresh."""
+        token = self._tokens.get(key)
+        if token is None:
+            return None
+        now = time.time()
+        if token.expires_on - now > self.refresh_margin or now < self._retry_at.get(key, 0):
+            return token
+        return None
+
+    def _lock(self, key: tuple) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_token(self, *scopes: str, claims: str = None, tenant_id: str = None, **kwargs):
+        if claims:
+            # A claims challenge needs a new token with those claims, not the cached one
+            return self.credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+
+        key = (scopes, tenant_id)
+        token = self._cached(key)
+        if token is not None:
+            return token
+        with self._lock(key):
+            # Another thread may have refreshed while this one waited
+            token = self._cached(key)
+            if token is not None:
+                return token
+            previous = self._tokens.get(key)
+            try:
+                token = self.credential.get_token(*scopes, tenant_id=tenant_id, **kwargs)
+            except Exception as e:
+                if previous is None or previous.expires_on <= time.time() + 1:
+                    raise
+                print(f"  Token refresh failed ({type(e).__name__}: {e}); "
+                      f"using the current token for {previous.expires_on - time.time():.0f}s more")
+                self._retry_at[key] = time.time() + RETRY_INTERVAL
+                return previous
+            self._tokens[key] = token
+            self._retry_at.pop(key, None)
+            self.refreshes += 1
+            return token
+
+    async def get_token_async(self, *scopes: str, **kwargs):
+        """Like get_token, without blocking the event loop when a refresh is due."""
+        token = self._cached((scopes, kwargs.get("tenant_id")))
+        if token is not None and not kwargs.get("claims"):
+            return token
+        return await asyncio.to_thread(self.get_token, *scopes, **kwargs)
+
+    def close(self):
+        close = getattr(self.credential, "close", None)
+        if close is not None:
+            close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_credential() -> RefreshingCredential:
+    """The process-wide credential, so every client shares one token per scope."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RefreshingCredential()
+        return _shared
+
+
+def bearer_token_provider(
+    scope: str = COGNITIVE_SERVICES_SCOPE, credential: RefreshingCredential = None
+) -> Callable[[], str]:
+    """Callable returning a current bearer token, for `azure_ad_token_provider`."""
+    credential = credential or get_credential()
+
+    def provider() -> str:
+        return credential.get_token(scope).token
+
+    return provider
+
+
+def async_bearer_token_provider(
+    scope: str = COGNITIVE_SERVICES_SCOPE, credential: RefreshingCredential = None
+) -> Callable[[], Awaitable[str]]:
+    """Async variant of bearer_token_provider, for the async OpenAI client."""
+    credential = credential or get_credential()
+
+    async def provider() -> str:
+        return (await credential.get_token_async(scope)).token
+
+    return provider
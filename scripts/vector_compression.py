@@ -0,0 +1,231 @@
+"""Vector field settings for the search index: dimensions and compression.
+
+text-embedding-3 models can return shortened vectors (`dimensions`), and
+Azure AI Search can store vectors quantized to int8 (scalar) or 1 bit per
+dimension (binary), optionally oversampling on the compressed vectors and
+rescoring with the full-precision originals. Dropping the stored originals
+saves further disk space at the cost of rescoring precision.
+
+The embedding call and the index schema both read VectorSettings, so they
+always agree on dimensions. Run this module to estimate index size per
+configuration:
+    python vector_compression.py --documents 1000000
+"""
+
+import argparse
+import os
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from azure.search.documents.indexes.models import (
+    BinaryQuantizationCompression,
+    HnswAlgorithmConfiguration,
+    RescoringOptions,
+    ScalarQuantizationCompression,
+    SearchField,
+    SearchFieldDataType,
+    VectorSearch,
+    VectorSearchCompressionRescoreStorageMethod,
+    VectorSearchProfile,
+)
+
+# Native output size of the embedding models
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+COMPRESSIONS = ("none", "scalar", "binary")
+# Oversampling defaults: binary loses more resolution than int8
+DEFAULT_OVERSAMPLING = {"scalar": 4.0, "binary": 10.0}
+# HNSW bi-directional links per node (service default m=4, 2*m links on layer 0)
+HNSW_M = 4
+
+
+@dataclass(frozen=True)
+class VectorSettings:
+    """How embeddings are produced and stored in the index.
+
+    `model` is the deployment name the embeddings API is called with, and
+    `model_name` the model behind it when the deployment is named otherwise.
+    `explicit_dimensions` means the size was configured rather than implied
+    by the model, so it is always requested.
+    """
+    model: str
+    dimensions: int
+    compression: str = "none"
+    rescore: bool = True
+    oversampling: Optional[float] = None
+    keep_originals: bool = True
+    model_name: Optional[str] = None
+    explicit_dimensions: bool = False
+
+    @property
+    def native_dimensions(self) -> Optional[int]:
+        """Output size of the model, if known."""
+        return MODEL_DIMENSIONS.get(self.model_name or self.model)
+
+    @property
+    def shortened(self) -> bool:
+        """Whether the stored vectors are smaller than the model's native size."""
+        return self.native_dimensions is not None and self.dimensions != self.native_dimensions
+
+    @property
+    def request_dimensions(self) -> Optional[int]:
+        """`dimensions` argument for the embeddings API, or None for the native size."""
+        return self.dimensions if self.explicit_dimensions or self.shortened else None
+
+    @property
+    def rescoring(self) -> bool:
+        """Rescoring without originals is only possible against binary vectors."""
+        return (
+            self.compression != "none" and self.rescore
+            and (self.keep_originals or self.compression == "binary")
+        )
+
+    @classmethod
+    def from_env(cls) -> "VectorSettings":
+        """Read EMBEDDING_DIMENSIONS and VECTOR_* settings from the environment.
+
+        Dimensions are checked against EMBEDDING_MODEL_NAME, the model behind
+        the AZURE_EMBEDDING_MODEL deployment (the deployment name by default).
+        """
+        model = os.environ.get("AZURE_EMBEDDING_MODEL", "text-embedding-3-small")
+        model_name = os.environ.get("EMBEDDING_MODEL_NAME") or model
+        configured = os.environ.get("EMBEDDING_DIMENSIONS")
+        dimensions = int(configured or MODEL_DIMENSIONS.get(model_name, 1536))
+        compression = os.environ.get("VECTOR_COMPRESSION", "none").lower()
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"VECTOR_COMPRESSION must be one of {', '.join(COMPRESSIONS)}")
+        native = MODEL_DIMENSIONS.get(model_name)
+        if native is not None and dimensions > native:
+            raise ValueError(f"{model_name} returns at most {native} dimensions")
+        if native is not None and dimensions != native and not model_name.startswith("text-embedding-3"):
+            raise ValueError(f"{model_name} does not support reduced dimensions")
+        oversampling = os.environ.get("VECTOR_OVERSAMPLING")
+        return cls(
+            model=model,
+            model_name=model_name if model_name != model else None,
+            dimensions=dimensions,
+            # A known model's native size needs no argument (ada-002 rejects one)
+            explicit_dimensions=bool(configured) and dimensions != native,
+            compression=compression,
+            rescore=os.environ.get("VECTOR_RESCORE", "1") != "0",
+            oversampling=float(oversampling) if oversampling else None,
+            keep_originals=os.environ.get("VECTOR_KEEP_ORIGINALS", "1") != "0",
+        )
+
+    def describe(self) -> str:
+        parts = [f"{self.dimensions} dims", self.compression if self.compression != "none" else "float32"]
+        if self.rescoring:
+            parts.append(f"rescore x{self.oversampling or DEFAULT_OVERSAMPLING[self.compression]:g}")
+        if not self.keep_originals:
+            parts.append("originals discarded")
+        return ", ".join(parts)
+
+
+def embedding_field(settings: VectorSettings) -> SearchField:
+    """The `embedding` vector field for these settings."""
+    return SearchField(
+        name="embedding",
+        type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+        searchable=True,
+        # Originals not kept as a retrievable copy when discarded
+        hidden=not settings.keep_originals,
+        stored=settings.keep_originals,
+        vector_search_dimensions=settings.dimensions,
+        vector_search_profile_name="default-profile",
+    )
+
+
+def _compression(settings: VectorSettings):
+    if settings.compression == "none":
+        return None
+    storage = (
+        VectorSearchCompressionRescoreStorageMethod.PRESERVE_ORIGINALS
+        if settings.keep_originals
+        else VectorSearchCompressionRescoreStorageMethod.DISCARD_ORIGINALS
+    )
+    oversampling = settings.oversampling or DEFAULT_OVERSAMPLING[settings.compression]
+    rescoring = RescoringOptions(
+        enable_rescoring=settings.rescoring,
+        default_oversampling=oversampling if settings.rescoring else None,
+        rescore_storage_method=storage,
+    )
+    if settings.compression == "scalar":
+        return ScalarQuantizationCompression(compression_name="default-compression", rescoring_options=rescoring)
+    return BinaryQuantizationCompression(compression_name="default-compression", rescoring_options=rescoring)
+
+
+def build_vector_search(settings: VectorSettings, vectorizer) -> VectorSearch:
+    """HNSW vector search with the configured compression and the given vectorizer."""
+    compression = _compression(settings)
+    return VectorSearch(
+        algorithms=[HnswAlgorithmConfiguration(name="default-algorithm")],
+        profiles=[VectorSearchProfile(
+            name="default-profile",
+            algorithm_configuration_name="default-algorithm",
+            vectorizer_name=vectorizer.vectorizer_name,
+            compression_name=compression.compression_name if compression else None,
+        )],
+        vectorizers=[vectorizer],
+        compressions=[compression] if compression else None,
+    )
+
+
+def estimate_index_size(settings: VectorSettings, documents: int) -> dict:
+    """Rough vector storage for `documents` chunks, in bytes.
+
+    `vector_index` is what must fit in the service's vector index quota
+    (memory): the HNSW graph over the compressed vectors. `originals` is the
+    full-precision copy kept on disk for rescoring and retrieval.
+    """
+    float_bytes = settings.dimensions * 4
+    if settings.compression == "scalar":
+        vector_bytes = settings.dimensions
+    elif settings.compression == "binary":
+        vector_bytes = (settings.dimensions + 7) // 8
+    else:
+        vector_bytes = float_bytes
+    graph_bytes = 2 * HNSW_M * 4
+    vector_index = documents * (vector_bytes + graph_bytes)
+    originals = documents * float_bytes if settings.keep_originals else 0
+    return {"vector_index": vector_index, "originals": originals, "total": vector_index + originals}
+
+
+def report(settings: VectorSettings, documents: int):
+    """Print estimated vector storage for the current and alternative configurations."""
+    native = MODEL_DIMENSIONS.get(settings.model, settings.dimensions)
+    candidates = [settings]
+    for dimensions in sorted({native, 1024, 512, 256}, reverse=True):
+        if dimensions > native:
+            continue
+        for compression in COMPRESSIONS:
+            for keep_originals in (True, False):
+                candidate = replace(
+                    settings, dimensions=dimensions, compression=compression, keep_originals=keep_originals
+                )
+                if candidate not in candidates:
+                    candidates.append(candidate)
+
+    baseline = estimate_index_size(replace(settings, dimensions=native, compression="none"), documents)
+    print(f"Estimated vector storage for {documents:,} chunks of {settings.model}:")
+    print(f"  {'configuration':<52} {'vector index':>13} {'originals':>11} {'total':>11} {'vs float32':>10}")
+    for i, candidate in enumerate(candidates):
+        size = estimate_index_size(candidate, documents)
+        label = candidate.describe() + (" (current)" if i == 0 else "")
+        print(
+            f"  {label:<52} {size['vector_index'] / 2**20:>10,.1f} MB {size['originals'] / 2**20:>8,.1f} MB "
+            f"{size['total'] / 2**20:>8,.1f} MB {size['vector_index'] / baseline['vector_index']:>9.0%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate search index vector storage per configuration")
+    parser.add_argument("--documents", type=int, default=100_000, help="Number of indexed chunks")
+    args = parser.parse_args()
+    report(VectorSettings.from_env(), args.documents)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from chat import router as chat_router
+from jobs import router as jobs_router, start_job_workers, stop_job_workers
 
 load_dotenv()
 
@@ -16,9 +17,11 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
     print("Starting API server...")
+    start_job_workers()
     yield
     # Shutdown
     print("Shutting down API server...")
+    stop_job_workers()
 
 
 app = FastAPI(
@@ -39,6 +42,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(chat_router, prefix="/api", tags=["chat"])
+app.include_router(jobs_router, prefix="/api", tags=["jobs"])
 
 
 @app.get("/health")
@@ -3,14 +3,19 @@
 import os
 import json
 from typing import Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
 
+from compaction import prepare_thread, record_turn, resolve_thread_id, forget_conversation
+from idempotency import run_idempotent
+from rate_limit import enforce_rate_limit
 
-router = APIRouter()
+
+router = APIRouter(dependencies=[Depends(enforce_rate_limit)])
 
 
 class ChatMessage(BaseModel):
@@ -53,20 +58,15 @@ def get_agent_id() -> str:
     return agent_id
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """Send a message to the AI agent and get a response."""
+def run_chat_turn(request: ChatRequest) -> ChatResponse:
+    """Post the latest user message, run the agent and collect its reply (blocking)."""
     
     client = get_project_client()
     agent_id = get_agent_id()
     
     try:
-        # Create or continue thread
-        if request.conversation_id:
-            thread_id = request.conversation_id
-        else:
-            thread = client.agents.threads.create()
-            thread_id = thread.id
+        # Create or continue thread (compacting it first if over budget)
+        conversation_id, thread_id = prepare_thread(client, agent_id, request.conversation_id)
         
         # Add user message
         user_message = request.messages[-1]
@@ -81,6 +81,7 @@ async def chat(request: ChatRequest):
             thread_id=thread_id,
             agent_id=agent_id,
         )
+        record_turn(conversation_id, run)
         
         # Get response
         messages = client.agents.messages.list(thread_id=thread_id)
@@ -109,7 +110,7 @@ async def chat(request: ChatRequest):
         
         return ChatResponse(
             message=assistant_message,
-            conversation_id=thread_id,
+            conversation_id=conversation_id,
             citations=citations,
         )
         
@@ -117,6 +118,31 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/chat", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Send a message to the AI agent and get a response.
+    
+    Retries sent with the same Idempotency-Key header get the original
+    response instead of starting another agent run.
+    """
+    
+    if not idempotency_key:
+        return await run_in_threadpool(run_chat_turn, request)
+    
+    async def work() -> dict:
+        result = await run_in_threadpool(run_chat_turn, request)
+        return result.model_dump()
+    
+    result, replayed = await run_idempotent(idempotency_key, request.model_dump_json(), work)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return ChatResponse(**result)
+
+
 @router.post("/chat/stream")
 async def chat_stream(request: ChatRequest):
     """Stream a response from the AI agent."""
@@ -126,12 +152,8 @@ async def chat_stream(request: ChatRequest):
     
     async def generate():
         try:
-            # Create or continue thread
-            if request.conversation_id:
-                thread_id = request.conversation_id
-            else:
-                thread = client.agents.threads.create()
-                thread_id = thread.id
+            # Create or continue thread (compacting it first if over budget)
+            conversation_id, thread_id = prepare_thread(client, agent_id, request.conversation_id)
             
             # Add user message
             user_message = request.messages[-1]
@@ -146,7 +168,10 @@ async def chat_stream(request: ChatRequest):
                 thread_id=thread_id,
                 agent_id=agent_id,
             ) as stream:
+                run = None
                 for event in stream:
+                    if hasattr(event, 'data') and hasattr(event.data, 'usage'):
+                        run = event.data
                     if hasattr(event, 'data') and hasattr(event.data, 'delta'):
                         delta = event.data.delta
                         if hasattr(delta, 'content') and delta.content:
@@ -154,7 +179,8 @@ async def chat_stream(request: ChatRequest):
                                 if hasattr(content_part, 'text'):
                                     yield f"data: {json.dumps({'content': content_part.text.value})}\n\n"
             
-            yield f"data: {json.dumps({'conversation_id': thread_id, 'done': True})}\n\n"
+            record_turn(conversation_id, run)
+            yield f"data: {json.dumps({'conversation_id': conversation_id, 'done': True})}\n\n"
             
         except Exception as e:
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
@@ -169,7 +195,7 @@ async def get_conversation(conversation_id: str):
     client = get_project_client()
     
     try:
-        messages = client.agents.messages.list(thread_id=conversation_id)
+        messages = client.agents.messages.list(thread_id=resolve_thread_id(conversation_id))
         
         history = []
         for msg in reversed(list(messages)):
@@ -189,7 +215,8 @@ async def delete_conversation(conversation_id: str):
     client = get_project_client()
     
     try:
-        client.agents.threads.delete(thread_id=conversation_id)
+        client.agents.threads.delete(thread_id=resolve_thread_id(conversation_id))
+        forget_conversation(conversation_id)
         return {"status": "deleted", "conversation_id": conversation_id}
         
     except Exception as e:
@@ -0,0 +1,195 @@
+"""Thread compaction for long-running conversations.
+
+Every agent run re-reads the whole remote thread, so token cost and latency
+grow with each turn. Once a conversation passes a turn or token budget, the
+older turns are summarized and the conversation continues on a fresh thread
+seeded with the summary and the most recent turns. Clients keep using the
+original conversation ID; it is mapped to the current thread here.
+"""
+
+import os
+from typing import Optional
+
+from shared_state import get_shared_state
+
+
+SUMMARY_INSTRUCTIONS = """Summarize the conversation transcript you are given.
+Keep every fact, figure, name, decision and open question the user may refer back to.
+Write plain prose in the third person, no more than 300 words. Do not call any tools."""
+
+# Compaction state outlives a single request, so it is kept for this long
+CONVERSATION_STATE_TTL = 30 * 24 * 3600
+
+
+def _thread_key(conversation_id: str) -> str:
+    """Shared-state key mapping a conversation to its current thread (set once compacted)."""
+    return f"conversation:{conversation_id}:thread"
+
+
+def _turns_key(conversation_id: str) -> str:
+    """Shared-state counter of turns on the current thread."""
+    return f"conversation:{conversation_id}:turns"
+
+
+def _tokens_key(conversation_id: str) -> str:
+    """Shared-state key holding the current thread's last reported token usage."""
+    return f"conversation:{conversation_id}:tokens"
+
+
+def get_compaction_settings() -> dict:
+    """Read compaction budgets from the environment (0 disables a budget)."""
+    return {
+        "max_turns": int(os.environ.get("CHAT_COMPACTION_MAX_TURNS", "20")),
+        "max_tokens": int(os.environ.get("CHAT_COMPACTION_MAX_TOKENS", "12000")),
+        "keep_turns": int(os.environ.get("CHAT_COMPACTION_KEEP_TURNS", "2")),
+    }
+
+
+def resolve_thread_id(conversation_id: str) -> str:
+    """Return the thread currently backing a conversation."""
+    return get_shared_state().get(_thread_key(conversation_id)) or conversation_id
+
+
+def forget_conversation(conversation_id: str):
+    """Drop compaction state for a deleted conversation."""
+    state = get_shared_state()
+    state.delete(_thread_key(conversation_id))
+    state.delete(_turns_key(conversation_id))
+    state.delete(_tokens_key(conversation_id))
+
+
+def record_turn(conversation_id: str, run=None):
+    """Record a completed turn and the run's token usage, if reported.
+
+    The turn counter is incremented atomically, so concurrent turns on the
+    same conversation are all counted.
+    """
+    state = get_shared_state()
+    state.incr(_turns_key(conversation_id), ttl=CONVERSATION_STATE_TTL)
+
+    run_usage = getattr(run, "usage", None)
+    if run_usage:
+        # The prompt of the last run is the whole thread, so it replaces the estimate
+        tokens = (run_usage.prompt_tokens or 0) + (run_usage.completion_tokens or 0)
+        state.set(_tokens_key(conversation_id), str(tokens), ttl=CONVERSATION_STATE_TTL)
+
+
+def _reset_usage(conversation_id: str, turns: int):
+    """Restart the budgets after compaction; token usage is unknown until the next run reports it."""
+    state = get_shared_state()
+    state.set(_turns_key(conversation_id), str(turns), ttl=CONVERSATION_STATE_TTL)
+    state.set(_tokens_key(conversation_id), "0", ttl=CONVERSATION_STATE_TTL)
+
+
+def needs_compaction(conversation_id: str) -> bool:
+    """Check whether a conversation has outgrown its turn or token budget."""
+    settings = get_compaction_settings()
+    state = get_shared_state()
+    turns = int(state.get(_turns_key(conversation_id)) or 0)
+    tokens = int(state.get(_tokens_key(conversation_id)) or 0)
+
+    if settings["max_turns"] and turns >= settings["max_turns"]:
+        return True
+    if settings["max_tokens"] and tokens >= settings["max_tokens"]:
+        return True
+    return False
+
+
+def _message_text(msg) -> str:
+    """Extract plain text from a thread message."""
+    return msg.content[0].text.value if msg.content else ""
+
+
+def _split_turns(messages: list) -> list[list]:
+    """Group chronologically ordered messages into turns starting at each user message."""
+    turns = []
+    for msg in messages:
+        if msg.role == "user" or not turns:
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+
+def summarize_transcript(client, agent_id: str, transcript: str) -> str:
+    """Summarize a transcript on a scratch thread so the live thread is untouched."""
+    thread = client.agents.threads.create()
+    try:
+        client.agents.messages.create(
+            thread_id=thread.id,
+            role="user",
+            content=transcript,
+        )
+        client.agents.runs.create_and_process(
+            thread_id=thread.id,
+            agent_id=agent_id,
+            instructions=SUMMARY_INSTRUCTIONS,
+            tool_choice="none",
+        )
+        for msg in client.agents.messages.list(thread_id=thread.id):
+            if msg.role == "assistant":
+                return _message_text(msg)
+        return ""
+    finally:
+        client.agents.threads.delete(thread_id=thread.id)
+
+
+def compact_conversation(client, agent_id: str, conversation_id: str) -> str:
+    """Move a conversation onto a fresh thread seeded with a summary of older turns.
+
+    Returns the ID of the thread that now backs the conversation.
+    """
+    settings = get_compaction_settings()
+    thread_id = resolve_thread_id(conversation_id)
+
+    messages = list(client.agents.messages.list(thread_id=thread_id, order="asc"))
+    turns = _split_turns(messages)
+    keep = settings["keep_turns"]
+    older, recent = (turns[:-keep], turns[-keep:]) if keep else (turns, [])
+
+    if not older:
+        # Nothing old enough to summarize; restart the budgets so the next
+        # turns don't list the whole thread again for nothing
+        _reset_usage(conversation_id, len(turns))
+        return thread_id
+
+    transcript = "\n\n".join(
+        f"{msg.role}: {_message_text(msg)}" for turn in older for msg in turn
+    )
+    summary = summarize_transcript(client, agent_id, transcript)
+
+    new_thread = client.agents.threads.create()
+    if summary:
+        client.agents.messages.create(
+            thread_id=new_thread.id,
+            role="assistant",
+            content=f"Summary of the earlier conversation:\n{summary}",
+        )
+    for turn in recent:
+        for msg in turn:
+            client.agents.messages.create(
+                thread_id=new_thread.id,
+                role=msg.role,
+                content=_message_text(msg),
+            )
+
+    get_shared_state().set(_thread_key(conversation_id), new_thread.id, ttl=CONVERSATION_STATE_TTL)
+    _reset_usage(conversation_id, len(recent))
+    print(f"Compacted conversation {conversation_id}: {len(older)} turn(s) summarized")
+
+    # The old thread is no longer reachable through the conversation
+    try:
+        client.agents.threads.delete(thread_id=thread_id)
+    except Exception as e:
+        print(f"Could not delete compacted thread {thread_id}: {e}")
+    return new_thread.id
+
+
+def prepare_thread(client, agent_id: str, conversation_id: Optional[str]) -> tuple[str, str]:
+    """Resolve (conversation_id, thread_id) for a turn, compacting when over budget."""
+    if not conversation_id:
+        thread = client.agents.threads.create()
+        return thread.id, thread.id
+
+    if needs_compaction(conversation_id):
+        return conversation_id, compact_conversation(client, agent_id, conversation_id)
+    return conversation_id, resolve_thread_id(conversation_id)
@@ -0,0 +1,177 @@
+"""Idempotency-Key support so client retries do not start duplicate agent runs.
+
+The first request with a key claims it in the shared state store and runs;
+its response is stored for IDEMPOTENCY_TTL_SECONDS. Retries with the same key
+either attach to the request still in flight or get the stored response back.
+If the first request fails, the key is released so a retry can run again.
+The claim is a lease renewed while the request runs, so it only lapses if
+the worker holding it dies.
+
+Shared state calls block (SQLite, Redis sockets), so they run in the
+threadpool.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from shared_state import get_shared_state
+
+
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.25
+
+# Requests in flight in this worker, so local retries can await them directly
+_in_flight: dict[str, asyncio.Future] = {}
+
+
+def get_idempotency_settings() -> dict:
+    """Read idempotency timing from the environment."""
+    return {
+        # How long completed responses are replayed
+        "ttl": float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400")),
+        # How long a claim outlives its last renewal before the request is considered lost
+        "lease": float(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", "600")),
+        # How long a retry waits for the original request to finish
+        "wait": float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "120")),
+    }
+
+
+def fingerprint(payload: str) -> str:
+    """Hash of the request body, to detect a key reused for a different request."""
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _state_key(key: str) -> str:
+    return f"idempotency:{key}"
+
+
+def _check_fingerprint(record: dict, request_hash: str):
+    if record.get("fingerprint") != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+
+
+async def _wait_for_record(key: str, request_hash: str, deadline: float) -> Optional[dict]:
+    """Poll the shared store until another worker finishes the request.
+
+    Returns the completed response, or None if the claim was released.
+    """
+    state = get_shared_state()
+    while time.monotonic() < deadline:
+        record = await run_in_threadpool(state.get_json, _state_key(key))
+        if record is None:
+            return None
+        _check_fingerprint(record, request_hash)
+        if record["status"] == "done":
+            return record["response"]
+        await asyncio.sleep(POLL_INTERVAL)
+    raise HTTPException(
+        status_code=409,
+        detail="A request with this Idempotency-Key is still in progress",
+    )
+
+
+async def _renew_lease(key: str, pending: str, lease: float):
+    """Keep a claim alive while its request runs, renewing it every third of the lease."""
+    state = get_shared_state()
+    while True:
+        await asyncio.sleep(lease / 3)
+        try:
+            await run_in_threadpool(state.set, _state_key(key), pending, lease)
+        except Exception as e:
+            print(f"Could not renew idempotency lease for {key}: {e}")
+
+
+async def run_idempotent(
+    key: str,
+    payload: str,
+    work: Callable[[], Awaitable[dict]],
+) -> tuple[dict, bool]:
+    """Run `work` at most once per key.
+
+    Returns (response, replayed) where replayed is True when the response came
+    from an earlier request with the same key.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+
+    settings = get_idempotency_settings()
+    state = get_shared_state()
+    request_hash = fingerprint(payload)
+    deadline = time.monotonic() + settings["wait"]
+
+    while True:
+        local = _in_flight.get(key)
+        if local is not None:
+            record = await run_in_threadpool(state.get_json, _state_key(key))
+            if record:
+                _check_fingerprint(record, request_hash)
+            try:
+                return await asyncio.wait_for(
+                    asyncio.shield(local), max(0.0, deadline - time.monotonic())
+                ), True
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+            except asyncio.CancelledError:
+                if not local.cancelled():
+                    raise
+                continue
+            except Exception:
+                # The original failed and released the key; try to claim it ourselves
+                continue
+
+        pending = json.dumps({"status": "pending", "fingerprint": request_hash})
+        if await run_in_threadpool(state.set_if_absent, _state_key(key), pending, settings["lease"]):
+            break
+
+        record = await run_in_threadpool(state.get_json, _state_key(key))
+        if record is None:
+            continue
+        _check_fingerprint(record, request_hash)
+        if record["status"] == "done":
+            return record["response"], True
+        response = await _wait_for_record(key, request_hash, deadline)
+        if response is not None:
+            return response, True
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    renewal = asyncio.create_task(_renew_lease(key, pending, settings["lease"]))
+    try:
+        try:
+            response = await work()
+        finally:
+            # Wait for a renewal in progress, so it can't land after the final record
+            renewal.cancel()
+            await asyncio.gather(renewal, return_exceptions=True)
+    except BaseException as e:
+        await run_in_threadpool(state.delete, _state_key(key))
+        if isinstance(e, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody awaited is not logged
+            future.exception()
+        raise
+    else:
+        await run_in_threadpool(
+            state.set_json,
+            _state_key(key),
+            {"status": "done", "fingerprint": request_hash, "response": response},
+            settings["ttl"],
+        )
+        future.set_result(response)
+        return response, False
+    finally:
+        _in_flight.pop(key, None)
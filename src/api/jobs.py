@@ -0,0 +1,425 @@
+"""Asynchronous job endpoints for long-running agent turns.
+
+`POST /api/chat/jobs` queues a turn and returns a job ID immediately. The turn
+runs on a background worker pool; clients poll `GET /api/chat/jobs/{id}`
+(optionally long-polling with `?wait=`), or pass a `callback_url` to be
+notified on completion. Job state is kept in a local SQLite file so it
+survives worker restarts, and finished jobs are purged after a retention
+period.
+
+Workers renew a heartbeat on the jobs they are running. A running job whose
+heartbeat stops (its worker died) is failed by any worker's periodic check,
+or when a client reads it, so it always reaches a final status.
+
+Callbacks only go to public addresses unless the host is listed in
+JOB_CALLBACK_ALLOWED_HOSTS, so clients can't make the server call internal
+services or the cloud metadata endpoint.
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, field_validator
+
+from chat import ChatRequest, ChatResponse, run_chat_turn
+from rate_limit import enforce_rate_limit
+
+
+router = APIRouter(dependencies=[Depends(enforce_rate_limit)])
+
+FINISHED_STATUSES = ("succeeded", "failed")
+MAX_WAIT_SECONDS = 60
+POLL_INTERVAL = 0.25
+CALLBACK_ATTEMPTS = 3
+# A running job is considered lost after this many missed heartbeats
+MISSED_HEARTBEATS = 4
+
+
+def get_callback_allowed_hosts() -> set[str]:
+    """Hosts callbacks may reach even on private addresses (JOB_CALLBACK_ALLOWED_HOSTS, comma-separated)."""
+    value = os.environ.get("JOB_CALLBACK_ALLOWED_HOSTS", "")
+    return {host.strip().lower() for host in value.split(",") if host.strip()}
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    return ip.is_global and not ip.is_multicast
+
+
+def check_callback_url(url: str, resolve: bool = True):
+    """Raise ValueError unless `url` is an http(s) URL on an allowed or public host.
+
+    With `resolve`, every address the host name resolves to must be public;
+    otherwise only IP literals are checked.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    host = parsed.hostname.lower()
+    if host in get_callback_allowed_hosts():
+        return
+    try:
+        addresses = [str(ipaddress.ip_address(host))]
+    except ValueError:
+        if not resolve:
+            return
+        try:
+            addresses = [info[4][0] for info in socket.getaddrinfo(host, parsed.port or 443)]
+        except socket.gaierror as e:
+            raise ValueError(f"callback_url host does not resolve: {e}") from e
+    if not all(_is_public(address.split("%")[0]) for address in addresses):
+        raise ValueError("callback_url must not point at a private, loopback or link-local address")
+
+
+class ChatJobRequest(ChatRequest):
+    """Chat job payload: a chat request plus an optional completion webhook."""
+    callback_url: Optional[str] = None
+
+    @field_validator("callback_url")
+    @classmethod
+    def validate_callback_url(cls, value: Optional[str]) -> Optional[str]:
+        # Host names are resolved and checked off the event loop, at submission and at send time
+        if value:
+            check_callback_url(value, resolve=False)
+        return value
+
+
+class ChatJob(BaseModel):
+    """Status of a chat job."""
+    job_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+def get_job_settings() -> dict:
+    """Read job queue settings from the environment."""
+    return {
+        "path": os.environ.get("JOB_STORE_PATH", str(Path(__file__).parent / "jobs.db")),
+        "workers": int(os.environ.get("JOB_WORKERS", "4")),
+        "retention": float(os.environ.get("JOB_RETENTION_SECONDS", "86400")),
+        "max_retained": int(os.environ.get("JOB_MAX_RETAINED", "10000")),
+        # How often workers renew the heartbeat of their running jobs
+        "heartbeat": float(os.environ.get("JOB_HEARTBEAT_SECONDS", "15")),
+        # A run taking longer than this stops renewing its heartbeat and is failed
+        "timeout": float(os.environ.get("JOB_TIMEOUT_SECONDS", "900")),
+    }
+
+
+def stale_after(settings: dict) -> float:
+    """Seconds without a heartbeat after which a running job is considered lost."""
+    return settings["heartbeat"] * MISSED_HEARTBEATS
+
+
+# =============================================================================
+# DURABLE JOB STORE
+# =============================================================================
+
+class JobStore:
+    """Job records in a SQLite file shared by all workers on the host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                callback_url TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at);
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, request: ChatJobRequest) -> str:
+        job_id = f"job_{uuid.uuid4().hex}"
+        now = time.time()
+        payload = request.model_dump_json(exclude={"callback_url"})
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, request, callback_url, created_at, updated_at) "
+            "VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, payload, request.callback_url, now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        return self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def claim(self, job_id: str) -> bool:
+        """Move a queued job to running. Only one worker can win the claim."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, result: Optional[dict] = None, error: Optional[str] = None):
+        # A job already failed as lost keeps that status
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'running'",
+            (
+                "failed" if error else "succeeded",
+                json.dumps(result) if result is not None else None,
+                error,
+                time.time(),
+                job_id,
+            ),
+        )
+
+    def heartbeat(self, job_ids: list[str]):
+        """Mark running jobs as still alive."""
+        if job_ids:
+            self._connect().execute(
+                f"UPDATE jobs SET updated_at = ? WHERE status = 'running' AND id IN ({','.join('?' * len(job_ids))})",
+                (time.time(), *job_ids),
+            )
+
+    def fail_stale(self, stale_after: float, job_id: Optional[str] = None) -> int:
+        """Fail running jobs (or just `job_id`) whose heartbeat stopped.
+
+        Orphaned runs are not retried: their user message may already be on
+        the thread, so running them again could answer it twice.
+        """
+        sql = (
+            "UPDATE jobs SET status = 'failed', error = 'Job interrupted by a worker restart', "
+            "updated_at = ? WHERE status = 'running' AND updated_at < ?"
+        )
+        params = (time.time(), time.time() - stale_after)
+        if job_id is not None:
+            sql += " AND id = ?"
+            params += (job_id,)
+        return self._connect().execute(sql, params).rowcount
+
+    def recover(self, stale_after: float) -> list[str]:
+        """Fail jobs orphaned by a dead worker and return queued jobs to resume."""
+        self.fail_stale(stale_after)
+        rows = self._connect().execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        return [row["id"] for row in rows]
+
+    def purge(self, retention: float, max_retained: int) -> int:
+        """Delete finished jobs past retention, and the oldest beyond the cap."""
+        conn = self._connect()
+        deleted = conn.execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+            (time.time() - retention,),
+        ).rowcount
+        deleted += conn.execute(
+            "DELETE FROM jobs WHERE id IN ("
+            "  SELECT id FROM jobs WHERE status IN ('succeeded', 'failed')"
+            "  ORDER BY updated_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (max_retained,),
+        ).rowcount
+        return deleted
+
+
+def row_to_job(row: sqlite3.Row) -> ChatJob:
+    return ChatJob(
+        job_id=row["id"],
+        status=row["status"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        result=ChatResponse(**json.loads(row["result"])) if row["result"] else None,
+        error=row["error"],
+    )
+
+
+# =============================================================================
+# WORKER POOL
+# =============================================================================
+
+_store: Optional[JobStore] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_monitor: Optional[threading.Thread] = None
+_stop_monitor = threading.Event()
+# Jobs running in this process -> monotonic start time
+_running: dict[str, float] = {}
+_running_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _store
+    if _store is None:
+        _store = JobStore(get_job_settings()["path"])
+    return _store
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Refuse redirects, which could lead a checked callback to an internal address."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def send_callback(url: str, job: ChatJob):
+    """POST the finished job to its webhook, retrying with backoff."""
+    try:
+        # Checked again: the host may resolve differently than at submission
+        check_callback_url(url)
+    except ValueError as e:
+        print(f"Callback for {job.job_id} not sent: {e}")
+        return
+
+    body = job.model_dump_json().encode()
+    for attempt in range(CALLBACK_ATTEMPTS):
+        if attempt:
+            time.sleep(2 ** (attempt - 1))
+        try:
+            req = urllib.request.Request(
+                url, data=body, method="POST", headers={"Content-Type": "application/json"}
+            )
+            with _callback_opener.open(req, timeout=10):
+                return
+        except Exception as e:
+            print(f"Callback for {job.job_id} failed (attempt {attempt + 1}): {e}")
+
+
+def process_job(job_id: str):
+    """Run one queued job to completion on a worker thread."""
+    store = get_job_store()
+    if not store.claim(job_id):
+        return
+
+    with _running_lock:
+        _running[job_id] = time.monotonic()
+    row = store.get(job_id)
+    try:
+        response = run_chat_turn(ChatRequest(**json.loads(row["request"])))
+        store.finish(job_id, result=response.model_dump())
+    except Exception as e:
+        detail = getattr(e, "detail", None) or str(e)
+        store.finish(job_id, error=detail)
+    finally:
+        with _running_lock:
+            _running.pop(job_id, None)
+
+    row = store.get(job_id)
+    if row["callback_url"]:
+        send_callback(row["callback_url"], row_to_job(row))
+
+
+def monitor_jobs(settings: dict):
+    """Renew heartbeats of this process's running jobs and fail lost ones, until stopped."""
+    store = get_job_store()
+    while not _stop_monitor.wait(settings["heartbeat"]):
+        try:
+            now = time.monotonic()
+            with _running_lock:
+                # Runs over the timeout stop renewing, so they are failed like lost ones
+                alive = [job_id for job_id, started in _running.items() if now - started < settings["timeout"]]
+            store.heartbeat(alive)
+            failed = store.fail_stale(stale_after(settings))
+            if failed:
+                print(f"Failed {failed} chat job(s) lost with their worker")
+        except Exception as e:
+            print(f"Job monitor error: {e}")
+
+
+def start_job_workers():
+    """Start the worker pool and monitor, and resume jobs left queued by a previous process."""
+    global _executor, _monitor
+    settings = get_job_settings()
+    _executor = ThreadPoolExecutor(max_workers=settings["workers"], thread_name_prefix="chat-job")
+
+    store = get_job_store()
+    store.purge(settings["retention"], settings["max_retained"])
+    pending = store.recover(stale_after(settings))
+    for job_id in pending:
+        _executor.submit(process_job, job_id)
+    if pending:
+        print(f"Resumed {len(pending)} queued chat job(s)")
+
+    _stop_monitor.clear()
+    _monitor = threading.Thread(target=monitor_jobs, args=(settings,), name="chat-job-monitor", daemon=True)
+    _monitor.start()
+
+
+def stop_job_workers():
+    """Stop accepting work; queued jobs stay in the store for the next start."""
+    global _executor, _monitor
+    _stop_monitor.set()
+    if _monitor is not None:
+        _monitor.join()
+        _monitor = None
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# =============================================================================
+# ENDPOINTS
+# =============================================================================
+
+@router.post("/chat/jobs", response_model=ChatJob, status_code=202)
+async def create_chat_job(request: ChatJobRequest, response: Response):
+    """Queue a chat turn and return its job ID immediately."""
+
+    if _executor is None:
+        raise HTTPException(status_code=503, detail="Job workers are not running")
+    if request.callback_url:
+        try:
+            await run_in_threadpool(check_callback_url, request.callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    settings = get_job_settings()
+    store = get_job_store()
+    await run_in_threadpool(store.purge, settings["retention"], settings["max_retained"])
+    job_id = await run_in_threadpool(store.create, request)
+    _executor.submit(process_job, job_id)
+
+    response.headers["Location"] = f"/api/chat/jobs/{job_id}"
+    return row_to_job(await run_in_threadpool(store.get, job_id))
+
+
+@router.get("/chat/jobs/{job_id}", response_model=ChatJob)
+async def get_chat_job(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=MAX_WAIT_SECONDS, description="Seconds to wait for completion"),
+):
+    """Get job status, optionally long-polling until it finishes."""
+
+    store = get_job_store()
+    deadline = time.monotonic() + wait
+    # Don't report a job as running if its worker is gone
+    await run_in_threadpool(store.fail_stale, stale_after(get_job_settings()), job_id)
+
+    while True:
+        row = await run_in_threadpool(store.get, job_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+        if row["status"] in FINISHED_STATUSES or time.monotonic() >= deadline:
+            return row_to_job(row)
+        await asyncio.sleep(POLL_INTERVAL)
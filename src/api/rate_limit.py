@@ -0,0 +1,71 @@
+"""Per-client request rate limiting backed by the shared state store."""
+
+import ipaddress
+import os
+import time
+from functools import lru_cache
+from fastapi import HTTPException, Request
+
+from shared_state import get_shared_state
+
+
+def get_rate_limit() -> int:
+    """Requests allowed per client per minute (0 disables limiting)."""
+    return int(os.environ.get("RATE_LIMIT_PER_MINUTE", "0"))
+
+
+@lru_cache(maxsize=8)
+def _parse_networks(value: str) -> tuple:
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip())
+
+
+def get_trusted_proxies() -> tuple:
+    """Networks of reverse proxies whose X-Forwarded-For is believed (TRUSTED_PROXIES, comma-separated)."""
+    return _parse_networks(os.environ.get("TRUSTED_PROXIES", ""))
+
+
+def _is_trusted(address: str, proxies: tuple) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_key(request: Request) -> str:
+    """Identify the caller.
+
+    X-Forwarded-For is only honoured when the connection comes from a
+    trusted proxy; otherwise any client could pick its own key. The client
+    is then the nearest address in the chain not added by a trusted proxy.
+    """
+    peer = request.client.host if request.client else "unknown"
+    proxies = get_trusted_proxies()
+    if not _is_trusted(peer, proxies):
+        return peer
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    for address in reversed(forwarded):
+        if not _is_trusted(address, proxies):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+def enforce_rate_limit(request: Request):
+    """FastAPI dependency enforcing a fixed one-minute window per client.
+
+    A plain function, so FastAPI runs it in the threadpool and the shared
+    state call (a socket round trip with Redis) doesn't block the event loop.
+    """
+    limit = get_rate_limit()
+    if not limit:
+        return
+
+    window = int(time.time() // 60)
+    count = get_shared_state().incr(f"ratelimit:{client_key(request)}:{window}", ttl=60)
+    if count > limit:
+        retry_after = 60 - int(time.time() % 60)
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,336 @@
+"""Shared key-value state for caches and rate limits across API workers.
+
+With several uvicorn workers, in-process dictionaries are duplicated per
+process, which lowers cache hit rates and makes limits inaccurate. The
+backend is chosen with SHARED_STATE_URL:
+
+    (unset) / memory://            process-local dictionaries (default)
+    sqlite:///path/to/state.db     SQLite file shared by workers on one host
+    redis://[:password@]host:6379/0 Redis protocol (rediss:// for TLS)
+
+Values are strings; use get_json/set_json for structured data.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import ssl
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from urllib.parse import urlparse, unquote
+
+
+class SharedState(ABC):
+    """Key-value store with expiry. Subclasses implement the primitives."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Set a key only if it does not exist. Returns True if it was set."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """Atomically increment a counter. The TTL applies when the counter is created."""
+
+    def get_json(self, key: str):
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value, ttl: Optional[float] = None):
+        self.set(key, json.dumps(value), ttl)
+
+
+class MemoryState(SharedState):
+    """Process-local state. Each worker has its own copy."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (value, self._expiry(ttl))
+
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, self._expiry(ttl))
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            current = self._live(key)
+            if current is None:
+                self._data[key] = ("1", self._expiry(ttl))
+                return 1
+            value = int(current) + 1
+            self._data[key] = (str(value), self._data[key][1])
+            return value
+
+
+class SQLiteState(SharedState):
+    """State in a local SQLite file, shared by all workers on the host."""
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS kv (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    def _write(self, sql: str, params: tuple) -> int:
+        """Run a write in an immediate transaction, purging expired rows now and then."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (params[0], time.time()))
+            rowcount = conn.execute(sql, params).rowcount
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+            conn.execute("COMMIT")
+            return rowcount
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._write(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, self._expiry(ttl)),
+        )
+
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return self._write(
+            "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, self._expiry(ttl)),
+        ) == 1
+
+    def delete(self, key: str):
+        self._write("DELETE FROM kv WHERE key = ?", (key,))
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            conn.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, now))
+            conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, '1', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (key, self._expiry(ttl)),
+            )
+            value = int(conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()[0])
+            conn.execute("COMMIT")
+            return value
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class RedisError(Exception):
+    """Error reply from a Redis server."""
+
+
+class RedisState(SharedState):
+    """State on a Redis-protocol server, shared by workers on any host.
+
+    Speaks RESP directly over a socket (one connection per thread), so no
+    client library is required.
+    """
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.use_tls = parsed.scheme == "rediss"
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=10)
+        if self.use_tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            auth = [self.username, self.password] if self.username else [self.password]
+            self._send("AUTH", *auth)
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _send(self, *args: str):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._local.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                self._local.reader.close()
+                sock.close()
+            except OSError:
+                pass
+
+    def command(self, *args: str, retry: bool = True):
+        """Send one command on this thread's connection.
+
+        If the connection dropped or timed out, it is closed (a late reply
+        would otherwise be read as the answer to the next command) and a
+        new one is opened. The command is sent again only if `retry` is
+        set: a non-idempotent command such as INCR may already have been
+        applied, so the error is raised instead.
+        """
+        if getattr(self._local, "sock", None) is None:
+            self._connect()
+        try:
+            return self._send(*args)
+        except (ConnectionError, OSError):
+            self._disconnect()
+            if not retry:
+                raise
+            self._connect()
+            return self._send(*args)
+
+    @staticmethod
+    def _px(ttl: Optional[float]) -> list[str]:
+        return ["PX", str(max(1, int(ttl * 1000)))] if ttl else []
+
+    def get(self, key: str) -> Optional[str]:
+        return self.command("GET", key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self.command("SET", key, value, *self._px(ttl))
+
+    def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        # Not resent: if the first attempt set the key, a resend would report it taken
+        return self.command("SET", key, value, *self._px(ttl), "NX", retry=False) == "OK"
+
+    def delete(self, key: str):
+        self.command("DEL", key)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        if ttl:
+            # Create the counter with its expiry first; INCR keeps an existing TTL
+            self.command("SET", key, "0", *self._px(ttl), "NX")
+        return self.command("INCR", key, retry=False)
+
+
+def create_shared_state(url: str) -> SharedState:
+    """Create a backend from a SHARED_STATE_URL value."""
+    scheme = urlparse(url).scheme if url else "memory"
+    if scheme == "memory":
+        return MemoryState()
+    if scheme == "sqlite":
+        return SQLiteState(url[len("sqlite:///"):])
+    if scheme in ("redis", "rediss"):
+        return RedisState(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL scheme: {scheme}")
+
+
+_shared_state: Optional[SharedState] = None
+_shared_state_lock = threading.Lock()
+
+
+def get_shared_state() -> SharedState:
+    """Get the process-wide shared state backend configured by SHARED_STATE_URL."""
+    global _shared_state
+    if _shared_state is None:
+        with _shared_state_lock:
+            if _shared_state is None:
+                _shared_state = create_shared_state(os.environ.get("SHARED_STATE_URL", ""))
+    return _shared_state
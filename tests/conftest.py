@@ -0,0 +1,20 @@
+"""Shared fixtures. The API and scripts are flat module directories, not packages."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+for directory in ("src/api", "scripts", "benchmarks"):
+    sys.path.insert(0, str(ROOT / directory))
+
+import shared_state  # noqa: E402
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """A fresh process-local shared state backend for each test."""
+    backend = shared_state.MemoryState()
+    monkeypatch.setattr(shared_state, "_shared_state", backend)
+    return backend
@@ -0,0 +1,78 @@
+"""Chunk size limits and offsets of the token-aware chunker."""
+
+import pytest
+
+import embeddings
+from chunker import chunk_text
+from embeddings import count_tokens
+
+
+def assert_valid(text, chunks, max_tokens):
+    for chunk in chunks:
+        assert chunk.text == text[chunk.start:chunk.end]
+        assert count_tokens(chunk.text) <= max_tokens
+    # Every non-space character lands in some chunk
+    covered = set()
+    for chunk in chunks:
+        covered.update(range(chunk.start, chunk.end))
+    assert all(i in covered for i, ch in enumerate(text) if not ch.isspace())
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "x" * 100000,
+        "漢字かな交じり文" * 5000,
+        "Download https://example.com/" + "a" * 20000 + " before Friday.",
+        "Header line\n\n" + "Zm9vYmFy" * 4000 + "\n\nTrailing paragraph.",
+    ],
+    ids=["no-whitespace", "cjk", "long-url", "base64"],
+)
+def test_unbroken_text_is_hard_split(text):
+    chunks = chunk_text(text, max_tokens=256, overlap_tokens=48)
+    assert len(chunks) > 1
+    assert_valid(text, chunks, 256)
+
+
+def test_paragraphs_stay_within_limit():
+    text = "\n\n".join(f"# Section {i}\n\n" + "Some words in a sentence. " * 40 for i in range(20))
+    chunks = chunk_text(text, max_tokens=128, overlap_tokens=16)
+    assert_valid(text, chunks, 128)
+
+
+def test_short_text_is_one_chunk():
+    chunks = chunk_text("  A short note.  ")
+    assert [(c.text, c.start) for c in chunks] == [("A short note.", 2)]
+
+
+def test_empty_text_has_no_chunks():
+    assert chunk_text("   \n\n ") == []
+
+
+@pytest.mark.parametrize("overlap", [256, 300, -1])
+def test_rejects_overlap_outside_limit(overlap):
+    with pytest.raises(ValueError):
+        chunk_text("text", max_tokens=256, overlap_tokens=overlap)
+
+
+def test_separators_count_towards_the_limit():
+    # Every word and every line break is a token
+    def count(text):
+        return len(text.split()) + text.count("\n")
+
+    text = "\n\n\n".join("one two three" for _ in range(200))
+    chunks = chunk_text(text, max_tokens=20, overlap_tokens=0, count_tokens=count)
+    assert max(count(chunk.text) for chunk in chunks) <= 20
+
+
+def test_unbroken_text_is_cut_on_token_ids(monkeypatch):
+    tiktoken = pytest.importorskip("tiktoken")
+    # One token per byte, so a CJK character spans three tokens
+    encoding = tiktoken.Encoding(
+        name="bytes", pat_str=r"\S+|\s+", mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={}
+    )
+    monkeypatch.setattr(embeddings, "_encoding", encoding)
+    text = "漢字" * 2000 + " " + "x" * 3000
+    chunks = chunk_text(text, max_tokens=256, overlap_tokens=0)
+    assert_valid(text, chunks, 256)
+    assert all(chunk.tokens == count_tokens(chunk.text) for chunk in chunks)
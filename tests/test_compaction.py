@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import compaction
+from fake_agents import FakeProjectClient, FakeServiceConfig, Latency
+
+
+@pytest.fixture
+def client():
+    return FakeProjectClient(FakeServiceConfig(request_latency=Latency(0), first_token_latency=Latency(0)))
+
+
+@pytest.fixture(autouse=True)
+def budgets(monkeypatch):
+    monkeypatch.setenv("CHAT_COMPACTION_MAX_TURNS", "4")
+    monkeypatch.setenv("CHAT_COMPACTION_MAX_TOKENS", "0")
+    monkeypatch.setenv("CHAT_COMPACTION_KEEP_TURNS", "2")
+
+
+def run_turns(client, conversation_id, count):
+    for i in range(count):
+        client.agents.messages.create(conversation_id, role="user", content=f"question {i}")
+        client.agents.messages.create(conversation_id, role="assistant", content=f"answer {i}")
+        compaction.record_turn(conversation_id)
+
+
+def test_record_turn_counts_concurrent_turns(state):
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: compaction.record_turn("conv"), range(200)))
+    assert state.get(compaction._turns_key("conv")) == "200"
+
+
+def test_record_turn_keeps_last_reported_tokens(state):
+    usage = SimpleNamespace(prompt_tokens=900, completion_tokens=100)
+    compaction.record_turn("conv", SimpleNamespace(usage=usage))
+    compaction.record_turn("conv")
+    assert state.get(compaction._tokens_key("conv")) == "1000"
+
+
+def test_compaction_moves_to_new_thread_and_deletes_old(state, client):
+    conversation_id = client.agents.threads.create().id
+    run_turns(client, conversation_id, 4)
+    assert compaction.needs_compaction(conversation_id)
+
+    _, thread_id = compaction.prepare_thread(client, "agent", conversation_id)
+
+    assert thread_id != conversation_id
+    assert compaction.resolve_thread_id(conversation_id) == thread_id
+    backend = client.agents.backend
+    assert conversation_id not in backend.threads
+    # Summary plus the two kept turns
+    assert len(backend.threads[thread_id]) == 1 + 2 * 2
+    assert state.get(compaction._turns_key(conversation_id)) == "2"
+    assert not compaction.needs_compaction(conversation_id)
+
+
+def test_compaction_with_nothing_to_summarize_resets_usage(state, client, monkeypatch):
+    monkeypatch.setenv("CHAT_COMPACTION_MAX_TURNS", "0")
+    monkeypatch.setenv("CHAT_COMPACTION_MAX_TOKENS", "100")
+    conversation_id = client.agents.threads.create().id
+    run_turns(client, conversation_id, 2)
+    state.set(compaction._tokens_key(conversation_id), "500")
+
+    _, thread_id = compaction.prepare_thread(client, "agent", conversation_id)
+
+    assert thread_id == conversation_id
+    assert not compaction.needs_compaction(conversation_id)
+    assert state.get(compaction._turns_key(conversation_id)) == "2"
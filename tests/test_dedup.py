@@ -0,0 +1,107 @@
+"""Exact and near-duplicate detection, and its state across resumed runs."""
+
+import json
+from concurrent.futures import Future
+
+from dedup import Deduplicator
+from ingest_journal import IngestJournal
+from ingest_pipeline import run_pipeline
+
+WORDS = "the quick brown fox jumps over the lazy dog while the cat watches from a sunny window sill".split()
+
+
+def doc(doc_id, source, content):
+    return {"id": doc_id, "source": source, "page_number": 1, "content": content}
+
+
+def paragraph(seed: int, words: int = 60) -> str:
+    return " ".join(WORDS[(seed * 7 + i * (seed + 3)) % len(WORDS)] + str(i % (seed + 5)) for i in range(words))
+
+
+def test_exact_copies_ignore_case_and_punctuation():
+    dedup = Deduplicator()
+    text = paragraph(1)
+    assert dedup.check(doc("a", "a.txt", text)) is None
+    assert dedup.check(doc("b", "b.txt", text.upper() + "!!")) == "a"
+    assert dedup.exact_duplicates == 1
+    assert dedup.alternates["a"] == ["b.txt#page=1"]
+
+
+def test_near_copies_are_dropped_and_distinct_text_kept():
+    dedup = Deduplicator(threshold=0.8)
+    text = paragraph(2, 200)
+    words = text.split()
+    words[100] = "changed"
+    assert dedup.check(doc("a", "a.txt", text)) is None
+    assert dedup.check(doc("b", "b.txt", " ".join(words))) == "a"
+    assert dedup.check(doc("c", "c.txt", paragraph(9, 200))) is None
+    assert dedup.near_duplicates == 1
+
+
+def test_state_restores_into_a_new_run():
+    first = Deduplicator()
+    first.check(doc("a", "a.txt", paragraph(3)))
+    state = json.loads(json.dumps(first.fingerprints(["a"])))
+
+    second = Deduplicator()
+    second.restore("a.txt", state)
+    assert second.check(doc("b", "b.txt", paragraph(3))) == "a"
+    assert second.duplicate_sources("b.txt", {"b": "a"}) == ["a.txt"]
+
+
+class FakeScheduler:
+    model = "test-embedding"
+    dimensions = 4
+    max_workers = 1
+
+    def submit(self, texts):
+        future = Future()
+        future.set_result([[1.0, 0.0, 0.0, 0.0] for _ in texts])
+        return future
+
+
+class FakeUploader:
+    concurrency = 1
+
+    def __init__(self):
+        self.uploaded = []
+
+    def batches(self, docs):
+        for d in docs:
+            yield [d]
+
+    def submit(self, batch):
+        self.uploaded.extend(d["id"] for d in batch)
+        future = Future()
+        future.set_result(set())
+        return future
+
+
+def test_resumed_run_drops_copies_of_completed_files(tmp_path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_text("a")
+    b.write_text("b")
+    settings = {"model": "test-embedding", "dimensions": 4, "dedup": True, "index": "test"}
+    shared, unique = paragraph(4), paragraph(5)
+
+    # The first run finishes a.txt and is interrupted before b.txt
+    journal = IngestJournal("test", settings, tmp_path / "journal.jsonl")
+    journal.start([a, b])
+    run_pipeline([(a, [doc("a-0", "a.txt", shared)])], FakeScheduler(), FakeUploader(), dedup=Deduplicator(), journal=journal)
+    journal.close()
+
+    journal = IngestJournal("test", settings, tmp_path / "journal.jsonl")
+    assert journal.load()
+    journal.start([a, b])
+    dedup = Deduplicator()
+    record = journal.completed(a)
+    dedup.restore(a.name, record["fingerprints"])
+    uploader = FakeUploader()
+    result = run_pipeline(
+        [(b, [doc("b-0", "b.txt", shared), doc("b-1", "b.txt", unique)])],
+        FakeScheduler(), uploader, dedup=dedup, journal=journal,
+    )
+    journal.close()
+
+    assert uploader.uploaded == ["b-1"]
+    assert result.duplicates["b.txt"] == {"b-0": "a-0"}
@@ -0,0 +1,100 @@
+"""Per-input token limit of the embedding scheduler."""
+
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from embeddings import (
+    MAX_BATCH_INPUTS, MAX_BATCH_TOKENS, MAX_INPUT_TOKENS, EmbeddingScheduler, count_tokens, make_batches, truncate_input,
+)
+from ingest_pipeline import batch_documents, run_pipeline
+
+
+class RecordingClient:
+    """Embeddings client that records the inputs it receives."""
+
+    def __init__(self):
+        self.embeddings = self
+        self.inputs = []
+
+    def create(self, input, model, **kwargs):
+        self.inputs.extend(input)
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=data)
+
+
+def test_truncate_input_keeps_short_text():
+    assert truncate_input("short text") == "short text"
+
+
+def test_truncate_input_fits_limit():
+    text = "word " * (MAX_INPUT_TOKENS * 3)
+    truncated = truncate_input(text)
+    assert count_tokens(truncated) <= MAX_INPUT_TOKENS
+    assert text.startswith(truncated)
+
+
+def test_scheduler_truncates_over_limit_inputs():
+    client = RecordingClient()
+    scheduler = EmbeddingScheduler(client, max_workers=1, requests_per_minute=0, tokens_per_minute=0)
+    try:
+        long_text = "x" * (MAX_INPUT_TOKENS * 8)
+        vectors = scheduler.submit(["short", long_text]).result()
+    finally:
+        scheduler.close()
+
+    assert len(vectors) == 2
+    assert client.inputs[0] == "short"
+    assert count_tokens(client.inputs[1]) <= MAX_INPUT_TOKENS
+    assert scheduler.stats["truncated"] == 1
+
+
+def test_batches_respect_input_and_token_limits():
+    texts = ["word " * 100] * 30
+    tokens = count_tokens(texts[0])
+    batches = list(make_batches(texts, max_inputs=8, max_tokens=tokens * 4 + 1))
+    assert [len(batch) for batch in batches] == [4] * 7 + [2]
+    assert [len(batch) for batch in make_batches(texts, max_inputs=3, max_tokens=10**6)] == [3] * 10
+    assert [text for batch in batches for text in batch] == texts
+
+
+def test_documents_are_batched_by_content():
+    documents = [{"id": str(i), "content": "word " * 100} for i in range(10)]
+    batches = list(batch_documents(documents))
+    assert [doc for batch in batches for doc in batch] == documents
+    for batch in batches:
+        assert len(batch) <= MAX_BATCH_INPUTS
+        assert sum(count_tokens(doc["content"]) for doc in batch) <= MAX_BATCH_TOKENS
+
+
+class ListUploader:
+    concurrency = 1
+
+    def __init__(self):
+        self.documents = []
+
+    def batches(self, docs):
+        for doc in docs:
+            yield [doc]
+
+    def submit(self, batch):
+        self.documents.extend(batch)
+        future = Future()
+        future.set_result(set())
+        return future
+
+
+def test_pipeline_embeds_through_the_scheduler(tmp_path):
+    client = RecordingClient()
+    scheduler = EmbeddingScheduler(client, max_workers=2, requests_per_minute=0, tokens_per_minute=0)
+    uploader = ListUploader()
+    docs = [{"id": str(i), "source": "a.txt", "content": f"chunk {i} " * (i + 1)} for i in range(50)]
+    try:
+        result = run_pipeline([(tmp_path / "a.txt", docs)], scheduler, uploader)
+    finally:
+        scheduler.close()
+
+    assert result.embedded == result.uploaded == 50
+    assert scheduler.stats["inputs"] == 50
+    # Vectors stay with their documents across concurrent batches
+    for doc in uploader.documents:
+        assert doc["embedding"] == [float(len(doc["content"]))]
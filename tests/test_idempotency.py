@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import idempotency
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_second_request_replays_first_response(state):
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return {"answer": 42}
+
+    async def main():
+        first = await idempotency.run_idempotent("key", "body", work)
+        second = await idempotency.run_idempotent("key", "body", work)
+        return first, second
+
+    first, second = run(main())
+    assert first == ({"answer": 42}, False)
+    assert second == ({"answer": 42}, True)
+    assert len(calls) == 1
+
+
+def test_concurrent_retry_attaches_to_request_in_flight(state):
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return {"answer": 1}
+
+    async def main():
+        return await asyncio.gather(
+            idempotency.run_idempotent("key", "body", work),
+            idempotency.run_idempotent("key", "body", work),
+        )
+
+    results = run(main())
+    assert sorted(replayed for _, replayed in results) == [False, True]
+    assert len(calls) == 1
+
+
+def test_key_reused_with_different_body_is_rejected(state):
+    async def work():
+        return {}
+
+    async def main():
+        await idempotency.run_idempotent("key", "body", work)
+        await idempotency.run_idempotent("key", "other body", work)
+
+    with pytest.raises(HTTPException) as error:
+        run(main())
+    assert error.value.status_code == 422
+
+
+def test_failure_releases_key(state):
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def succeed():
+        return {"ok": True}
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await idempotency.run_idempotent("key", "body", fail)
+        return await idempotency.run_idempotent("key", "body", succeed)
+
+    assert run(main()) == ({"ok": True}, False)
+
+
+def test_lease_renewed_while_request_runs(state, monkeypatch):
+    monkeypatch.setenv("IDEMPOTENCY_LEASE_SECONDS", "0.3")
+    key = idempotency._state_key("key")
+    claimed_elsewhere = []
+
+    async def slow_work():
+        # Another worker tries to claim the key after the original lease would have lapsed
+        await asyncio.sleep(0.7)
+        claimed_elsewhere.append(state.set_if_absent(key, "{}", ttl=60))
+        return {"ok": True}
+
+    run(idempotency.run_idempotent("key", "body", slow_work))
+    assert claimed_elsewhere == [False]
+    assert json.loads(state.get(key))["status"] == "done"
@@ -0,0 +1,99 @@
+"""Checkpoint journal of resumable ingestion runs."""
+
+from local_search import LocalSearchClient
+from ingest_journal import IngestJournal
+
+SETTINGS = {"model": "test-embedding", "dimensions": 4, "dedup": True, "index": "test"}
+
+
+def make_doc(source, i, content="text"):
+    return {"id": f"{source}-{i}", "source": source, "page_number": 1, "content": content, "embedding": [1.0, 0, 0, 0]}
+
+
+def test_local_index_is_saved_before_uploads_are_journaled(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    index = LocalSearchClient("test", tmp_path / "index")
+    journal = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl", flush_interval=3600, sync=index.save)
+    journal.start([tmp_path / "a.txt"])
+    journal.begin_file(tmp_path / "a.txt")
+
+    docs = [make_doc("a.txt", i) for i in range(3)]
+    index.upload_documents(docs)
+    journal.record_uploaded(docs)
+    journal.close()
+
+    # A fresh process sees every document the journal claims was uploaded
+    reopened = LocalSearchClient("test", tmp_path / "index")
+    resumed = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl")
+    assert resumed.load()
+    assert resumed.files["a.txt"]["uploaded"] == {doc["id"] for doc in docs}
+    assert reopened.get_document_count() == 3
+
+
+def test_sync_runs_per_interval_and_resume_trusts_only_synced_uploads(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    syncs = []
+    journal = IngestJournal(
+        "test", SETTINGS, tmp_path / "journal.jsonl", flush_interval=3600, sync=lambda: syncs.append(1)
+    )
+    journal.start([tmp_path / "a.txt"])
+    journal.begin_file(tmp_path / "a.txt")
+    journal._last_sync -= 3600
+    journal.record_uploaded([make_doc("a.txt", 0)])
+    for i in range(1, 20):
+        journal.record_uploaded([make_doc("a.txt", i)])
+    assert len(syncs) == 1
+
+    # Crash: later batches are journaled, but the index was saved only after the first
+    resumed = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl")
+    assert resumed.load()
+    assert resumed.files["a.txt"]["uploaded"] == {"a.txt-0"}
+
+    journal.close()
+    assert len(syncs) == 2
+    resumed = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl")
+    assert resumed.load()
+    assert len(resumed.files["a.txt"]["uploaded"]) == 20
+
+    # Rewriting the journal on resume keeps the synced state
+    resumed.sync = lambda: None
+    resumed.start([tmp_path / "a.txt"])
+    again = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl")
+    assert again.load()
+    assert len(again.files["a.txt"]["uploaded"]) == 20
+    resumed.close()
+
+
+def test_uploaded_batches_are_flushed_immediately(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    journal = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl", flush_interval=3600)
+    journal.start([tmp_path / "a.txt"])
+    journal.begin_file(tmp_path / "a.txt")
+    journal.record_uploaded([make_doc("a.txt", 0)])
+
+    # Readable by a resumed run without closing (i.e. after a crash)
+    resumed = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl")
+    assert resumed.load()
+    assert resumed.files["a.txt"]["uploaded"] == {"a.txt-0"}
+    journal.close()
+
+
+def test_resume_ignores_changed_files_and_other_settings(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("a")
+    journal = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl")
+    journal.start([path])
+    journal.begin_file(path)
+    journal.end_file("a.txt", ["a.txt-0"], {}, [], [])
+    journal.record_uploaded([make_doc("a.txt", 0)])
+    journal.close()
+
+    assert not IngestJournal("test", {**SETTINGS, "dimensions": 8}, tmp_path / "journal.jsonl").load()
+    resumed = IngestJournal("test", SETTINGS, tmp_path / "journal.jsonl")
+    assert resumed.load()
+    assert resumed.completed(path)["chunk_ids"] == ["a.txt-0"]
+
+    path.write_text("changed")
+    resumed.start([path])
+    assert resumed.completed(path) is None
+    resumed.close()
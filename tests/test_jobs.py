@@ -0,0 +1,94 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import jobs
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOB_STORE_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setenv("JOB_HEARTBEAT_SECONDS", "1")
+    monkeypatch.setattr(jobs, "_store", None)
+    return jobs.get_job_store()
+
+
+def add_job(store, status="running", age=0.0) -> str:
+    job_id = store.create(jobs.ChatJobRequest(messages=[{"role": "user", "content": "hi"}]))
+    store._connect().execute(
+        "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, time.time() - age, job_id)
+    )
+    return job_id
+
+
+def test_stale_running_job_failed_and_fresh_one_kept(store):
+    lost = add_job(store, age=10)
+    alive = add_job(store, age=0)
+    assert store.fail_stale(4) == 1
+    assert store.get(lost)["status"] == "failed"
+    assert store.get(alive)["status"] == "running"
+
+
+def test_heartbeat_keeps_job_alive(store):
+    job_id = add_job(store, age=10)
+    store.heartbeat([job_id])
+    assert store.fail_stale(4) == 0
+
+
+def test_finish_does_not_revive_failed_job(store):
+    job_id = add_job(store, age=10)
+    store.fail_stale(4)
+    store.finish(job_id, result={"late": True})
+    assert store.get(job_id)["status"] == "failed"
+
+
+def test_reading_a_lost_job_fails_it(store):
+    job_id = add_job(store, age=60)
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/api")
+    response = TestClient(app).get(f"/api/chat/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "failed"
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "https://10.1.2.3/hook",
+    "http://[::1]:8080/hook",
+    "http://localhost/hook",
+    "ftp://example.com/hook",
+])
+def test_callback_to_internal_address_rejected(url):
+    with pytest.raises(ValueError):
+        jobs.check_callback_url(url)
+
+
+def test_callback_allowlist(monkeypatch):
+    monkeypatch.setenv("JOB_CALLBACK_ALLOWED_HOSTS", "hooks.internal, localhost")
+    jobs.check_callback_url("http://localhost:9000/hook")
+    jobs.check_callback_url("https://93.184.216.34/hook")
+
+
+def test_send_callback_sleeps_only_between_attempts(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(jobs.time, "sleep", sleeps.append)
+
+    def fail(*args, **kwargs):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(jobs._callback_opener, "open", fail)
+    job = jobs.ChatJob(job_id="job_1", status="succeeded", created_at=0, updated_at=0)
+    jobs.send_callback("https://93.184.216.34/hook", job)
+    assert len(sleeps) == jobs.CALLBACK_ATTEMPTS - 1
+
+
+def test_send_callback_skips_blocked_target(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("request sent")
+
+    monkeypatch.setattr(jobs._callback_opener, "open", fail)
+    job = jobs.ChatJob(job_id="job_1", status="succeeded", created_at=0, updated_at=0)
+    jobs.send_callback("http://169.254.169.254/", job)
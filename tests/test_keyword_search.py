@@ -0,0 +1,87 @@
+"""BM25 keyword ranking and reciprocal rank fusion."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from keyword_search import KeywordIndex, reciprocal_rank_fusion
+from local_search import LocalSearchClient
+
+
+@pytest.fixture
+def index():
+    index = KeywordIndex()
+    index.add(0, "Return policy", "Items can be returned within 30 days with a receipt.")
+    index.add(1, "Shipping guide", "Orders ship within two days. Returns are handled by the store.")
+    index.add(2, "Warranty", "The warranty covers manufacturing defects for one year.")
+    return index
+
+
+def test_bm25_ranks_matching_rows_first(index):
+    scores = index.scores("warranty defects", 3)
+    assert scores[2] > 0
+    assert scores[0] == 0 and scores[1] == 0
+
+
+def test_rare_terms_outweigh_common_ones(index):
+    scores = index.scores("returned receipt", 3)
+    assert scores[0] > scores[1]
+
+
+def test_deleted_rows_no_longer_match(index):
+    index.delete(2)
+    assert index.scores("warranty", 3)[2] == 0
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [4, 2, 5]], k=60)
+    rows = [row for row, _ in fused]
+    assert rows[0] == 2
+    assert set(rows) == {1, 2, 3, 4, 5}
+    assert dict(fused)[2] == pytest.approx(2 / 62)
+
+
+def test_title_matches_outweigh_content_matches():
+    index = KeywordIndex()
+    index.add(0, "Warranty", "Covers defects.")
+    index.add(1, "Support", "Contact us about the warranty.")
+    scores = index.scores("warranty", 2)
+    assert scores[0] > scores[1] > 0
+
+
+def test_saved_index_scores_the_same(index, tmp_path):
+    index.delete(1)
+    index.save(tmp_path / "keywords.npz")
+    loaded = KeywordIndex.load(tmp_path / "keywords.npz")
+    assert len(loaded) == 2
+    for query in ("returned receipt", "warranty defects", "store"):
+        assert loaded.scores(query, 3) == pytest.approx(index.scores(query, 3))
+
+
+def test_compaction_renumbers_live_rows(index):
+    index.delete(1)
+    compacted = index.compact(np.array([0, 2]))
+    assert compacted.scores("warranty", 2)[1] == pytest.approx(index.scores("warranty", 3)[2])
+    assert compacted.scores("shipping", 2).sum() == 0
+
+
+def test_local_hybrid_search_fuses_keyword_and_vector_rankings(tmp_path):
+    client = LocalSearchClient("test", tmp_path)
+    client.upload_documents([
+        {"id": "a", "title": "Return policy", "content": "Returns within 30 days.", "source": "a.txt",
+         "page_number": 1, "embedding": [1.0, 0.0]},
+        {"id": "b", "title": "Shipping", "content": "Orders ship in two days.", "source": "b.txt",
+         "page_number": 1, "embedding": [0.0, 1.0]},
+        {"id": "c", "title": "Exchanges", "content": "Returns or exchanges at any store.", "source": "c.txt",
+         "page_number": 1, "embedding": [0.7, 0.7]},
+    ])
+    query = SimpleNamespace(vector=[0.0, 1.0], k_nearest_neighbors=3, fields="embedding")
+    keyword = [r["id"] for r in client.search(search_text="returns", top=3)]
+    vector = [r["id"] for r in client.search(vector_queries=[query], top=3)]
+    hybrid = list(client.search(search_text="returns", vector_queries=[query], top=3))
+
+    assert keyword[0] != vector[0]
+    expected = reciprocal_rank_fusion([keyword, vector])
+    assert [r["id"] for r in hybrid] == [doc_id for doc_id, _ in expected]
+    assert [r["@search.score"] for r in hybrid] == pytest.approx([score for _, score in expected])
@@ -0,0 +1,55 @@
+"""Quarantine records of PDF extraction share one shape."""
+
+import pdf_extract
+from pdf_extract import PdfExtractor, extract_page_range, iter_pdf_pages
+from synthetic_corpus import write_pdf
+
+KEYS = {"source", "page_number", "reason"}
+
+
+def make_pdf(path, pages=3):
+    write_pdf(path, [[f"Page {i + 1} line {j}" for j in range(5)] for i in range(pages)])
+    return path
+
+
+def failing_page(number):
+    original = pdf_extract._extract_page
+
+    def extract(reader, index, page_timeout):
+        if index + 1 == number:
+            raise ValueError("bad content stream")
+        return original(reader, index, page_timeout)
+    return extract
+
+
+def test_iter_pdf_pages_quarantines_records(tmp_path, monkeypatch):
+    path = make_pdf(tmp_path / "a.pdf")
+    monkeypatch.setattr(pdf_extract, "_extract_page", failing_page(2))
+    quarantined = []
+    pages = list(iter_pdf_pages(path, quarantined=quarantined))
+    assert [number for number, _ in pages] == [1, 3]
+    assert quarantined == [{"source": "a.pdf", "page_number": 2, "reason": "ValueError: bad content stream"}]
+
+
+def test_page_range_of_unreadable_file_quarantines_records(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+    pages, quarantined = extract_page_range(str(path), 0, 2)
+    assert pages == []
+    assert [record["page_number"] for record in quarantined] == [1, 2]
+    assert all(set(record) == KEYS and record["source"] == "broken.pdf" for record in quarantined)
+
+
+def test_extractor_reports_the_same_shape(tmp_path):
+    good = make_pdf(tmp_path / "good.pdf")
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    extractor = PdfExtractor(max_workers=1)
+    try:
+        results = dict(extractor.iter_pages([good, broken]))
+    finally:
+        extractor.close()
+    assert len(results[good]) == 3
+    assert results[broken] == []
+    assert [(record["source"], record["page_number"]) for record in extractor.quarantined] == [("broken.pdf", None)]
+    assert all(set(record) == KEYS for record in extractor.quarantined)
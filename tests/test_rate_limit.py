@@ -0,0 +1,58 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+import rate_limit
+
+
+def make_request(peer: str, forwarded: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 50000)})
+
+
+def test_forwarded_header_ignored_without_trusted_proxy(monkeypatch):
+    monkeypatch.delenv("TRUSTED_PROXIES", raising=False)
+    assert rate_limit.client_key(make_request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_forwarded_header_ignored_from_untrusted_peer(monkeypatch):
+    monkeypatch.setenv("TRUSTED_PROXIES", "10.0.0.0/8")
+    assert rate_limit.client_key(make_request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_forwarded_header_from_trusted_proxy(monkeypatch):
+    monkeypatch.setenv("TRUSTED_PROXIES", "10.0.0.0/8")
+    assert rate_limit.client_key(make_request("10.0.0.2", "198.51.100.1")) == "198.51.100.1"
+
+
+def test_spoofed_entries_before_the_real_client_are_skipped(monkeypatch):
+    monkeypatch.setenv("TRUSTED_PROXIES", "10.0.0.0/8")
+    # The client sent a made-up header; the proxy appended the real address
+    request = make_request("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.3")
+    assert rate_limit.client_key(request) == "198.51.100.1"
+
+
+@pytest.fixture
+def client(state, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_PER_MINUTE", "3")
+    app = FastAPI()
+
+    @app.get("/ping", dependencies=[Depends(rate_limit.enforce_rate_limit)])
+    def ping():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_limit_enforced(client):
+    statuses = [client.get("/ping").status_code for _ in range(5)]
+    assert statuses == [200, 200, 200, 429, 429]
+    assert "Retry-After" in client.get("/ping").headers
+
+
+def test_made_up_forwarded_header_does_not_bypass_limit(client):
+    statuses = [
+        client.get("/ping", headers={"X-Forwarded-For": f"198.51.100.{i}"}).status_code for i in range(5)
+    ]
+    assert statuses.count(429) == 2
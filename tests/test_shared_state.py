@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import shared_state
+from fake_redis import FakeRedisServer
+
+
+@pytest.fixture(scope="module")
+def redis_server():
+    server = FakeRedisServer().start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path, redis_server):
+    if request.param == "memory":
+        return shared_state.MemoryState()
+    if request.param == "sqlite":
+        return shared_state.SQLiteState(str(tmp_path / "state.db"))
+    redis_server.store.data.clear()
+    return shared_state.RedisState(redis_server.url)
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        shared_state.SharedState()
+
+
+def test_primitives(backend):
+    assert backend.get("k") is None
+    backend.set("k", "v")
+    assert backend.get("k") == "v"
+    assert not backend.set_if_absent("k", "other")
+    assert backend.set_if_absent("new", "x")
+    backend.delete("k")
+    assert backend.get("k") is None
+    assert [backend.incr("n", ttl=60) for _ in range(3)] == [1, 2, 3]
+    backend.set_json("j", {"a": 1})
+    assert backend.get_json("j") == {"a": 1}
+
+
+def test_expiry(backend):
+    backend.set("k", "v", ttl=0.05)
+    assert backend.set_if_absent("k", "w", ttl=60) is False
+    time.sleep(0.1)
+    assert backend.get("k") is None
+
+
+class _DroppedReader:
+    """Connection that dies after the command was sent, before the reply arrives."""
+
+    def readline(self):
+        return b""
+
+    def close(self):
+        pass
+
+
+def test_redis_incr_not_resent_after_dropped_connection(redis_server):
+    redis_server.store.data.clear()
+    state = shared_state.RedisState(redis_server.url)
+    assert state.incr("n") == 1
+    old_sock = state._local.sock
+    state._local.reader = _DroppedReader()
+
+    with pytest.raises(ConnectionError):
+        state.incr("n")
+
+    assert old_sock.fileno() == -1
+    # The dropped INCR was applied once and not sent again
+    assert state.get("n") == "2"
+
+
+def test_redis_idempotent_commands_reconnect(redis_server):
+    redis_server.store.data.clear()
+    state = shared_state.RedisState(redis_server.url)
+    state.set("k", "v")
+    state._local.reader = _DroppedReader()
+    assert state.get("k") == "v"
@@ -0,0 +1,78 @@
+"""Consistency of the synthetic Fabric IQ tables."""
+
+import csv
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pytest
+
+import synthetic_data
+from synthetic_data import SyntheticDataEngine, load_ontology, ontology_from_columns
+
+
+def read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    output = tmp_path_factory.mktemp("synthetic")
+    rows = {"Customer": 300, "Product": 40, "Order": 2000}
+    SyntheticDataEngine(load_ontology(), rows, seed=3, chunk_rows=500).write_csv(output)
+    return {name: read(output / f"{name}.csv") for name in ("customers", "products", "orders", "orderdetails")}
+
+
+def test_foreign_keys_reference_existing_rows(tables):
+    customers = {row["CustomerID"] for row in tables["customers"]}
+    products = {row["ProductID"] for row in tables["products"]}
+    orders = {row["OrderID"] for row in tables["orders"]}
+    assert len(orders) == 2000
+    assert {row["CustomerID"] for row in tables["orders"]} <= customers
+    assert {row["OrderID"] for row in tables["orderdetails"]} == orders
+    assert {row["ProductID"] for row in tables["orderdetails"]} <= products
+
+
+def test_totals_add_up(tables):
+    prices = {row["ProductID"]: row["UnitPrice"] for row in tables["products"]}
+    order_totals = defaultdict(float)
+    for line in tables["orderdetails"]:
+        assert line["UnitPrice"] == prices[line["ProductID"]]
+        expected = int(line["Quantity"]) * float(line["UnitPrice"]) * (1 - float(line["Discount"]))
+        assert float(line["LineTotal"]) == pytest.approx(expected, abs=0.006)
+        order_totals[line["OrderID"]] += float(line["LineTotal"])
+
+    customer_totals = defaultdict(float)
+    for order in tables["orders"]:
+        assert float(order["TotalAmount"]) == pytest.approx(order_totals[order["OrderID"]], abs=0.01)
+        customer_totals[order["CustomerID"]] += float(order["TotalAmount"])
+    for customer in tables["customers"]:
+        assert float(customer["LifetimeValue"]) == pytest.approx(customer_totals[customer["CustomerID"]], abs=0.05)
+
+
+def test_dates_are_within_the_last_year(tables):
+    today = date.today()
+    first = today - timedelta(days=synthetic_data.DATE_SPAN_DAYS)
+    joined = {row["CustomerID"]: date.fromisoformat(row["JoinDate"]) for row in tables["customers"]}
+    for order in tables["orders"]:
+        ordered, shipped = date.fromisoformat(order["OrderDate"]), date.fromisoformat(order["ShipDate"])
+        assert first <= joined[order["CustomerID"]] <= ordered <= shipped <= today
+
+
+def test_fallback_rows_stay_within_the_last_year():
+    ontology = ontology_from_columns([("Orders", ["OrderID", "CustomerID", "OrderDate", "ShipDate", "Quantity"])])
+    rows = SyntheticDataEngine(ontology, {"Orders": 5000}, seed=1).rows_for("Orders", 1, 5000)
+    today = date.today()
+    for row in rows:
+        ordered, shipped = date.fromisoformat(row["OrderDate"]), date.fromisoformat(row["ShipDate"])
+        assert today - timedelta(days=365) <= ordered <= shipped <= today
+
+
+def test_values_with_commas_and_quotes_are_quoted(tmp_path, monkeypatch):
+    monkeypatch.setitem(synthetic_data.KNOWN_VALUES, "segment", ['Small, "Medium" Business'])
+    ontology = ontology_from_columns([("Accounts", ["AccountID", "Segment", "Balance"])])
+    SyntheticDataEngine(ontology, {"Accounts": 10}).write_csv(tmp_path)
+    rows = read(tmp_path / "accounts.csv")
+    assert len(rows) == 10
+    assert {row["Segment"] for row in rows} == {'Small, "Medium" Business'}
+    assert all(None not in row for row in rows)
@@ -0,0 +1,60 @@
+"""Shared token refresh across threads and coroutines."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from token_provider import RefreshingCredential, async_bearer_token_provider, bearer_token_provider
+
+
+class SlowCredential:
+    """Issues numbered tokens after a delay, counting the calls."""
+
+    def __init__(self, lifetime: float = 3600, delay: float = 0.05):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls += 1
+            return SimpleNamespace(token=f"token-{self.calls}", expires_on=time.time() + self.lifetime)
+
+
+def test_concurrent_async_callers_share_one_refresh():
+    inner = SlowCredential()
+    provider = async_bearer_token_provider(credential=RefreshingCredential(inner, refresh_margin=60))
+
+    async def main():
+        return await asyncio.gather(*(provider() for _ in range(20)))
+
+    assert asyncio.run(main()) == ["token-1"] * 20
+    assert inner.calls == 1
+
+
+def test_async_refresh_does_not_block_the_event_loop():
+    inner = SlowCredential(delay=0.3)
+    credential = RefreshingCredential(inner, refresh_margin=60)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        await asyncio.gather(credential.get_token_async("scope"), ticker())
+
+    asyncio.run(main())
+    assert ticks[-1] - ticks[0] < 0.25
+
+
+def test_token_is_refreshed_before_expiry():
+    inner = SlowCredential(lifetime=30, delay=0)
+    provider = bearer_token_provider(credential=RefreshingCredential(inner, refresh_margin=60))
+    assert provider() == "token-1"
+    # Within the refresh margin of expiry, every call fetches a new token
+    assert provider() == "token-2"
@@ -0,0 +1,54 @@
+"""Embedding request dimensions agree with the index schema."""
+
+import pytest
+
+from vector_compression import VectorSettings, embedding_field
+
+
+@pytest.fixture
+def env(monkeypatch):
+    for name in ("AZURE_EMBEDDING_MODEL", "EMBEDDING_MODEL_NAME", "EMBEDDING_DIMENSIONS", "VECTOR_COMPRESSION"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_native_size_is_not_requested(env):
+    settings = VectorSettings.from_env()
+    assert settings.dimensions == 1536
+    assert settings.request_dimensions is None
+
+
+def test_shortened_known_model(env):
+    env.setenv("EMBEDDING_DIMENSIONS", "512")
+    settings = VectorSettings.from_env()
+    assert settings.request_dimensions == 512
+    assert embedding_field(settings).vector_search_dimensions == 512
+
+
+def test_unknown_deployment_requests_configured_dimensions(env):
+    env.setenv("AZURE_EMBEDDING_MODEL", "embed-small")
+    env.setenv("EMBEDDING_DIMENSIONS", "512")
+    settings = VectorSettings.from_env()
+    assert settings.request_dimensions == 512
+    assert embedding_field(settings).vector_search_dimensions == 512
+
+
+def test_deployment_checked_against_model_name(env):
+    env.setenv("AZURE_EMBEDDING_MODEL", "embed-small")
+    env.setenv("EMBEDDING_MODEL_NAME", "text-embedding-3-small")
+    env.setenv("EMBEDDING_DIMENSIONS", "2048")
+    with pytest.raises(ValueError, match="at most 1536"):
+        VectorSettings.from_env()
+
+    env.setenv("EMBEDDING_MODEL_NAME", "text-embedding-ada-002")
+    env.setenv("EMBEDDING_DIMENSIONS", "512")
+    with pytest.raises(ValueError, match="reduced dimensions"):
+        VectorSettings.from_env()
+
+
+def test_named_deployment_uses_model_defaults(env):
+    env.setenv("AZURE_EMBEDDING_MODEL", "embed-large")
+    env.setenv("EMBEDDING_MODEL_NAME", "text-embedding-3-large")
+    settings = VectorSettings.from_env()
+    assert settings.dimensions == 3072
+    assert settings.request_dimensions is None